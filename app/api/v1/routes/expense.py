@@ -1,14 +1,23 @@
-from fastapi import APIRouter, Depends
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
-from app.schemas.expense import ExpenseCreate
+from app.schemas.expense import ExpenseCreate, ExpenseImportResult
 from app.services.expense_services import (
     create_expense,
     delete_expense,
     get_my_expenses,
     get_expenses_by_group,
+    stream_my_expenses,
+    stream_expenses_by_group,
 )
-from app.core.dependencies import get_current_user
+from app.services.expense_import_service import import_expenses, parse_import_rows
+from app.services.group_services import get_group_version, get_user_groups_version
+from app.core.dependencies import get_current_user, get_read_db
+from app.core.etag import make_etag, conditional
+from app.core.pagination import MAX_PAGE_SIZE
+from app.core.responses import json_response
 
 router = APIRouter()
 
@@ -18,20 +27,64 @@ router = APIRouter()
 async def add_expense(
     group_id: int,
     data: ExpenseCreate,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user=Depends(get_current_user),
+    idempotency_key: Optional[str] = Header(None, alias="Idempotency-Key"),
 ):
-    return await create_expense(db, data, current_user.id, group_id)
+    return await create_expense(
+        db, data, current_user.id, group_id, idempotency_key, response
+    )
+
+
+# working fine
+@router.post(
+    "/{group_id}/import",
+    response_model=ExpenseImportResult,
+    description="bulk import expenses from CSV or JSON lines",
+)
+async def import_group_expenses(
+    group_id: int,
+    request: Request,
+    db: AsyncSession = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    rows = parse_import_rows(
+        await request.body(), request.headers.get("content-type", "")
+    )
+    return await import_expenses(db, group_id, current_user.id, rows)
 
 
 # working fine
 @router.get("/{group_id}/all")
 async def all_expenses(
     group_id: int,
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db),
     current_user=Depends(get_current_user),
 ):
-    return await get_expenses_by_group(db, group_id, current_user.id)
+    if stream:
+        rows = await stream_expenses_by_group(db, group_id, current_user.id)
+        return StreamingResponse(rows, media_type="application/x-ndjson")
+
+    version = await get_group_version(db, group_id, current_user.id)
+    if version is not None:
+        etag = make_etag("expenses", group_id, version, current_user.id, limit, cursor)
+        not_modified = conditional(request, response, etag)
+        if not_modified:
+            return not_modified
+
+    expenses, next_cursor = await get_expenses_by_group(
+        db, group_id, current_user.id, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return json_response(expenses, response)
 
 
 # working fine
@@ -47,8 +100,28 @@ async def del_expense(
 # working fine
 @router.get("/my-expenses")
 async def expenses_paid_by_me(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    response: Response,
+    limit: int | None = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    cursor: str | None = None,
+    stream: bool = False,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user),
 ):
-    print(user.id)
-    return await get_my_expenses(db, user_id=user.id)
+    if stream:
+        rows = await stream_my_expenses(db, user_id=user.id)
+        return StreamingResponse(rows, media_type="application/x-ndjson")
+
+    version = await get_user_groups_version(db, user.id)
+    etag = make_etag("my-expenses", user.id, *version, limit, cursor)
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    expenses, next_cursor = await get_my_expenses(
+        db, user_id=user.id, limit=limit, cursor=cursor
+    )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
+
+    return json_response(expenses, response)
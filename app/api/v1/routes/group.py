@@ -1,4 +1,5 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from fastapi.responses import StreamingResponse
 from app.schemas.user import AuthUser
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
@@ -10,8 +11,11 @@ from app.services.group_services import (
     delete_group,
     edit_group,
     get_group_by_id,
+    get_group_version,
+    get_user_groups_version,
     weekly_activity,
     group_analytics_service,
+    group_events,
 )
 from app.schemas.group import (
     GroupCreate,
@@ -22,7 +26,9 @@ from app.schemas.group import (
     UpdateGroupName,
     UpdateGroupResponse,
 )
-from app.core.dependencies import get_current_user
+from app.core.dependencies import get_current_user, get_read_db
+from app.core.etag import make_etag, conditional
+from app.core.responses import json_response
 
 
 router = APIRouter()
@@ -42,15 +48,24 @@ async def create_new_group(
 # working fine
 @router.get("/", response_model=list[GroupListResponse], description="get user groups")
 async def get_groups(
-    db: AsyncSession = Depends(get_db), user: AuthUser = Depends(get_current_user)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    user: AuthUser = Depends(get_current_user),
 ):
-    return await list_group_for_user(db, user.id)
+    version = await get_user_groups_version(db, user.id)
+    etag = make_etag("groups", user.id, *version)
+    not_modified = conditional(request, response, etag)
+    if not_modified:
+        return not_modified
+
+    return json_response(await list_group_for_user(db, user.id), response)
 
 
 # working fine
 @router.get("/analytics")
 async def fetch_analytics(
-    db: AsyncSession = Depends(get_db), user: AuthUser = Depends(get_current_user)
+    db: AsyncSession = Depends(get_read_db), user: AuthUser = Depends(get_current_user)
 ):
     return await group_analytics_service(db, user.id)
 
@@ -59,10 +74,19 @@ async def fetch_analytics(
 @router.get("/{group_id}", response_model=GroupDetailOut, description="get group by id")
 async def get_group_data(
     group_id: int,
+    request: Request,
+    response: Response,
     db: AsyncSession = Depends(get_db),
     current_user: AuthUser = Depends(get_current_user),
 ):
-    return await get_group_by_id(db, group_id, current_user.id)
+    version = await get_group_version(db, group_id, current_user.id)
+    if version is not None:
+        etag = make_etag("group", group_id, version, current_user.id)
+        not_modified = conditional(request, response, etag)
+        if not_modified:
+            return not_modified
+
+    return json_response(await get_group_by_id(db, group_id, current_user.id), response)
 
 
 # working fine
@@ -103,7 +127,7 @@ async def add_group_member(
 @router.get("/{group_id}/weekly-activity")
 async def get_weekly_activity(
     group_id: int,
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
     current_user: AuthUser = Depends(get_current_user),
 ):
     return await weekly_activity(db, group_id, current_user.id)
@@ -112,8 +136,23 @@ async def get_weekly_activity(
 # working fine
 @router.get("/{group_id}/members")
 async def group_members(
+    group_id: int,
+    db: AsyncSession = Depends(get_read_db),
+    current_user: AuthUser = Depends(get_current_user),
+):
+    return json_response(await list_group_members(db, current_user.id, group_id))
+
+
+# working fine
+@router.get("/{group_id}/events", description="group change feed (SSE)")
+async def group_event_stream(
     group_id: int,
     db: AsyncSession = Depends(get_db),
     current_user: AuthUser = Depends(get_current_user),
 ):
-    return await list_group_members(db, current_user.id, group_id)
+    events = await group_events(db, group_id, current_user.id)
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
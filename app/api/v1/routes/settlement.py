@@ -4,6 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from app.core.dependencies import get_current_user
 from app.services.settlement_service import admin_group_settlements
+from app.core.responses import json_response
 
 router = APIRouter()
 
@@ -12,4 +13,4 @@ router = APIRouter()
 async def get_settlements(
     db: AsyncSession = Depends(get_db), user: AuthUser = Depends(get_current_user)
 ):
-    return await admin_group_settlements(db, user.id)
+    return json_response(await admin_group_settlements(db, user.id))
@@ -1,6 +1,14 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query
+from fastapi.responses import PlainTextResponse
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.services.system_services import check_db_service, system_metrics, system_health
+from app.services.system_services import (
+    check_db_service,
+    system_metrics,
+    system_health,
+    slow_query_report,
+)
+from app.core.dependencies import require_admin
+from app.core.metrics import render_prometheus
 from app.db.session import get_db
 
 router = APIRouter()
@@ -15,6 +23,16 @@ async def metrics(
 ):
     return await system_metrics(db)
 
+@router.get("/metrics/prometheus", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4"
+    )
+
+@router.get("/slow-queries", dependencies=[Depends(require_admin)])
+async def slow_queries(limit: int = Query(50, ge=0, le=500)):
+    return await slow_query_report(limit)
+
 @router.get("/health")
 async def health():
     return await system_health()
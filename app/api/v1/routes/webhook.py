@@ -1,7 +1,8 @@
+import hashlib
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
 from fastapi import APIRouter, Depends, HTTPException, Request
-from app.services.user_service import create_user_from_clerk, update_user_from_clerk, deactivate_user_from_clerk
+from app.services.webhook_service import HANDLED_EVENTS, enqueue_clerk_event
 
 router = APIRouter()
 
@@ -18,13 +19,11 @@ async def create_user(request : Request, db: AsyncSession = Depends(get_db)):
     if not event_type or not data:
         raise HTTPException(status_code=400, detail="Invalid webhook payload")
 
-    if event_type == "user.created":
-        await create_user_from_clerk(db, data)
+    # Stored as-is and applied by the inbox worker, so Clerk gets its 200 fast
+    if event_type in HANDLED_EVENTS:
+        event_id = request.headers.get("svix-id") or hashlib.sha256(
+            await request.body()
+        ).hexdigest()
+        await enqueue_clerk_event(db, event_id, event_type, payload)
 
-    elif event_type == "user.updated":
-        await update_user_from_clerk(db, data)
-
-    elif event_type == "user.deleted":
-        await deactivate_user_from_clerk(db, data)
-
-    return {"ok": True}
\ No newline at end of file
+    return {"ok": True}
@@ -0,0 +1,79 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional
+
+
+class TTLCache:
+    """
+    Bounded LRU map whose entries also expire after `ttl` seconds.
+
+    Lives in process memory, so each worker keeps its own copy; the TTL
+    bounds how stale an entry can get when an invalidation happens on a
+    different worker. Not thread-safe - meant for the event loop only.
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        # Bumped on every invalidation so readers can tell whether the
+        # value they loaded raced with a write
+        self.generation = 0
+        self._data: "OrderedDict[Hashable, tuple[Any, float]]" = OrderedDict()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        item = self._data.get(key)
+
+        if item is None:
+            self.misses += 1
+            return default
+
+        value, expires_at = item
+        if expires_at <= monotonic():
+            del self._data[key]
+            self.misses += 1
+            return default
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(
+        self,
+        key: Hashable,
+        value: Any,
+        ttl: Optional[float] = None,
+        generation: Optional[int] = None,
+    ) -> None:
+        # Drop values loaded before an invalidation landed
+        if generation is not None and generation != self.generation:
+            return
+
+        self._data[key] = (value, monotonic() + (self.ttl if ttl is None else ttl))
+        self._data.move_to_end(key)
+
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def invalidate(self, *keys: Hashable) -> None:
+        self.generation += 1
+        for key in keys:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self.generation += 1
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
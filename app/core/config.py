@@ -2,10 +2,76 @@ from pydantic_settings import BaseSettings
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    # Optional read replica for the read-heavy GET endpoints
+    READ_DATABASE_URL: str | None = None
+
+    # Connection pool, per app worker (and per engine when a replica is set).
+    # DB_MAX_CONNECTIONS caps the whole deployment: it is split across
+    # WEB_CONCURRENCY workers and trims pool size + overflow to fit.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_MAX_CONNECTIONS: int | None = None
+    WEB_CONCURRENCY: int = 1
+    # Seconds a request waits for a free connection before failing
+    DB_POOL_TIMEOUT: float = 30
+    # Connections older than this are replaced at checkout (no pre-ping)
+    DB_POOL_RECYCLE: int = 1800
+    DB_CONNECT_TIMEOUT: float = 10
+    # Server-side statement_timeout, 0 to disable
+    DB_STATEMENT_TIMEOUT_MS: int = 0
     CLERK_SIGNING_SECRET:str
     ENV: str = "development"
     CLIENT_URL: str = "http://localhost:5173"
 
+    # Authenticated user lookups (clerk_user_id -> AuthUser), per worker.
+    # Also the cross-worker staleness window: a user deactivated on another
+    # worker stays authenticated here for up to USER_CACHE_TTL seconds
+    USER_CACHE_TTL: int = 60
+    USER_CACHE_SIZE: int = 10_000
+
+    # Verified JWT claims, keyed by token hash
+    TOKEN_CACHE_SIZE: int = 10_000
+    # Read the Clerk JWKS from a local file instead of the network
+    CLERK_JWKS_FILE: str | None = None
+
+    # Settlement engine: "auto", "exact" or "greedy". The exact solver's
+    # time budget is shared by every group settled in one request.
+    SETTLEMENT_STRATEGY: str = "auto"
+    SETTLEMENT_TIME_BUDGET_MS: int = 100
+
+    # Group change feed (SSE)
+    EVENT_QUEUE_SIZE: int = 64
+    EVENT_HEARTBEAT_SECONDS: int = 15
+    EVENT_RETRY_MS: int = 3000
+
+    # Statements at or above the threshold go to the slow-query log
+    SLOW_QUERY_MS: int = 200
+    SLOW_QUERY_LOG_SIZE: int = 500
+
+    # PIN hashing: bcrypt cost, worker processes per app worker, and how
+    # many requests may wait for a free worker before getting a 503
+    PIN_BCRYPT_ROUNDS: int = 12
+    PIN_HASH_WORKERS: int = 2
+    PIN_HASH_MAX_QUEUE: int = 64
+
+    # Clerk webhook inbox worker
+    WEBHOOK_BATCH_SIZE: int = 200
+    WEBHOOK_POLL_SECONDS: float = 1.0
+    WEBHOOK_MAX_ATTEMPTS: int = 5
+    WEBHOOK_RETENTION_DAYS: int = 7
+
+    # Stored Idempotency-Key responses are replayed for this long
+    IDEMPOTENCY_TTL_HOURS: int = 24
+
+    # Replica routing: lag beyond which reads go back to the primary, how
+    # often lag is probed, and how long a writer's reads stay on the primary
+    REPLICA_MAX_LAG_SECONDS: float = 2.0
+    REPLICA_LAG_CHECK_SECONDS: float = 1.0
+    RECENT_WRITE_SECONDS: float = 10.0
+
+    # Clerk user ids allowed on admin-only endpoints (JSON list in env)
+    ADMIN_CLERK_USER_IDS: list[str] = []
+
     class Config:
         env_file = ".env"
 
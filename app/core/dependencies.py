@@ -4,9 +4,39 @@ from app.models.user import User
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.security import verify_clerk_token
 from app.db.session import get_db
-from sqlalchemy import select, exists
+from app.db.replica import current_user_id, session_for_reads
+from sqlalchemy import bindparam, select, exists
 from app.models.group import Group
 from app.models.group_member import GroupMember
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+# Active users only, per worker process. webhook_service invalidates entries
+# when it drains the Clerk inbox, but only in the worker that drained it;
+# every other worker keeps serving its cached entry until it expires, so a
+# user deactivated elsewhere stays authenticated there for up to a full
+# USER_CACHE_TTL (app/core/config.py).
+user_cache = TTLCache(maxsize=settings.USER_CACHE_SIZE, ttl=settings.USER_CACHE_TTL)
+
+# Hot-path statements are built once: executing a prebuilt statement reuses
+# its memoized cache key and skips constructing the select on every request
+CURRENT_USER_Q = select(User).where(User.clerk_user_id == bindparam("clerk_user_id"))
+
+# Live group id plus whether the user is a member, in one round trip
+ACTIVE_MEMBERSHIP_Q = select(
+    Group.id,
+    exists()
+    .where(
+        GroupMember.group_id == Group.id,
+        GroupMember.user_id == bindparam("user_id"),
+    )
+    .label("is_member"),
+).where(Group.id == bindparam("group_id"), Group.is_deleted == False)
+
+MEMBER_ID_Q = select(GroupMember.id).where(
+    GroupMember.user_id == bindparam("user_id"),
+    GroupMember.group_id == bindparam("group_id"),
+)
 
 
 # working fine
@@ -16,19 +46,47 @@ async def get_current_user(
     payload = await verify_clerk_token(request)
     clerk_user_id = payload["sub"]
 
-    result = await db.execute(select(User).where(User.clerk_user_id == clerk_user_id))
+    cached = user_cache.get(clerk_user_id)
+    if cached is not None:
+        current_user_id.set(cached.id)
+        return cached
+
+    generation = user_cache.generation
+    result = await db.execute(CURRENT_USER_Q, {"clerk_user_id": clerk_user_id})
 
     user = result.scalar_one_or_none()
 
     if not user or not user.is_active:
         raise HTTPException(status_code=401, detail="Unauthorized")
 
-    return AuthUser(
+    auth_user = AuthUser(
         id=user.id,
         clerk_user_id=user.clerk_user_id,
         email=user.email,
         is_active=user.is_active,
     )
+    user_cache.set(clerk_user_id, auth_user, generation=generation)
+    current_user_id.set(auth_user.id)
+
+    return auth_user
+
+
+# working fine
+async def get_read_db(user: AuthUser = Depends(get_current_user)):
+    """
+    Session for read-only endpoints: the replica when configured, healthy
+    and not behind this user's own recent writes, otherwise the primary.
+    """
+    async with session_for_reads(user.id)() as session:
+        yield session
+
+
+# working fine
+async def require_admin(user: AuthUser = Depends(get_current_user)) -> AuthUser:
+    if user.clerk_user_id not in settings.ADMIN_CLERK_USER_IDS:
+        raise HTTPException(status_code=403, detail="Admin access required")
+
+    return user
 
 
 # working fine
@@ -37,31 +95,21 @@ async def ensure_active_group_member(
     user_id: int,
     group_id: int,
 ):
-    # Check group exists and is not deleted
-    group = await db.scalar(
-        select(Group.id).where(
-            Group.id == group_id,
-            Group.is_deleted == False,
+    row = (
+        await db.execute(
+            ACTIVE_MEMBERSHIP_Q, {"group_id": group_id, "user_id": user_id}
         )
-    )
+    ).first()
 
-    if not group:
+    # Check group exists and is not deleted
+    if not row:
         raise HTTPException(
             status_code=404,
             detail="Group not found or has been deleted",
         )
 
     # Check membership
-    is_member = await db.scalar(
-        select(
-            exists().where(
-                GroupMember.group_id == group_id,
-                GroupMember.user_id == user_id,
-            )
-        )
-    )
-
-    if not is_member:
+    if not row.is_member:
         raise HTTPException(
             status_code=403,
             detail="Unauthorized access",
@@ -70,10 +118,7 @@ async def ensure_active_group_member(
 
 # working fine
 async def fetch_member_id(db: AsyncSession, user_id: int, group_id: int):
-    q = select(GroupMember.id).where(
-        GroupMember.user_id == user_id, GroupMember.group_id == group_id
-    )
-    result = await db.execute(q)
+    result = await db.execute(MEMBER_ID_Q, {"user_id": user_id, "group_id": group_id})
     member_id = result.scalar_one_or_none()
 
     if not member_id:
@@ -0,0 +1,43 @@
+import hashlib
+from typing import Optional
+from fastapi import Request, Response
+
+# Clients must revalidate, and shared caches must not store per-user data
+CACHE_CONTROL = "private, no-cache"
+
+
+def make_etag(*parts) -> str:
+    """
+    Weak validator over the given parts (group versions, user id, ...).
+    """
+    raw = ":".join(str(p) for p in parts).encode("utf-8")
+    return f'W/"{hashlib.sha1(raw).hexdigest()[:20]}"'
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+
+    if header.strip() == "*":
+        return True
+
+    # Weak comparison: W/"x" and "x" are the same validator
+    wanted = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == wanted for tag in header.split(","))
+
+
+def conditional(request: Request, response: Response, etag: str) -> Optional[Response]:
+    """
+    Sets the validator on `response` and returns a bare 304 when the
+    client's copy is current, so the caller can skip the real query.
+    """
+    if etag_matches(request, etag):
+        return Response(
+            status_code=304,
+            headers={"ETag": etag, "Cache-Control": CACHE_CONTROL},
+        )
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = CACHE_CONTROL
+    return None
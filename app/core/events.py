@@ -0,0 +1,90 @@
+import asyncio
+from typing import AsyncIterator, Dict, Set
+from app.core.config import settings
+from app.core.responses import dumps
+
+# Pushed in place of the backlog when a subscriber falls behind
+RESYNC = {"type": "resync"}
+
+
+class GroupEventBroker:
+    """
+    In-process fan-out of group change events to SSE subscribers.
+
+    Each subscriber owns a bounded queue; publishing never blocks, and a
+    subscriber whose queue is full has its backlog replaced by a single
+    "resync" event telling the client to re-fetch. Like TTLCache this is
+    per worker: events only reach clients connected to the worker that
+    committed the write. Not thread-safe - meant for the event loop only.
+    """
+
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self.published = 0
+        self.dropped = 0
+        self._subscribers: Dict[int, Set[asyncio.Queue]] = {}
+
+    def subscribe(self, group_id: int) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(group_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, group_id: int, queue: asyncio.Queue) -> None:
+        queues = self._subscribers.get(group_id)
+        if queues is None:
+            return
+
+        queues.discard(queue)
+        if not queues:
+            del self._subscribers[group_id]
+
+    def publish(self, group_id: int, event: dict) -> None:
+        self.published += 1
+
+        for queue in self._subscribers.get(group_id, ()):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                self.dropped += queue.qsize()
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait(RESYNC)
+
+    def stats(self) -> dict:
+        return {
+            "groups": len(self._subscribers),
+            "subscribers": sum(len(q) for q in self._subscribers.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+broker = GroupEventBroker(queue_size=settings.EVENT_QUEUE_SIZE)
+
+
+def format_sse(event: dict) -> str:
+    return f"event: {event['type']}\ndata: {dumps(event).decode()}\n\n"
+
+
+async def stream_group_events(group_id: int) -> AsyncIterator[str]:
+    """
+    SSE body for one subscriber. Sends a comment line as heartbeat so
+    proxies keep idle connections open; unsubscribes when the client
+    disconnects and Starlette cancels the response.
+    """
+    queue = broker.subscribe(group_id)
+    try:
+        yield f"retry: {settings.EVENT_RETRY_MS}\n\n"
+
+        while True:
+            try:
+                event = await asyncio.wait_for(
+                    queue.get(), timeout=settings.EVENT_HEARTBEAT_SECONDS
+                )
+            except asyncio.TimeoutError:
+                yield ": ping\n\n"
+                continue
+
+            yield format_sse(event)
+    finally:
+        broker.unsubscribe(group_id, queue)
@@ -0,0 +1,149 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from time import perf_counter
+from typing import Optional, Tuple
+import bcrypt
+from fastapi import HTTPException
+from app.core.config import settings
+from app.core.metrics import (
+    PIN_HASH_QUEUE_SECONDS,
+    PIN_HASH_REJECTED,
+    PIN_HASH_SECONDS,
+)
+
+# bcrypt costs ~250 ms of CPU at 12 rounds. It runs in worker processes so
+# the event loop (and the GIL) stay free for every other request.
+_executor: Optional[ProcessPoolExecutor] = None
+_slots: Optional[asyncio.Semaphore] = None
+_waiting = 0
+_running = 0
+
+
+def _hash(pin: str, rounds: int) -> str:
+    return bcrypt.hashpw(pin.encode("utf-8"), bcrypt.gensalt(rounds=rounds)).decode(
+        "utf-8"
+    )
+
+
+def _check(pin: str, hashed: str) -> bool:
+    try:
+        return bcrypt.checkpw(pin.encode("utf-8"), hashed.encode("utf-8"))
+    except Exception:
+        return False
+
+
+def _warm() -> None:
+    pass
+
+
+def hash_rounds(hashed: str) -> Optional[int]:
+    """
+    Cost factor of a stored bcrypt hash ("$2b$12$..." -> 12).
+    """
+    try:
+        return int(hashed.split("$")[2])
+    except (IndexError, ValueError):
+        return None
+
+
+def _get_executor() -> ProcessPoolExecutor:
+    global _executor, _slots
+
+    if _executor is None:
+        # spawn, not fork: the parent has a running loop and driver threads
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.PIN_HASH_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+        _slots = asyncio.Semaphore(settings.PIN_HASH_WORKERS)
+    return _executor
+
+
+async def _run(op: str, fn, *args):
+    global _waiting, _running
+
+    if _waiting >= settings.PIN_HASH_MAX_QUEUE:
+        PIN_HASH_REJECTED.inc(op)
+        raise HTTPException(
+            status_code=503,
+            detail="PIN service is busy. Try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    queued = perf_counter()
+
+    _waiting += 1
+    try:
+        await _slots.acquire()
+    finally:
+        _waiting -= 1
+
+    started = perf_counter()
+    PIN_HASH_QUEUE_SECONDS.observe(started - queued, op)
+    _running += 1
+
+    def _done(_: Future) -> None:
+        # The slot is held until the worker is actually free, even if the
+        # awaiting request was cancelled in the meantime
+        global _running
+        _running -= 1
+        _slots.release()
+        PIN_HASH_SECONDS.observe(perf_counter() - started, op)
+
+    job = executor.submit(fn, *args)
+    job.add_done_callback(lambda f: loop.call_soon_threadsafe(_done, f))
+    return await asyncio.wrap_future(job)
+
+
+async def hash_pin(pin: str) -> str:
+    """
+    bcrypt hash of the PIN at the configured cost factor.
+    """
+    return await _run("hash", _hash, pin, settings.PIN_BCRYPT_ROUNDS)
+
+
+async def verify_pin(pin: str, hashed: str) -> Tuple[bool, Optional[str]]:
+    """
+    Checks the PIN against its stored hash. When it matches but was hashed
+    at a different cost factor, also returns a fresh hash to store.
+    """
+    if not await _run("verify", _check, pin, hashed):
+        return False, None
+
+    if hash_rounds(hashed) != settings.PIN_BCRYPT_ROUNDS:
+        return True, await hash_pin(pin)
+    return True, None
+
+
+async def start_hash_pool() -> None:
+    # Spawn the workers up front so the first PIN request doesn't pay for it
+    executor = _get_executor()
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *(
+            loop.run_in_executor(executor, _warm)
+            for _ in range(settings.PIN_HASH_WORKERS)
+        )
+    )
+
+
+def stop_hash_pool() -> None:
+    global _executor, _slots
+
+    if _executor is not None:
+        _executor.shutdown(wait=True, cancel_futures=True)
+        _executor = None
+        _slots = None
+
+
+def stats() -> dict:
+    return {
+        "workers": settings.PIN_HASH_WORKERS,
+        "rounds": settings.PIN_BCRYPT_ROUNDS,
+        "running": _running,
+        "waiting": _waiting,
+        "max_queue": settings.PIN_HASH_MAX_QUEUE,
+    }
@@ -0,0 +1,117 @@
+import asyncio
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.db.session import async_session
+from app.models.idempotency_key import IdempotencyKey
+
+MAX_KEY_LENGTH = 255
+
+_janitor: Optional[asyncio.Task] = None
+
+
+def request_hash(*parts: Any) -> str:
+    """
+    Stable fingerprint of a request (dict keys sorted).
+    """
+    return hashlib.sha256(orjson.dumps(parts, option=orjson.OPT_SORT_KEYS)).hexdigest()
+
+
+def _cutoff() -> datetime:
+    return datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+
+
+async def claim_key(
+    db: AsyncSession, user_id: int, key: str, fingerprint: str
+) -> Optional[Any]:
+    """
+    Locks the key for the rest of the transaction and returns the stored
+    response if the request already went through. A concurrent duplicate
+    blocks here until the first one commits, then gets its response.
+    """
+    if not key or len(key) > MAX_KEY_LENGTH:
+        raise HTTPException(
+            400, detail=f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters"
+        )
+
+    await db.execute(
+        select(func.pg_advisory_xact_lock(func.hashtextextended(f"{user_id}:{key}", 0)))
+    )
+
+    result = await db.execute(
+        select(IdempotencyKey.request_hash, IdempotencyKey.response)
+        .where(IdempotencyKey.user_id == user_id)
+        .where(IdempotencyKey.key == key)
+        .where(IdempotencyKey.created_at >= _cutoff())
+    )
+    stored = result.one_or_none()
+    if stored is None:
+        return None
+
+    if stored.request_hash != fingerprint:
+        raise HTTPException(
+            422, detail="Idempotency-Key was already used for a different request"
+        )
+    return stored.response
+
+
+async def store_response(
+    db: AsyncSession, user_id: int, key: str, fingerprint: str, response: Any
+) -> None:
+    """
+    Records the response under the key. Call before committing the work it
+    belongs to, so both land (or neither does) together.
+    """
+    values = {"request_hash": fingerprint, "response": response}
+    stmt = insert(IdempotencyKey).values(user_id=user_id, key=key, **values)
+    # An expired row for the same key is simply taken over
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[IdempotencyKey.user_id, IdempotencyKey.key],
+            set_={**values, "created_at": func.now()},
+        )
+    )
+
+
+async def purge_expired_keys(db: AsyncSession) -> int:
+    result = await db.execute(
+        delete(IdempotencyKey).where(IdempotencyKey.created_at < _cutoff())
+    )
+    await db.commit()
+    return result.rowcount
+
+
+async def _janitor_loop():
+    while True:
+        try:
+            async with async_session() as db:
+                await purge_expired_keys(db)
+        except Exception as e:
+            print(f"Splito : idempotency key cleanup failed ({e})")
+
+        await asyncio.sleep(3600)
+
+
+async def start_idempotency_janitor():
+    global _janitor
+
+    if _janitor is None or _janitor.done():
+        _janitor = asyncio.create_task(_janitor_loop())
+
+
+async def stop_idempotency_janitor():
+    global _janitor
+
+    if _janitor is not None:
+        _janitor.cancel()
+        try:
+            await _janitor
+        except asyncio.CancelledError:
+            pass
+        _janitor = None
@@ -0,0 +1,330 @@
+import bisect
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+_registry: list = []
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(names: Sequence[str], values: Sequence, extra: str = "") -> str:
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple, object] = {}
+        _registry.append(self)
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+    def _samples(self):
+        for key, value in self._values.items():
+            yield f"{self.name}{_labels(self.labelnames, key)} {value}"
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+    def set(self, value: float, *labels) -> None:
+        self._values[labels] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, *labels) -> None:
+        state = self._values.get(labels)
+        if state is None:
+            # Per-bucket counts (non-cumulative), then sum
+            state = self._values[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+
+        state[0][bisect.bisect_left(self.buckets, value)] += 1
+        state[1] += value
+
+    def _samples(self):
+        for key, (counts, total) in self._values.items():
+            running = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                running += count
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labelnames, key, le)} {running}"
+            yield f"{self.name}_sum{_labels(self.labelnames, key)} {total}"
+            yield f"{self.name}_count{_labels(self.labelnames, key)} {running}"
+
+
+def render_prometheus() -> str:
+    """
+    All registered metrics in the Prometheus text exposition format.
+    """
+    return "\n".join(m.render() for m in _registry) + "\n"
+
+
+HTTP_REQUESTS = Counter(
+    "splito_http_requests_total",
+    "HTTP requests by route and status.",
+    ("method", "route", "status"),
+)
+HTTP_LATENCY = Histogram(
+    "splito_http_request_duration_seconds",
+    "Time from request start to the end of the response body.",
+    ("method", "route"),
+)
+HTTP_IN_FLIGHT = Gauge(
+    "splito_http_requests_in_flight",
+    "Requests currently being handled, open streams included.",
+)
+REQUEST_DB_QUERIES = Histogram(
+    "splito_request_db_queries",
+    "Statements executed per request.",
+    ("method", "route"),
+    buckets=COUNT_BUCKETS,
+)
+REQUEST_DB_SECONDS = Histogram(
+    "splito_request_db_seconds",
+    "Time spent waiting on the database per request.",
+    ("method", "route"),
+)
+DB_QUERIES = Counter(
+    "splito_db_queries_total",
+    "Statements executed, inside or outside a request.",
+)
+DB_QUERY_SECONDS = Histogram(
+    "splito_db_query_duration_seconds",
+    "Time per statement, from cursor execute to the result being ready.",
+)
+POOL_WAIT_SECONDS = Histogram(
+    "splito_db_pool_checkout_wait_seconds",
+    "Time spent getting a connection from the pool, connects included.",
+    ("pool",),
+    buckets=LATENCY_BUCKETS + (30.0,),
+)
+POOL_TIMEOUTS = Counter(
+    "splito_db_pool_timeouts_total",
+    "Checkouts that gave up after DB_POOL_TIMEOUT.",
+    ("pool",),
+)
+POOL_CHECKED_OUT = Gauge(
+    "splito_db_pool_checked_out",
+    "Connections currently handed out by the pool.",
+    ("pool",),
+)
+POOL_OVERFLOW = Gauge(
+    "splito_db_pool_overflow",
+    "Connections open beyond pool_size.",
+    ("pool",),
+)
+POOL_CONNECTION_AGE_SECONDS = Histogram(
+    "splito_db_pool_connection_age_seconds",
+    "Age of each connection at checkout.",
+    ("pool",),
+    buckets=(1.0, 10.0, 60.0, 300.0, 900.0, 1800.0, 3600.0),
+)
+DB_DISCONNECTS = Counter(
+    "splito_db_disconnects_total",
+    "Statements that failed on a dead connection, each invalidating the pool.",
+    ("pool",),
+)
+PIN_HASH_QUEUE_SECONDS = Histogram(
+    "splito_pin_hash_queue_seconds",
+    "Time a PIN hash or verify waited for a free hashing worker.",
+    ("op",),
+)
+PIN_HASH_SECONDS = Histogram(
+    "splito_pin_hash_duration_seconds",
+    "Time a PIN hash or verify spent in its worker process.",
+    ("op",),
+)
+PIN_HASH_REJECTED = Counter(
+    "splito_pin_hash_rejected_total",
+    "PIN operations turned away because the hashing queue was full.",
+    ("op",),
+)
+READ_ROUTING = Counter(
+    "splito_db_read_routing_total",
+    "Read-only requests by the database they were sent to and why.",
+    ("target", "reason"),
+)
+REPLICA_LAG_SECONDS = Gauge(
+    "splito_db_replica_lag_seconds",
+    "Replay lag of the read replica at the last probe; -1 while its WAL "
+    "receiver is down or silent.",
+)
+WEBHOOK_EVENTS = Counter(
+    "splito_webhook_events_total",
+    "Clerk webhook events by type and outcome (queued, duplicate, applied, "
+    "failed, retry).",
+    ("type", "outcome"),
+)
+WEBHOOK_LAG_SECONDS = Histogram(
+    "splito_webhook_apply_lag_seconds",
+    "Time from a webhook event being stored to its change being committed.",
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+
+
+def _route_path(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path_format", None) or "unmatched"
+
+
+@dataclass
+class RequestStats:
+    scope: dict
+    queries: int = 0
+    db_seconds: float = 0.0
+    started: float = field(default_factory=perf_counter)
+
+    @property
+    def method(self) -> str:
+        return self.scope["method"]
+
+    @property
+    def route(self) -> str:
+        # Filled in by the router, so "unmatched" until routing has run
+        return _route_path(self.scope)
+
+
+# Set per request by MetricsMiddleware. SQLAlchemy runs sync engine events
+# in greenlets that share the caller's context, so the hooks see it too.
+request_stats: ContextVar[Optional[RequestStats]] = ContextVar(
+    "request_stats", default=None
+)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no extra task per request) recording latency,
+    status and per-request DB usage, labelled by route template.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        stats = RequestStats(scope)
+        token = request_stats.set(stats)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_IN_FLIGHT.dec()
+            request_stats.reset(token)
+
+            route = stats.route
+            elapsed = perf_counter() - stats.started
+            HTTP_REQUESTS.inc(stats.method, route, status)
+            HTTP_LATENCY.observe(elapsed, stats.method, route)
+            REQUEST_DB_QUERIES.observe(stats.queries, stats.method, route)
+            REQUEST_DB_SECONDS.observe(stats.db_seconds, stats.method, route)
+
+
+# Called as fn(statement, parameters, executemany, seconds, rowcount) after
+# every statement on an instrumented engine
+_query_listeners: List[Callable] = []
+
+
+def add_query_listener(fn: Callable) -> None:
+    """
+    Hands every statement's timing to `fn`, so other consumers (the
+    slow-query log) reuse it instead of timing each query again.
+    """
+    if fn not in _query_listeners:
+        _query_listeners.append(fn)
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info["query_start"].pop()
+
+    DB_QUERIES.inc()
+    DB_QUERY_SECONDS.observe(elapsed)
+
+    stats = request_stats.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+
+    for listener in _query_listeners:
+        listener(statement, parameters, executemany, elapsed, cursor.rowcount)
+
+
+# Server-side conditions the driver reports as ordinary errors although the
+# connection is unusable afterwards (restart, failover, admin kill)
+DISCONNECT_SQLSTATES = {"57P01", "57P02", "57P03", "08000", "08003", "08006"}
+
+
+def _handle_error(context):
+    # Failed statements never reach after_cursor_execute
+    if context.connection is not None:
+        starts = context.connection.info.get("query_start")
+        if starts:
+            starts.pop()
+
+    sqlstate = getattr(context.original_exception, "sqlstate", None)
+    if sqlstate in DISCONNECT_SQLSTATES:
+        context.is_disconnect = True
+
+    if context.is_disconnect:
+        # SQLAlchemy then invalidates this connection and every older one
+        pool = getattr(context.engine, "pool", None)
+        DB_DISCONNECTS.inc(getattr(pool, "logging_name", None) or "default")
+
+
+def instrument_engine(engine) -> None:
+    """
+    Hooks statement timing into an engine (the sync_engine of an async one).
+    """
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
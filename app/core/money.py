@@ -0,0 +1,145 @@
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List, Union
+
+_CENTS = Decimal("0.01")
+
+# Below 1e9 cents a float's rounding error stays far inside the band
+_FLOAT_EXACT_LIMIT = 1e9
+_HALF_CENT_BAND = 1e-6
+
+Amount = Union["Money", Decimal, int, float, str]
+
+
+def to_cents(value: Union[Decimal, int, float, str]) -> int:
+    """
+    Amount in currency units -> integer cents, rounding half-up.
+    """
+    if isinstance(value, float):
+        # Plain float math is exact enough away from the half-cent
+        # boundary; anything close to it takes the Decimal route
+        scaled = abs(value) * 100
+        if scaled < _FLOAT_EXACT_LIMIT:
+            whole = int(scaled)
+            frac = scaled - whole
+            if abs(frac - 0.5) > _HALF_CENT_BAND:
+                cents = whole + (frac > 0.5)
+                return -cents if value < 0 else cents
+        # repr() keeps floats like 0.1 from dragging binary noise along
+        value = Decimal(repr(value))
+    elif isinstance(value, int):
+        return value * 100
+    elif not isinstance(value, Decimal):
+        value = Decimal(value.strip())
+
+    return int(value.quantize(_CENTS, rounding=ROUND_HALF_UP) * 100)
+
+
+class Money:
+    """
+    An exact amount of money stored as integer cents.
+
+    Balance and split arithmetic happens on plain ints; values are
+    converted from Decimal/float at the DB and API boundaries only, via
+    Money.of() on the way in and to_decimal()/float() on the way out.
+    """
+
+    __slots__ = ("cents",)
+
+    def __init__(self, cents: int = 0):
+        self.cents = cents
+
+    @classmethod
+    def of(cls, value: Amount) -> "Money":
+        """
+        Parses an amount in currency units, rounding half-up to the cent.
+        """
+        if isinstance(value, Money):
+            return value
+        return cls(to_cents(value))
+
+    def to_decimal(self) -> Decimal:
+        return Decimal(self.cents).scaleb(-2)
+
+    def split(self, parts: int) -> List["Money"]:
+        """
+        Equal shares that add back up exactly; leftover cents go to the
+        first shares.
+        """
+        base, extra = divmod(self.cents, parts)
+        return [Money(base + 1 if i < extra else base) for i in range(parts)]
+
+    def __float__(self) -> float:
+        return self.cents / 100
+
+    def __add__(self, other: "Money") -> "Money":
+        if isinstance(other, Money):
+            return Money(self.cents + other.cents)
+        if other == 0:
+            return self
+        return NotImplemented
+
+    # Lets sum() work without a Money start value
+    __radd__ = __add__
+
+    def __sub__(self, other: "Money") -> "Money":
+        if isinstance(other, Money):
+            return Money(self.cents - other.cents)
+        return NotImplemented
+
+    def __mul__(self, factor: int) -> "Money":
+        if isinstance(factor, int):
+            return Money(self.cents * factor)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __neg__(self) -> "Money":
+        return Money(-self.cents)
+
+    def __abs__(self) -> "Money":
+        return Money(abs(self.cents))
+
+    def __bool__(self) -> bool:
+        return self.cents != 0
+
+    @staticmethod
+    def _cents(other) -> int:
+        # Bare 0 is accepted so `amount > 0` style checks keep reading naturally
+        if isinstance(other, Money):
+            return other.cents
+        if other == 0:
+            return 0
+        raise TypeError(f"cannot compare Money with {type(other).__name__}")
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Money):
+            return self.cents == other.cents
+        if isinstance(other, int) and other == 0:
+            return self.cents == 0
+        return NotImplemented
+
+    def __lt__(self, other) -> bool:
+        return self.cents < self._cents(other)
+
+    def __le__(self, other) -> bool:
+        return self.cents <= self._cents(other)
+
+    def __gt__(self, other) -> bool:
+        return self.cents > self._cents(other)
+
+    def __ge__(self, other) -> bool:
+        return self.cents >= self._cents(other)
+
+    def __hash__(self) -> int:
+        return hash(self.cents)
+
+    def __str__(self) -> str:
+        sign = "-" if self.cents < 0 else ""
+        units, cents = divmod(abs(self.cents), 100)
+        return f"{sign}{units}.{cents:02d}"
+
+    def __repr__(self) -> str:
+        return f"Money('{self}')"
+
+
+ZERO = Money(0)
@@ -0,0 +1,86 @@
+import base64
+from datetime import datetime
+from typing import AsyncIterator, Callable, Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import bindparam, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from app.core.responses import dumps
+
+MAX_PAGE_SIZE = 500
+STREAM_BATCH_SIZE = 500
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    raw = f"{created_at.isoformat()}|{row_id}".encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = (
+            base64.urlsafe_b64decode(padded).decode("utf-8").rsplit("|", 1)
+        )
+        return datetime.fromisoformat(created_at), int(row_id)
+    except Exception:
+        raise HTTPException(400, detail="Invalid cursor")
+
+
+def keyset_before(created_col, id_col):
+    """
+    Rows strictly after the cursor for an ORDER BY created_at DESC, id DESC.
+    The cursor is bound at execution time, see keyset_params.
+    """
+    return tuple_(created_col, id_col) < tuple_(
+        bindparam("cursor_created_at", type_=created_col.type),
+        bindparam("cursor_id", type_=id_col.type),
+    )
+
+
+def keyset_params(cursor: str) -> dict:
+    created_at, row_id = decode_cursor(cursor)
+    return {"cursor_created_at": created_at, "cursor_id": row_id}
+
+
+async def fetch_page(
+    db: AsyncSession,
+    q: Select,
+    limit: Optional[int],
+    serialize: Callable[[object], dict],
+    params: Optional[dict] = None,
+) -> Tuple[list, Optional[str]]:
+    """
+    Runs `q` (already ordered and filtered by cursor) and returns the
+    serialized rows plus the cursor for the next page, if any.
+    """
+    if limit is None:
+        res = await db.execute(q, params)
+        return [serialize(row) for row in res.all()], None
+
+    rows = (await db.execute(q.limit(limit + 1), params)).all()
+
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].created_at, rows[-1].id)
+
+    return [serialize(row) for row in rows], next_cursor
+
+
+async def stream_ndjson(
+    db: AsyncSession,
+    q: Select,
+    serialize: Callable[[object], dict],
+    params: Optional[dict] = None,
+) -> AsyncIterator[bytes]:
+    """
+    Streams `q` as newline-delimited JSON through a server-side cursor,
+    so memory stays flat no matter how many rows the query returns.
+    """
+    result = await db.stream(
+        q, params, execution_options={"yield_per": STREAM_BATCH_SIZE}
+    )
+
+    async for rows in result.partitions():
+        yield b"".join(dumps(serialize(row)) + b"\n" for row in rows)
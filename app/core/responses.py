@@ -0,0 +1,49 @@
+from decimal import Decimal
+from typing import Any, Optional
+import orjson
+from fastapi import Response
+from app.core.money import Money
+
+
+# Set by FastJSONResponse itself for the encoded body
+_OWN_HEADERS = {b"content-length", b"content-type"}
+
+
+def _default(value):
+    if isinstance(value, (Decimal, Money)):
+        return float(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(content: Any) -> bytes:
+    """
+    orjson encoding; datetimes come out as ISO 8601 with UTC as "Z", the
+    same as response_model serialization.
+    """
+    return orjson.dumps(content, default=_default, option=orjson.OPT_UTC_Z)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def json_response(
+    content: Any, response: Optional[Response] = None
+) -> FastJSONResponse:
+    """
+    Returns service output as-is, skipping jsonable_encoder and
+    response_model validation, so each row is encoded exactly once.
+    Headers already set on the route's injected `response` carry over.
+    """
+    result = FastJSONResponse(content)
+    if response is not None:
+        # Raw pairs, so repeated headers (several Set-Cookie) all survive
+        result.raw_headers.extend(
+            (name, value)
+            for name, value in response.headers.raw
+            if name not in _OWN_HEADERS
+        )
+    return result
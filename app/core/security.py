@@ -1,6 +1,13 @@
 from fastapi import HTTPException, Request
-from jose import jwt
+from jose import jwt, jwk
+from jose.backends.base import Key
+from typing import Dict, Optional
+from app.core.cache import TTLCache
+from app.core.config import settings
+import asyncio
+import hashlib
 import httpx
+import json
 import time
 
 CLERK_ISSUER = "https://valued-earwig-71.clerk.accounts.dev"
@@ -10,6 +17,65 @@ CLERK_AUDIENCE = "your-clerk-frontend-api"
 _jwks_cache = None
 _jwks_last_fetch = 0
 JWKS_TTL = 60 * 60  # Time to live : 1 hour
+JWKS_REFRESH_MARGIN = 5 * 60  # Background refresh this long before expiry
+JWKS_MIN_REFETCH = 60  # Unknown-kid refetches are rate limited to this
+
+# Public keys built once per JWKS fetch, indexed by kid
+_signing_keys: Dict[str, Key] = {}
+
+# Single-flight guard so only one request fetches while others wait
+_jwks_lock = asyncio.Lock()
+_http_client: Optional[httpx.AsyncClient] = None
+_refresher: Optional[asyncio.Task] = None
+
+# sha256(token) -> verified claims, kept until the token's own exp
+_claims_cache = TTLCache(maxsize=settings.TOKEN_CACHE_SIZE, ttl=JWKS_TTL)
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    global _http_client
+
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(timeout=3.0)
+    return _http_client
+
+
+async def _fetch_jwks() -> dict:
+    # Local key file lets tests and benchmarks run without Clerk
+    if settings.CLERK_JWKS_FILE:
+        with open(settings.CLERK_JWKS_FILE) as f:
+            return json.load(f)
+
+    res = await _get_http_client().get(CLERK_JWKS_URL)
+    res.raise_for_status()
+    return res.json()
+
+
+def _build_signing_keys(jwks: dict) -> Dict[str, Key]:
+    return {
+        k["kid"]: jwk.construct(k, algorithm=k.get("alg", "RS256"))
+        for k in jwks.get("keys", [])
+        if "kid" in k
+    }
+
+
+async def refresh_jwks() -> dict:
+    """
+    Fetches the JWKS and rebuilds the key index. Concurrent callers share
+    one fetch: whoever waited on the lock reuses the fresh result.
+    """
+    global _jwks_cache, _jwks_last_fetch, _signing_keys
+
+    seen = _jwks_last_fetch
+    async with _jwks_lock:
+        if _jwks_cache and _jwks_last_fetch != seen:
+            return _jwks_cache
+
+        jwks = await _fetch_jwks()
+        _signing_keys = _build_signing_keys(jwks)
+        _jwks_cache = jwks
+        _jwks_last_fetch = time.time()
+        return _jwks_cache
 
 
 # working fine
@@ -17,23 +83,16 @@ async def get_jwks():
     """
     Safe JWKS fetcher with:
     - timeout
-    - retry
+    - single-flight fetch
     - cache
     - fallback
     """
-    global _jwks_cache, _jwks_last_fetch
-
     # Use cached keys if still fresh
     if _jwks_cache and time.time() - _jwks_last_fetch < JWKS_TTL:
         return _jwks_cache
 
     try:
-        async with httpx.AsyncClient(timeout=3.0) as client:
-            res = await client.get(CLERK_JWKS_URL)
-            res.raise_for_status()
-            _jwks_cache = res.json()
-            _jwks_last_fetch = time.time()
-            return _jwks_cache
+        return await refresh_jwks()
 
     except Exception:
         # Fallback to old cache if network fails
@@ -46,6 +105,66 @@ async def get_jwks():
         )
 
 
+async def get_signing_key(kid: str) -> Optional[Key]:
+    await get_jwks()
+    key = _signing_keys.get(kid)
+
+    # Unknown kid usually means Clerk rotated keys since our last fetch
+    if key is None and time.time() - _jwks_last_fetch > JWKS_MIN_REFETCH:
+        try:
+            await refresh_jwks()
+        except Exception:
+            return None
+        key = _signing_keys.get(kid)
+
+    return key
+
+
+async def _refresh_loop():
+    while True:
+        age = time.time() - _jwks_last_fetch
+        await asyncio.sleep(max(JWKS_TTL - JWKS_REFRESH_MARGIN - age, 0))
+
+        try:
+            await refresh_jwks()
+        except Exception as e:
+            # Keep serving the cached keys and retry shortly
+            print(f"Splito : JWKS refresh failed ({e}) → retrying...")
+            await asyncio.sleep(30)
+
+
+async def start_jwks_refresher():
+    """
+    Primes the key cache and keeps it warm so no request ever waits on
+    a JWKS fetch. Called from the app lifespan.
+    """
+    global _refresher
+
+    try:
+        await refresh_jwks()
+    except Exception as e:
+        print(f"Splito : JWKS prefetch failed ({e})")
+
+    if _refresher is None or _refresher.done():
+        _refresher = asyncio.create_task(_refresh_loop())
+
+
+async def stop_jwks_refresher():
+    global _refresher, _http_client
+
+    if _refresher is not None:
+        _refresher.cancel()
+        try:
+            await _refresher
+        except asyncio.CancelledError:
+            pass
+        _refresher = None
+
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
 # working fine
 def get_bearer_token(request: Request) -> str:
     auth = request.headers.get("Authorization")
@@ -57,11 +176,18 @@ def get_bearer_token(request: Request) -> str:
 # working fine
 async def verify_clerk_token(request: Request):
     token = get_bearer_token(request)
+
+    token_hash = hashlib.sha256(token.encode("utf-8")).digest()
+    payload = _claims_cache.get(token_hash)
+    if payload is not None:
+        return payload
+
     try:
         unverified_header = jwt.get_unverified_header(token)
-        jwks = await get_jwks()
+        key = await get_signing_key(unverified_header.get("kid"))
 
-        key = next(k for k in jwks["keys"] if k["kid"] == unverified_header["kid"])
+        if key is None:
+            raise HTTPException(401, "Unauthorized access")
 
         payload = jwt.decode(
             token,
@@ -71,11 +197,13 @@ async def verify_clerk_token(request: Request):
             issuer=CLERK_ISSUER,
         )
 
-        return payload
-
-    except StopIteration:
-        raise HTTPException(401, "Unauthorized access")
     except jwt.ExpiredSignatureError:
         raise HTTPException(401, "Token expired")
     except jwt.JWTError:
         raise HTTPException(401, "Invalid token")
+
+    remaining = payload.get("exp", 0) - time.time()
+    if remaining > 0:
+        _claims_cache.set(token_hash, payload, ttl=remaining)
+
+    return payload
@@ -0,0 +1,209 @@
+"""
+Settlement engine: turns per-member net balances into transfers.
+
+Strategies:
+    greedy - largest creditor pays largest debtor (simplify_debts)
+    exact  - minimum number of transfers, via bitmask DP over cents
+    auto   - exact for small groups, greedy otherwise
+
+Both paths ignore members within NOISE_CENTS of zero, so switching
+strategy never changes who appears in the result.
+
+The exact solver uses the fact that n members who split into k disjoint
+zero-sum subsets can settle in n - k transfers and no fewer, so it looks
+for the largest such partition.
+"""
+from collections import defaultdict
+from time import perf_counter
+from typing import Callable, Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.money import Money, Amount
+from app.core.utils import NOISE_CENTS, simplify_debts
+
+Transfer = Tuple[int, int, Money]
+
+# 2^20 subset sums is the practical ceiling for pure Python
+EXACT_MAX_MEMBERS = 20
+# Past this, "auto" rarely finishes inside the time budget, so it goes
+# straight to greedy instead of spending the budget and falling back
+AUTO_MAX_MEMBERS = 16
+
+
+class SettlementTimeout(Exception):
+    pass
+
+
+def _greedy_cents(items: List[Tuple[int, int]]) -> List[Tuple[int, int, int]]:
+    """
+    Greedy matching on integer cents for a zero-sum block.
+    """
+    creditors = sorted(((c, uid) for uid, c in items if c > 0), reverse=True)
+    debtors = sorted(((-c, uid) for uid, c in items if c < 0), reverse=True)
+
+    transfers = []
+    ci = di = 0
+    while ci < len(creditors) and di < len(debtors):
+        cred_amt, cred_id = creditors[ci]
+        debt_amt, debt_id = debtors[di]
+        pay = min(cred_amt, debt_amt)
+        transfers.append((debt_id, cred_id, pay))
+
+        creditors[ci] = (cred_amt - pay, cred_id)
+        debtors[di] = (debt_amt - pay, debt_id)
+        if creditors[ci][0] == 0:
+            ci += 1
+        if debtors[di][0] == 0:
+            di += 1
+
+    return transfers
+
+
+def _zero_sum_blocks(values: List[int], deadline: float) -> List[List[int]]:
+    """
+    Partitions indexes of `values` (which sum to zero) into the largest
+    possible number of zero-sum blocks.
+
+    Only zero-sum masks matter: best(mask) = 1 + best(s) over zero-sum
+    proper submasks s, since mask - s is then zero-sum as well.
+    """
+    n = len(values)
+    full = (1 << n) - 1
+
+    sums = [0] * (full + 1)
+    zeros = [0]
+    for mask in range(1, full + 1):
+        if not mask & 0xFFFF and perf_counter() > deadline:
+            raise SettlementTimeout()
+
+        low = mask & -mask
+        total = sums[mask ^ low] + values[low.bit_length() - 1]
+        sums[mask] = total
+        if total == 0:
+            zeros.append(mask)
+
+    # Ascending masks visit every submask before its supersets
+    best = {0: 0}
+    parent = {}
+    for i, mask in enumerate(zeros[1:], start=1):
+        if not i & 0x3F and perf_counter() > deadline:
+            raise SettlementTimeout()
+
+        top, top_sub = -1, 0
+        for sub in zeros[:i]:
+            if sub & mask == sub and best[sub] > top:
+                top, top_sub = best[sub], sub
+        best[mask] = top + 1
+        parent[mask] = top_sub
+
+    blocks = []
+    cur = full
+    while cur:
+        sub = parent[cur]
+        block = cur ^ sub
+        blocks.append([i for i in range(n) if block >> i & 1])
+        cur = sub
+
+    return blocks
+
+
+def greedy_transfers(net_map: Dict[int, Amount], **_) -> List[Transfer]:
+    return simplify_debts(net_map)
+
+
+def exact_transfers(
+    net_map: Dict[int, Amount],
+    time_budget: Optional[float] = None,
+) -> List[Transfer]:
+    """
+    Minimum-transfer settlement. Falls back to greedy when balances don't
+    net to zero, the group is too large, or the time budget runs out.
+    """
+    if time_budget is None:
+        time_budget = settings.SETTLEMENT_TIME_BUDGET_MS / 1000
+
+    items = [(uid, Money.of(bal).cents) for uid, bal in net_map.items()]
+    # Same noise filter as simplify_debts
+    items = [(uid, c) for uid, c in items if abs(c) > NOISE_CENTS]
+
+    if sum(c for _, c in items) != 0 or time_budget <= 0:
+        return simplify_debts(net_map)
+
+    transfers: List[Tuple[int, int, int]] = []
+
+    # Exact opposites always settle in one transfer in some optimal plan
+    by_amount = defaultdict(list)
+    rest = []
+    for uid, c in items:
+        partners = by_amount.get(-c)
+        if partners:
+            other = partners.pop()
+            debt_id, cred_id = (uid, other) if c < 0 else (other, uid)
+            transfers.append((debt_id, cred_id, abs(c)))
+        else:
+            by_amount[c].append(uid)
+    for c, uids in by_amount.items():
+        rest.extend((uid, c) for uid in uids)
+
+    if len(rest) > EXACT_MAX_MEMBERS:
+        return simplify_debts(net_map)
+
+    if rest:
+        try:
+            blocks = _zero_sum_blocks(
+                [c for _, c in rest], perf_counter() + time_budget
+            )
+        except SettlementTimeout:
+            return simplify_debts(net_map)
+
+        for block in blocks:
+            transfers.extend(_greedy_cents([rest[i] for i in block]))
+
+    return [(d, c, Money(amt)) for d, c, amt in transfers]
+
+
+def auto_transfers(net_map: Dict[int, Amount], **kwargs) -> List[Transfer]:
+    active = sum(
+        1 for bal in net_map.values() if abs(Money.of(bal).cents) > NOISE_CENTS
+    )
+    if active <= AUTO_MAX_MEMBERS:
+        return exact_transfers(net_map, **kwargs)
+    return simplify_debts(net_map)
+
+
+STRATEGIES: Dict[str, Callable[..., List[Transfer]]] = {
+    "greedy": greedy_transfers,
+    "exact": exact_transfers,
+    "auto": auto_transfers,
+}
+
+
+def settle_debts(
+    net_map: Dict[int, Amount],
+    strategy: Optional[str] = None,
+) -> List[Transfer]:
+    """
+    Returns [(debtor_id, creditor_id, amount)] using the configured strategy.
+    """
+    return STRATEGIES[strategy or settings.SETTLEMENT_STRATEGY](net_map)
+
+
+def settle_many(
+    groups: Dict[int, Dict[int, Amount]],
+    strategy: Optional[str] = None,
+    time_budget: Optional[float] = None,
+) -> Dict[int, List[Transfer]]:
+    """
+    Settles several groups under one shared time budget; once it is spent
+    the remaining groups are settled greedily. CPU bound, so callers on the
+    event loop should run it in a thread.
+    """
+    if time_budget is None:
+        time_budget = settings.SETTLEMENT_TIME_BUDGET_MS / 1000
+
+    solve = STRATEGIES[strategy or settings.SETTLEMENT_STRATEGY]
+    deadline = perf_counter() + time_budget
+
+    return {
+        group_id: solve(net_map, time_budget=deadline - perf_counter())
+        for group_id, net_map in groups.items()
+    }
@@ -0,0 +1,175 @@
+import re
+import sys
+from collections import deque
+from dataclasses import dataclass, asdict
+from datetime import datetime, timezone
+from typing import Optional
+from greenlet import getcurrent
+from app.core.config import settings
+from app.core.metrics import add_query_listener, request_stats
+
+_PLACEHOLDER = re.compile(r"\$\d+|%\(\w+\)s|\?")
+# asyncpg renders typed placeholders: $1::INTEGER, $2::TIMESTAMP WITH TIME ZONE
+_CAST = r"(?:::[A-Za-z][\w ]*(?:\(\d+(?:,\s*\d+)?\))?(?:\[\])*)?"
+_PLACEHOLDER_LIST = re.compile(rf"\(\s*\?{_CAST}(?:\s*,\s*\?{_CAST})+\s*\)")
+_WHITESPACE = re.compile(r"\s+")
+
+# Frames from these modules are plumbing, never the caller we report
+_SKIP_MODULES = ("app.core.slow_queries", "app.core.metrics", "app.db.")
+
+
+@dataclass
+class SlowQuery:
+    statement: str
+    normalized: str
+    params: str
+    duration_ms: float
+    rows: int
+    route: Optional[str]
+    function: Optional[str]
+    at: datetime
+
+
+def normalize_statement(statement: str) -> str:
+    """
+    Collapses placeholders, expanded IN lists and whitespace so the same
+    query issued with different parameters aggregates under one key.
+    """
+    statement = _PLACEHOLDER.sub("?", statement)
+    statement = _PLACEHOLDER_LIST.sub("(...)", statement)
+    return _WHITESPACE.sub(" ", statement).strip()
+
+
+def _shape(value) -> str:
+    if isinstance(value, (list, tuple)):
+        return f"{type(value).__name__}[{len(value)}]"
+    return type(value).__name__
+
+
+def params_shape(parameters, executemany: bool) -> str:
+    """
+    Types (and list lengths) of the bound parameters - never the values.
+    """
+    if executemany:
+        count = len(parameters)
+        first = parameters[0] if count else ()
+        return f"{count} x {params_shape(first, False)}"
+
+    if isinstance(parameters, dict):
+        return ", ".join(f"{k}: {_shape(v)}" for k, v in parameters.items())
+
+    return ", ".join(_shape(v) for v in parameters or ())
+
+
+def _caller() -> Optional[str]:
+    # Engine events run in SQLAlchemy's worker greenlet; the awaiting
+    # coroutines (routes, services) are suspended in its parent.
+    current = getcurrent()
+    frame = current.parent.gr_frame if current.parent is not None else sys._getframe()
+
+    fallback = None
+    while frame is not None:
+        module = frame.f_globals.get("__name__", "")
+        if module.startswith("app.services."):
+            return f"{module}.{frame.f_code.co_name}"
+        if (
+            fallback is None
+            and module.startswith("app.")
+            and not module.startswith(_SKIP_MODULES)
+        ):
+            fallback = f"{module}.{frame.f_code.co_name}"
+        frame = frame.f_back
+
+    return fallback
+
+
+class SlowQueryLog:
+    """
+    Bounded ring buffer of statements slower than `threshold_ms`.
+    Per worker process, like the metrics registry.
+    """
+
+    def __init__(self, threshold_ms: float, maxlen: int):
+        self.threshold_ms = threshold_ms
+        self.recorded = 0
+        self._entries: "deque[SlowQuery]" = deque(maxlen=maxlen)
+
+    @property
+    def capacity(self) -> int:
+        return self._entries.maxlen
+
+    def record(self, statement, parameters, executemany, duration_ms, rows):
+        stats = request_stats.get()
+        self._entries.append(
+            SlowQuery(
+                statement=statement,
+                normalized=normalize_statement(statement),
+                params=params_shape(parameters, executemany),
+                duration_ms=round(duration_ms, 2),
+                rows=rows,
+                route=f"{stats.method} {stats.route}" if stats else None,
+                function=_caller(),
+                at=datetime.now(timezone.utc),
+            )
+        )
+        self.recorded += 1
+
+    def recent(self, limit: int) -> list:
+        entries = list(self._entries)[-limit:] if limit else []
+        return [asdict(e) for e in reversed(entries)]
+
+    def aggregate(self) -> list:
+        """
+        Buffered entries grouped by normalized statement, worst total first.
+        """
+        groups = {}
+        for e in self._entries:
+            g = groups.get(e.normalized)
+            if g is None:
+                g = groups[e.normalized] = {
+                    "statement": e.normalized,
+                    "count": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                    "max_rows": 0,
+                    "routes": set(),
+                    "functions": set(),
+                    "last_seen": e.at,
+                }
+            g["count"] += 1
+            g["total_ms"] += e.duration_ms
+            g["max_ms"] = max(g["max_ms"], e.duration_ms)
+            g["max_rows"] = max(g["max_rows"], e.rows)
+            g["last_seen"] = max(g["last_seen"], e.at)
+            if e.route:
+                g["routes"].add(e.route)
+            if e.function:
+                g["functions"].add(e.function)
+
+        result = sorted(groups.values(), key=lambda g: g["total_ms"], reverse=True)
+        for g in result:
+            g["total_ms"] = round(g["total_ms"], 2)
+            g["avg_ms"] = round(g["total_ms"] / g["count"], 2)
+            g["routes"] = sorted(g["routes"])
+            g["functions"] = sorted(g["functions"])
+
+        return result
+
+
+slow_query_log = SlowQueryLog(
+    threshold_ms=settings.SLOW_QUERY_MS, maxlen=settings.SLOW_QUERY_LOG_SIZE
+)
+
+
+def _record_if_slow(statement, parameters, executemany, seconds, rows):
+    duration_ms = seconds * 1000
+    if duration_ms >= slow_query_log.threshold_ms:
+        slow_query_log.record(statement, parameters, executemany, duration_ms, rows)
+
+
+def record_slow_queries() -> None:
+    """
+    Feeds the slow-query log from the statement timing app.core.metrics
+    already does for instrumented engines.
+    """
+    add_query_listener(_record_if_slow)
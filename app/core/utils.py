@@ -1,60 +1,61 @@
-from decimal import Decimal, ROUND_HALF_UP, getcontext
 from typing import Dict, List, Tuple
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, select, func, exists
 from sqlalchemy.ext.asyncio import AsyncSession
-from app.models.expense import Expense
-from app.models.expense_split import ExpenseSplit
-from collections import deque
+from app.models.group_member_balance import GroupMemberBalance
+from app.core.money import Money, Amount
 
-getcontext().prec = 28
-CENTS = Decimal("0.01")
+# Balances within a cent of zero are treated as rounding noise
+NOISE_CENTS = 1
 
+GROUP_BALANCES_Q = select(
+    GroupMemberBalance.member_id, GroupMemberBalance.balance
+).where(GroupMemberBalance.group_id == bindparam("group_id"))
 
-def qround(d: Decimal) -> Decimal:
-    return d.quantize(CENTS, rounding=ROUND_HALF_UP)
+UNSETTLED_Q = select(
+    exists().where(
+        GroupMemberBalance.group_id == bindparam("group_id"),
+        func.abs(GroupMemberBalance.balance)
+        > bindparam("tolerance", type_=GroupMemberBalance.balance.type),
+    )
+)
 
 
 # working fine
-def simplify_debts(net_map: Dict[int, Decimal]):
+def simplify_debts(net_map: Dict[int, Amount]) -> List[Tuple[int, int, Money]]:
     """
     Standard Greedy algorithm to minimize number of transactions.
+    Runs on integer cents; returns (debtor, creditor, Money) transfers.
     """
     creditors = []
     debtors = []
 
     for uid, bal in net_map.items():
-        if bal > Decimal("0.01"):  # Avoid floating point noise
-            creditors.append([uid, bal])
-        elif bal < Decimal("-0.01"):
-            debtors.append([uid, -bal])
-
-    creditors.sort(key=lambda x: x[1], reverse=True)
-    debtors.sort(key=lambda x: x[1], reverse=True)
-
-    creditors = deque(creditors)
-    debtors = deque(debtors)
+        cents = Money.of(bal).cents
+        if cents > NOISE_CENTS:
+            creditors.append((cents, uid))
+        elif cents < -NOISE_CENTS:
+            debtors.append((-cents, uid))
 
-    transfers: List[Tuple[int, int, Decimal]] = []
+    creditors.sort(reverse=True)
+    debtors.sort(reverse=True)
 
-    while creditors and debtors:
-        cred_id, cred_amt = creditors[0]
-        debt_id, debt_amt = debtors[0]
+    transfers: List[Tuple[int, int, Money]] = []
 
-        pay_amt = qround(min(cred_amt, debt_amt))
+    ci = di = 0
+    while ci < len(creditors) and di < len(debtors):
+        cred_amt, cred_id = creditors[ci]
+        debt_amt, debt_id = debtors[di]
 
-        if pay_amt > 0:
-            transfers.append((debt_id, cred_id, pay_amt))
+        pay_amt = min(cred_amt, debt_amt)
+        transfers.append((debt_id, cred_id, Money(pay_amt)))
 
-        new_cred = qround(cred_amt - pay_amt)
-        new_debt = qround(debt_amt - pay_amt)
+        creditors[ci] = (cred_amt - pay_amt, cred_id)
+        debtors[di] = (debt_amt - pay_amt, debt_id)
 
-        creditors.popleft()
-        debtors.popleft()
-
-        if new_cred > Decimal("0"):
-            creditors.appendleft([cred_id, new_cred])
-        if new_debt > Decimal("0"):
-            debtors.appendleft([debt_id, new_debt])
+        if creditors[ci][0] == 0:
+            ci += 1
+        if debtors[di][0] == 0:
+            di += 1
 
     return transfers
 
@@ -63,60 +64,26 @@ def simplify_debts(net_map: Dict[int, Decimal]):
 async def get_group_net_balances(
     db: AsyncSession,
     group_id: int,
-) -> Dict[int, Decimal]:
+) -> Dict[int, Money]:
     """
     Returns:
         {
-            member_id: net_balance (Decimal)
+            member_id: net_balance (Money)
         }
 
-    net_balance = total_paid - total_owed
+    net_balance = total_paid - total_owed, read from the balance ledger
     """
 
-    # Total paid by each member
-    paid_q = (
-        select(
-            Expense.paid_by.label("member_id"),
-            func.coalesce(func.sum(Expense.amount), 0).label("paid"),
-        )
-        .where(Expense.group_id == group_id, Expense.is_deleted == False)
-        .group_by(Expense.paid_by)
-    )
-
-    paid_res = await db.execute(paid_q)
-    paid_map = {row.member_id: Decimal(str(row.paid)) for row in paid_res}
-
-    # Total owed by each member
-    owed_q = (
-        select(
-            ExpenseSplit.member_id,
-            func.coalesce(func.sum(ExpenseSplit.amount), 0).label("owed"),
-        )
-        .join(Expense, Expense.id == ExpenseSplit.expense_id)
-        .where(Expense.group_id == group_id, Expense.is_deleted == False)
-        .group_by(ExpenseSplit.member_id)
-    )
-
-    owed_res = await db.execute(owed_q)
-    owed_map = {row.member_id: Decimal(str(row.owed)) for row in owed_res}
-
-    # Union of all members involved
-    member_ids = set(paid_map.keys()) | set(owed_map.keys())
+    res = await db.execute(GROUP_BALANCES_Q, {"group_id": group_id})
 
-    net: Dict[int, Decimal] = {}
-    for member_id in member_ids:
-        net[member_id] = paid_map.get(member_id, Decimal("0")) - owed_map.get(
-            member_id, Decimal("0")
-        )
-
-    return net
+    return {row.member_id: Money.of(row.balance) for row in res}
 
 
 # working fine
 async def is_group_settled(
     db: AsyncSession,
     group_id: int,
-    tolerance: Decimal = Decimal("0.05"),
+    tolerance: Money = Money.of("0.05"),
 ) -> bool:
     """
     A group is settled if:
@@ -124,10 +91,8 @@ async def is_group_settled(
         for every member
     """
 
-    net_balances = await get_group_net_balances(db, group_id)
-
-    for amount in net_balances.values():
-        if abs(amount) > tolerance:
-            return False
+    unsettled = await db.scalar(
+        UNSETTLED_Q, {"group_id": group_id, "tolerance": tolerance.to_decimal()}
+    )
 
-    return True
+    return not unsettled
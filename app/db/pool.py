@@ -0,0 +1,73 @@
+import time
+from time import perf_counter
+from typing import Tuple
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from app.core.config import settings
+from app.core.metrics import (
+    POOL_CHECKED_OUT,
+    POOL_CONNECTION_AGE_SECONDS,
+    POOL_OVERFLOW,
+    POOL_TIMEOUTS,
+    POOL_WAIT_SECONDS,
+)
+
+
+def pool_limits() -> Tuple[int, int]:
+    """
+    (pool_size, max_overflow) for one app worker. With DB_MAX_CONNECTIONS
+    set, that budget is split evenly across WEB_CONCURRENCY workers and
+    only ever trims the configured sizes, so the whole deployment can't
+    open more than the server allows.
+    """
+    if not settings.DB_MAX_CONNECTIONS:
+        return settings.DB_POOL_SIZE, settings.DB_MAX_OVERFLOW
+
+    per_worker = max(settings.DB_MAX_CONNECTIONS // max(settings.WEB_CONCURRENCY, 1), 1)
+    pool_size = min(settings.DB_POOL_SIZE, per_worker)
+    return pool_size, min(settings.DB_MAX_OVERFLOW, per_worker - pool_size)
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    Queue pool that records how long each checkout waited for a
+    connection (including the connect itself when the pool grows), the
+    age of the connection handed out, and checked-out/overflow counts.
+    Metrics are labelled with the engine's pool_logging_name.
+    """
+
+    @property
+    def label(self) -> str:
+        return self.logging_name or "default"
+
+    def _report(self) -> None:
+        POOL_CHECKED_OUT.set(self.checkedout(), self.label)
+        POOL_OVERFLOW.set(max(self.overflow(), 0), self.label)
+
+    def _do_get(self):
+        start = perf_counter()
+        try:
+            record = super()._do_get()
+        except exc.TimeoutError:
+            POOL_TIMEOUTS.inc(self.label)
+            raise
+        finally:
+            POOL_WAIT_SECONDS.observe(perf_counter() - start, self.label)
+
+        POOL_CONNECTION_AGE_SECONDS.observe(time.time() - record.starttime, self.label)
+        self._report()
+        return record
+
+    def _do_return_conn(self, record):
+        super()._do_return_conn(record)
+        self._report()
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+        }
@@ -0,0 +1,151 @@
+import asyncio
+from contextvars import ContextVar
+from time import monotonic
+from typing import Optional
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session, sessionmaker
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.metrics import READ_ROUTING, REPLICA_LAG_SECONDS
+from app.db.session import async_session, read_engine, read_session
+
+# Replay lag in seconds. "Replayed everything received" only counts as zero
+# lag while the WAL receiver is streaming and has heard from the primary
+# within wal_receiver_timeout (it pings at half that, so a live link stays
+# inside it). A stalled or broken link returns NULL. A plain server (not a
+# standby) counts as 0. The role needs pg_read_all_stats, otherwise
+# pg_stat_wal_receiver hides the status and reads never use the replica.
+LAG_QUERY = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN r.status IS DISTINCT FROM 'streaming' THEN NULL
+        WHEN current_setting('wal_receiver_timeout')::interval > interval '0'
+            AND r.last_msg_receipt_time
+                < now() - current_setting('wal_receiver_timeout')::interval
+            THEN NULL
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(
+            EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0
+        )
+    END
+    FROM (SELECT 1) probe
+    LEFT JOIN pg_stat_wal_receiver r ON true
+    """)
+
+# Set by get_current_user so session events know who is writing
+current_user_id: ContextVar[Optional[int]] = ContextVar("current_user_id", default=None)
+
+# user id -> True while that user's own writes may not be on the replica yet
+recent_writers = TTLCache(maxsize=100_000, ttl=settings.RECENT_WRITE_SECONDS)
+
+_lag: Optional[float] = None
+_lag_checked = 0.0
+_monitor: Optional[asyncio.Task] = None
+
+
+@event.listens_for(Session, "after_flush")
+def _flag_flush(session, flush_context):
+    session.info["wrote"] = True
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _flag_dml(orm_execute_state):
+    if not orm_execute_state.is_select:
+        orm_execute_state.session.info["wrote"] = True
+
+
+@event.listens_for(Session, "after_commit")
+def _mark_writer(session):
+    user_id = current_user_id.get()
+    if session.info.pop("wrote", False) and user_id is not None:
+        recent_writers.set(user_id, True)
+
+
+@event.listens_for(Session, "after_rollback")
+def _clear_flag(session):
+    session.info.pop("wrote", None)
+
+
+def replica_healthy() -> bool:
+    # A stalled probe is as bad as a lagging replica
+    fresh = monotonic() - _lag_checked < 3 * settings.REPLICA_LAG_CHECK_SECONDS
+    return fresh and _lag is not None and _lag <= settings.REPLICA_MAX_LAG_SECONDS
+
+
+def session_for_reads(user_id: Optional[int]) -> sessionmaker:
+    """
+    Replica session factory when it is safe for this user, else primary.
+    """
+    if read_session is None:
+        return async_session
+
+    if user_id is not None and recent_writers.get(user_id) is not None:
+        READ_ROUTING.inc("primary", "recent_write")
+        return async_session
+
+    if not replica_healthy():
+        READ_ROUTING.inc("primary", "lag")
+        return async_session
+
+    READ_ROUTING.inc("replica", "ok")
+    return read_session
+
+
+async def check_replica_lag() -> Optional[float]:
+    global _lag, _lag_checked
+
+    async with read_engine.connect() as conn:
+        lag = (await conn.execute(LAG_QUERY)).scalar()
+    # None (replication broken) keeps reads on the primary
+    _lag = None if lag is None else float(lag)
+    _lag_checked = monotonic()
+    REPLICA_LAG_SECONDS.set(-1 if _lag is None else _lag)
+    return _lag
+
+
+async def _monitor_loop():
+    global _lag
+
+    while True:
+        try:
+            await check_replica_lag()
+        except Exception as e:
+            _lag = None
+            print(f"Splito : replica lag check failed ({e})")
+
+        await asyncio.sleep(settings.REPLICA_LAG_CHECK_SECONDS)
+
+
+async def start_replica_monitor():
+    """
+    Keeps the replica lag fresh so routing never waits on a probe.
+    No-op without READ_DATABASE_URL.
+    """
+    global _monitor
+
+    if read_engine is None:
+        return
+
+    if _monitor is None or _monitor.done():
+        _monitor = asyncio.create_task(_monitor_loop())
+
+
+async def stop_replica_monitor():
+    global _monitor
+
+    if _monitor is not None:
+        _monitor.cancel()
+        try:
+            await _monitor
+        except asyncio.CancelledError:
+            pass
+        _monitor = None
+
+
+def stats() -> dict:
+    return {
+        "configured": read_engine is not None,
+        "lag_seconds": _lag,
+        "healthy": read_engine is not None and replica_healthy(),
+        "recent_writers": len(recent_writers),
+    }
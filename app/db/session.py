@@ -1,19 +1,44 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.slow_queries import record_slow_queries
+from app.db.pool import InstrumentedPool, pool_limits
 
 Base = declarative_base()
 
-engine = create_async_engine(
-    settings.DATABASE_URL,
-    echo=False,
-    pool_pre_ping=True,
-    pool_size=5,
-    max_overflow=10,
-    connect_args={
-        "timeout": 10,
-        "server_settings": {"application_name": "splito-api"},
-    },
+
+def _create_engine(url: str, name: str, server_settings: dict):
+    pool_size, max_overflow = pool_limits()
+
+    if settings.DB_STATEMENT_TIMEOUT_MS:
+        server_settings["statement_timeout"] = str(settings.DB_STATEMENT_TIMEOUT_MS)
+
+    # No pre-ping round trip per checkout: connections are recycled by age
+    # and a disconnect error invalidates the pool (app.core.metrics)
+    engine = create_async_engine(
+        url,
+        echo=False,
+        poolclass=InstrumentedPool,
+        pool_logging_name=name,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        connect_args={
+            "timeout": settings.DB_CONNECT_TIMEOUT,
+            "server_settings": server_settings,
+        },
+    )
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+record_slow_queries()
+
+
+engine = _create_engine(
+    settings.DATABASE_URL, "primary", {"application_name": "splito-api"}
 )
 
 async_session = sessionmaker(
@@ -22,7 +47,28 @@ async_session = sessionmaker(
     expire_on_commit=False
 )
 
+# Optional read replica; app.db.replica decides when reads may use it
+read_engine = (
+    _create_engine(
+        settings.READ_DATABASE_URL,
+        "read",
+        # Refuse writes even when pointed at a plain (non-standby) server
+        {
+            "application_name": "splito-api-read",
+            "default_transaction_read_only": "on",
+        },
+    )
+    if settings.READ_DATABASE_URL
+    else None
+)
+
+read_session = (
+    sessionmaker(bind=read_engine, class_=AsyncSession, expire_on_commit=False)
+    if read_engine is not None
+    else None
+)
+
 # working fine
 async def get_db():
     async with async_session() as session:
-        yield session
\ No newline at end of file
+        yield session
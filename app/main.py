@@ -9,15 +9,36 @@ from app.api.v1.routes.expense import router as expense_router
 from app.api.v1.routes.settlement import router as settlement_router
 from app.api.v1.routes.webhook import router as webhook_router
 from app.core.db_check import wait_for_db
+from app.core.security import start_jwks_refresher, stop_jwks_refresher
+from app.core.hashing import start_hash_pool, stop_hash_pool
+from app.services.webhook_service import start_inbox_worker, stop_inbox_worker
+from app.core.idempotency import start_idempotency_janitor, stop_idempotency_janitor
+from app.db.replica import start_replica_monitor, stop_replica_monitor
+from app.core.responses import FastJSONResponse
+from app.core.metrics import MetricsMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     await wait_for_db()
+    await start_jwks_refresher()
+    await start_hash_pool()
+    await start_inbox_worker()
+    await start_idempotency_janitor()
+    await start_replica_monitor()
     yield
+    await stop_replica_monitor()
+    await stop_idempotency_janitor()
+    await stop_inbox_worker()
+    stop_hash_pool()
+    await stop_jwks_refresher()
 
 
-app = FastAPI(lifespan=lifespan, title="Splitwise Backend")
+app = FastAPI(
+    lifespan=lifespan,
+    title="Splitwise Backend",
+    default_response_class=FastJSONResponse,
+)
 
 origins = (
     [settings.CLIENT_URL] if settings.ENV == "production" else ["http://localhost:5173"]
@@ -30,6 +51,7 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(MetricsMiddleware)
 
 
 @app.head("/")
@@ -3,3 +3,7 @@ from .expense import Expense
 from .expense_split import ExpenseSplit
 from .group import Group
 from .group_member import GroupMember
+from .group_member_balance import GroupMemberBalance
+from .user_monthly_spend import UserMonthlySpend
+from .webhook_inbox import WebhookInbox
+from .idempotency_key import IdempotencyKey
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Numeric, Boolean, Index, text
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.db.session import Base
@@ -16,3 +16,21 @@ class Expense(Base):
     is_deleted = Column(Boolean, nullable=False, server_default="false")
 
     splits = relationship("ExpenseSplit", back_populates="expense", cascade="all, delete")
+
+    __table_args__ = (
+        # Group expense lists and keyset pages (created_at, id)
+        Index(
+            "ix_expenses_group_created_active",
+            "group_id",
+            "created_at",
+            "id",
+            postgresql_where=text("is_deleted = false"),
+        ),
+        # Paid-by aggregates (balances, analytics)
+        Index(
+            "ix_expenses_paid_by_active",
+            "paid_by",
+            postgresql_include=["amount", "group_id"],
+            postgresql_where=text("is_deleted = false"),
+        ),
+    )
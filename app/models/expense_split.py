@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, Numeric, ForeignKey
+from sqlalchemy import Column, Integer, Numeric, ForeignKey, Index
 from sqlalchemy.orm import relationship
 from app.db.session import Base
 
@@ -10,4 +10,18 @@ class ExpenseSplit(Base):
     member_id = Column(Integer, ForeignKey("group_members.id"), nullable=False)
     amount = Column(Numeric(10, 2), nullable=False)
 
-    expense = relationship("Expense", back_populates="splits")
\ No newline at end of file
+    expense = relationship("Expense", back_populates="splits")
+
+    __table_args__ = (
+        Index(
+            "ix_expense_splits_expense_member",
+            "expense_id",
+            "member_id",
+            postgresql_include=["amount"],
+        ),
+        Index(
+            "ix_expense_splits_member",
+            "member_id",
+            postgresql_include=["expense_id", "amount"],
+        ),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Boolean, Numeric
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func, false
 from app.db.session import Base
@@ -11,6 +11,9 @@ class Group(Base):
     created_by = Column(Integer, ForeignKey("users.id"))
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     is_deleted = Column(Boolean, nullable=False, server_default=false())
+    total_spent = Column(Numeric(12, 2), nullable=False, server_default="0")
+    # Bumped on every write that changes what members see; backs ETags
+    version = Column(Integer, nullable=False, server_default="1")
 
     members = relationship(
         "GroupMember",
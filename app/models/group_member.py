@@ -1,4 +1,4 @@
-from sqlalchemy import Column, ForeignKey, Integer, DateTime, func, String, UniqueConstraint, Boolean
+from sqlalchemy import Column, ForeignKey, Integer, DateTime, func, String, UniqueConstraint, Boolean, Index
 from app.db.session import Base
 from sqlalchemy.orm import relationship
 
@@ -33,4 +33,10 @@ class GroupMember(Base):
     __table_args__ = (
         UniqueConstraint("group_id", "email", name="uq_group_member_email"),
         UniqueConstraint("group_id", "phone", name="uq_group_member_phone"),
+        Index(
+            "ix_group_members_user_group",
+            "user_id",
+            "group_id",
+            postgresql_include=["is_admin"],
+        ),
     )
\ No newline at end of file
@@ -0,0 +1,26 @@
+from sqlalchemy import Column, Integer, Numeric, ForeignKey
+from app.db.session import Base
+
+
+class GroupMemberBalance(Base):
+    """
+    Running net balance (paid - owed) of a member within its group.
+    Maintained by app.services.ledger_service alongside expense writes.
+    """
+
+    __tablename__ = "group_member_balances"
+
+    member_id = Column(
+        Integer,
+        ForeignKey("group_members.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    group_id = Column(
+        Integer,
+        ForeignKey("groups.id", ondelete="CASCADE"),
+        nullable=False,
+        index=True,
+    )
+
+    balance = Column(Numeric(12, 2), nullable=False, server_default="0")
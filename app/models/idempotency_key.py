@@ -0,0 +1,30 @@
+from sqlalchemy import Column, DateTime, ForeignKey, Integer, String
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class IdempotencyKey(Base):
+    """
+    Stored response for an Idempotency-Key, scoped to the user who sent it.
+    Written in the same transaction as the work it describes.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    key = Column(String(255), primary_key=True)
+
+    # sha256 of the request, so a reused key with a new body is caught
+    request_hash = Column(String(64), nullable=False)
+
+    response = Column(JSONB, nullable=False)
+
+    created_at = Column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False, index=True
+    )
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Date, Numeric, ForeignKey
+from app.db.session import Base
+
+
+class UserMonthlySpend(Base):
+    """
+    Per-user, per-group, per-month totals of split shares and amounts paid.
+    Maintained by app.services.ledger_service alongside expense writes.
+    """
+
+    __tablename__ = "user_monthly_spend"
+
+    user_id = Column(
+        Integer,
+        ForeignKey("users.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    group_id = Column(
+        Integer,
+        ForeignKey("groups.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+
+    month = Column(Date, primary_key=True)
+
+    share = Column(Numeric(12, 2), nullable=False, server_default="0")
+
+    paid = Column(Numeric(12, 2), nullable=False, server_default="0")
@@ -0,0 +1,35 @@
+from sqlalchemy import BigInteger, Column, DateTime, Index, Integer, String, text
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql import func
+from app.db.session import Base
+
+
+class WebhookInbox(Base):
+    """
+    Raw Clerk webhook events, stored on receipt and applied later by the
+    inbox worker in app.services.webhook_service.
+    """
+
+    __tablename__ = "webhook_inbox"
+
+    id = Column(BigInteger, primary_key=True)
+
+    # svix-id header, so Clerk retries of the same event are stored once
+    event_id = Column(String, unique=True, nullable=False)
+    event_type = Column(String, nullable=False)
+    payload = Column(JSONB, nullable=False)
+
+    received_at = Column(DateTime(timezone=True), server_default=func.now())
+    processed_at = Column(DateTime(timezone=True), nullable=True)
+
+    attempts = Column(Integer, nullable=False, server_default="0")
+    last_error = Column(String, nullable=True)
+
+    __table_args__ = (
+        # The worker's claim query only ever looks at pending rows
+        Index(
+            "ix_webhook_inbox_pending",
+            "id",
+            postgresql_where=text("processed_at IS NULL"),
+        ),
+    )
@@ -1,5 +1,6 @@
-from pydantic import BaseModel, condecimal
+from pydantic import BaseModel, condecimal, field_validator
 from typing import List, Literal
+from datetime import datetime, timezone
 
 class SplitInput(BaseModel):
     member_id: int
@@ -21,3 +22,31 @@ class ExpenseOut(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class ExpenseImportRow(BaseModel):
+    title: str
+    amount: float
+    strategy: Literal["equal", "percentage", "exact"] = "exact"
+    # Payer's group member id; defaults to the importing member
+    paid_by: int | None = None
+    created_at: datetime | None = None
+    splits: List[SplitInput]
+
+    @field_validator("created_at")
+    @classmethod
+    def assume_utc(cls, value):
+        # Naive timestamps are UTC, never the server's local time
+        if value is not None and value.tzinfo is None:
+            return value.replace(tzinfo=timezone.utc)
+        return value
+
+
+class ExpenseImportError(BaseModel):
+    row: int
+    error: str
+
+
+class ExpenseImportResult(BaseModel):
+    imported: int
+    errors: List[ExpenseImportError] = []
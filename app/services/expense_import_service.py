@@ -0,0 +1,194 @@
+import csv
+import io
+import json
+from datetime import datetime, timezone
+from typing import List, Tuple
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import bindparam, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.dependencies import ensure_active_group_member
+from app.models.group_member import GroupMember
+from app.schemas.expense import ExpenseImportRow
+from app.services.expense_services import reconcile_split_amounts
+from app.services.ledger_service import apply_expenses
+from app.core.events import broker
+
+MAX_IMPORT_ROWS = 50_000
+
+EXPENSE_COLUMNS = [
+    "id",
+    "group_id",
+    "paid_by",
+    "amount",
+    "title",
+    "created_at",
+    "strategy",
+    "is_deleted",
+]
+SPLIT_COLUMNS = ["expense_id", "member_id", "amount"]
+
+GROUP_MEMBER_IDS_Q = select(GroupMember.id, GroupMember.user_id).where(
+    GroupMember.group_id == bindparam("group_id")
+)
+
+
+def _parse_csv_splits(raw: str) -> List[dict]:
+    """
+    "12:10.50;13:5" -> [{"member_id": "12", "amount": "10.50"}, ...]
+    """
+    splits = []
+    for part in filter(None, (p.strip() for p in (raw or "").split(";"))):
+        member_id, _, amount = part.partition(":")
+        splits.append({"member_id": member_id.strip(), "amount": amount.strip()})
+    return splits
+
+
+def parse_import_rows(body: bytes, content_type: str) -> List[Tuple[int, object]]:
+    """
+    Splits an upload into (row_number, raw_row) pairs. CSV needs a header
+    of title,amount,strategy,paid_by,created_at,splits; anything else is
+    read as JSON lines. Rows that fail to parse come back as exceptions.
+    """
+    text_body = body.decode("utf-8-sig")
+    rows: List[Tuple[int, object]] = []
+
+    if "csv" in (content_type or ""):
+        reader = csv.DictReader(io.StringIO(text_body))
+        for number, record in enumerate(reader, start=1):
+            record = {k: v for k, v in record.items() if v not in (None, "")}
+            record["splits"] = _parse_csv_splits(record.get("splits", ""))
+            rows.append((number, record))
+    else:
+        for number, line in enumerate(text_body.splitlines(), start=1):
+            if not line.strip():
+                continue
+            try:
+                rows.append((number, json.loads(line)))
+            except ValueError as e:
+                rows.append((number, e))
+
+    if len(rows) > MAX_IMPORT_ROWS:
+        raise HTTPException(
+            413, detail=f"At most {MAX_IMPORT_ROWS} rows can be imported at once"
+        )
+
+    return rows
+
+
+def _error_text(error: Exception) -> str:
+    if isinstance(error, HTTPException):
+        return str(error.detail)
+    if isinstance(error, ValidationError):
+        return "; ".join(
+            f"{'.'.join(map(str, e['loc']))}: {e['msg']}" for e in error.errors()
+        )
+    return str(error)
+
+
+# working fine
+async def import_expenses(
+    db: AsyncSession,
+    group_id: int,
+    user_id: int,
+    rows: List[Tuple[int, object]],
+):
+    """
+    Validates every row in memory, then writes all expenses and splits
+    with COPY in one transaction. Nothing is written if any row is bad.
+    """
+    await ensure_active_group_member(db, user_id, group_id)
+
+    # 1. Resolve the whole member list in one query
+    res = await db.execute(GROUP_MEMBER_IDS_Q, {"group_id": group_id})
+    members = res.all()
+    member_ids = {m.id for m in members}
+    my_member_id = next(m.id for m in members if m.user_id == user_id)
+
+    # 2. Validate & reconcile every row before touching the database
+    now = datetime.now(timezone.utc)
+    expenses = []
+    errors = []
+
+    for number, raw in rows:
+        try:
+            if isinstance(raw, Exception):
+                raise raw
+
+            row = ExpenseImportRow.model_validate(raw)
+            paid_by = row.paid_by or my_member_id
+            split_members = [s.member_id for s in row.splits]
+
+            if len(split_members) != len(set(split_members)):
+                raise ValueError("Duplicate users found in splits")
+
+            if paid_by not in member_ids or not member_ids.issuperset(split_members):
+                raise ValueError("One or more members are not in the group")
+
+            amount, split_amounts = reconcile_split_amounts(
+                row.amount, [s.amount for s in row.splits]
+            )
+        except (HTTPException, ValidationError, ValueError) as e:
+            errors.append({"row": number, "error": _error_text(e)})
+            continue
+
+        expenses.append(
+            (row, paid_by, amount, list(zip(split_members, split_amounts)))
+        )
+
+    if errors:
+        raise HTTPException(422, detail={"imported": 0, "errors": errors})
+
+    if not expenses:
+        return {"imported": 0, "errors": []}
+
+    # 3. Reserve ids up front so splits can reference their expense
+    id_res = await db.execute(
+        text(
+            "SELECT nextval(pg_get_serial_sequence('expenses', 'id')) "
+            "FROM generate_series(1, :n)"
+        ),
+        {"n": len(expenses)},
+    )
+    expense_ids = [r[0] for r in id_res]
+
+    expense_records = []
+    split_records = []
+    for expense_id, (row, paid_by, amount, splits) in zip(expense_ids, expenses):
+        expense_records.append(
+            (
+                expense_id,
+                group_id,
+                paid_by,
+                amount.to_decimal(),
+                row.title,
+                row.created_at or now,
+                row.strategy,
+                False,
+            )
+        )
+        split_records.extend(
+            (expense_id, member_id, split.to_decimal()) for member_id, split in splits
+        )
+
+    # 4. COPY through the session's own connection, inside its transaction
+    conn = await db.connection()
+    raw_conn = await conn.get_raw_connection()
+    pg = raw_conn.driver_connection
+
+    await pg.copy_records_to_table(
+        "expenses", records=expense_records, columns=EXPENSE_COLUMNS
+    )
+    await pg.copy_records_to_table(
+        "expense_splits", records=split_records, columns=SPLIT_COLUMNS
+    )
+
+    await apply_expenses(db, expense_ids)
+    await db.commit()
+
+    broker.publish(
+        group_id,
+        {"type": "expenses_imported", "group_id": group_id, "count": len(expense_ids)},
+    )
+
+    return {"imported": len(expense_ids), "errors": []}
@@ -1,28 +1,102 @@
-from app.core.dependencies import ensure_active_group_member, fetch_member_id
+from app.core.dependencies import (
+    MEMBER_ID_Q,
+    ensure_active_group_member,
+    fetch_member_id,
+)
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import bindparam, select, func, update
 from sqlalchemy.orm import aliased
 from app.models.expense import Expense
 from app.models.expense_split import ExpenseSplit
 from app.models.group_member import GroupMember
 from app.schemas.expense import ExpenseCreate
 from app.models.user import User
-from app.core.utils import qround
-from decimal import Decimal, ROUND_HALF_UP
-from fastapi import HTTPException
+from app.core.money import Money, to_cents
+from app.services.ledger_service import apply_expenses
+from app.core.pagination import (
+    keyset_before,
+    keyset_params,
+    fetch_page,
+    stream_ndjson,
+)
+from app.core.events import broker
+from app.core.idempotency import claim_key, request_hash, store_response
+from fastapi import HTTPException, Response
+from fastapi.encoders import jsonable_encoder
+from typing import List, Optional, Tuple
+
+
+# Largest rounding gap that gets absorbed instead of rejected
+MAX_PENNY_GAP = Money.of("0.10")
+
+SPLIT_MEMBERS_Q = select(GroupMember.id).where(
+    GroupMember.group_id == bindparam("group_id"),
+    GroupMember.id.in_(bindparam("member_ids", expanding=True)),
+)
+
+LIVE_EXPENSE_Q = select(Expense).where(
+    Expense.id == bindparam("expense_id"), Expense.is_deleted == False
+)
+
+# Flips the expense only if it is still live; under READ COMMITTED a
+# concurrent delete waits on the row lock and then matches nothing
+CLAIM_DELETE_Q = (
+    update(Expense)
+    .where(
+        Expense.id == bindparam("expense_id"),
+        Expense.paid_by == bindparam("payer_id"),
+        Expense.is_deleted == False,
+    )
+    .values(is_deleted=True)
+    .returning(Expense.id)
+    .execution_options(synchronize_session=False)
+)
 
 
-# working fine
-async def create_expense(
+def reconcile_split_amounts(amount, split_amounts) -> Tuple[Money, List[Money]]:
+    """
+    Rounds the expense and its splits to cents and closes any small
+    rounding gap ("penny gap") on the first split so the books balance.
+    """
+    expense_cents = to_cents(amount)
+    split_cents = [to_cents(a) for a in split_amounts]
+
+    if not split_cents:
+        raise HTTPException(400, detail="At least one split is required")
+
+    if min(split_cents) <= 0:
+        raise HTTPException(400, detail="Split amounts must be positive")
+
+    # Calculate the "Penny Gap"
+    total_split_cents = sum(split_cents)
+    difference = expense_cents - total_split_cents
+
+    # If there's a minor rounding difference (e.g., 0.01 or 0.02),
+    # adjust the first person's split to balance the books.
+    if difference:
+        # We allow a small threshold for auto-adjustment (e.g., 10 cents)
+        # to prevent massive data entry errors from being "auto-fixed"
+        if abs(difference) > MAX_PENNY_GAP.cents:
+            raise HTTPException(
+                400,
+                detail=f"Split total {Money(total_split_cents)} differs too much from {Money(expense_cents)}"
+            )
+        split_cents[0] += difference
+
+    return Money(expense_cents), [Money(c) for c in split_cents]
+
+
+async def insert_expense(
     db: AsyncSession, data: ExpenseCreate, paid_by: int, group_id: int
-):
+) -> Expense:
+    """
+    Validates and writes the expense, its splits and ledger updates without
+    committing, so callers can add to the same transaction.
+    """
     # 1. Verify group membership for the payer
     await ensure_active_group_member(db, paid_by, group_id)
 
-    payer_member_id_query = select(GroupMember.id).where(
-        GroupMember.group_id == group_id, GroupMember.user_id == paid_by
-    )
-    res = await db.execute(payer_member_id_query)
+    res = await db.execute(MEMBER_ID_Q, {"user_id": paid_by, "group_id": group_id})
     payer_member_id = res.scalar_one_or_none()
 
     if not payer_member_id:
@@ -36,41 +110,14 @@ async def create_expense(
     # -----------------------------------
     # 3. Validate & Reconcile amounts
     # -----------------------------------
-    TWOPLACES = Decimal('0.01')
-    
-    # Standardize the total expense amount
-    expense_amount = Decimal(str(data.amount)).quantize(TWOPLACES, rounding=ROUND_HALF_UP)
-    
-    # Quantize all split amounts and keep them in a list
-    split_amounts = [
-        Decimal(str(s.amount)).quantize(TWOPLACES, rounding=ROUND_HALF_UP) 
-        for s in data.splits
-    ]
-
-    if any(amt <= 0 for amt in split_amounts):
-        raise HTTPException(400, detail="Split amounts must be positive")
-
-    # Calculate the "Penny Gap"
-    total_split_sum = sum(split_amounts)
-    difference = expense_amount - total_split_sum
-
-    # If there's a minor rounding difference (e.g., 0.01 or 0.02), 
-    # adjust the first person's split to balance the books.
-    if difference != 0:
-        # We allow a small threshold for auto-adjustment (e.g., 10 cents)
-        # to prevent massive data entry errors from being "auto-fixed"
-        if abs(difference) > Decimal('0.10'):
-            raise HTTPException(
-                400, 
-                detail=f"Split total {total_split_sum} differs too much from {expense_amount}"
-            )
-        split_amounts[0] += difference
+    expense_amount, split_amounts = reconcile_split_amounts(
+        data.amount, [s.amount for s in data.splits]
+    )
 
     # 4. Validate ALL split users are group members
-    members_q = select(GroupMember.id).where(
-        GroupMember.group_id == group_id, GroupMember.id.in_(member_ids)
+    members_res = await db.execute(
+        SPLIT_MEMBERS_Q, {"group_id": group_id, "member_ids": member_ids}
     )
-    members_res = await db.execute(members_q)
     valid_member_ids = {row[0] for row in members_res.all()}
 
     if set(member_ids) != valid_member_ids:
@@ -82,7 +129,7 @@ async def create_expense(
     expense = Expense(
         group_id=group_id,
         paid_by=payer_member_id,
-        amount=expense_amount, # Use the quantized decimal
+        amount=expense_amount.to_decimal(),
         title=data.title,
         strategy=data.strategy,
     )
@@ -97,48 +144,122 @@ async def create_expense(
         ExpenseSplit(
             expense_id=expense.id, 
             member_id=data.splits[i].member_id, 
-            amount=split_amounts[i] # Use the reconciled amount
+            amount=split_amounts[i].to_decimal(),  # Use the reconciled amount
         )
         for i in range(len(data.splits))
     ]
 
     db.add_all(splits)
+    await db.flush()
 
-    await db.commit()
-    await db.refresh(expense)
+    await apply_expenses(db, [expense.id])
 
+    # Loads server defaults (created_at) while still inside the transaction
+    await db.refresh(expense)
     return expense
 
+
+# working fine
+async def create_expense(
+    db: AsyncSession,
+    data: ExpenseCreate,
+    paid_by: int,
+    group_id: int,
+    idempotency_key: Optional[str] = None,
+    response: Optional[Response] = None,
+):
+    if idempotency_key:
+        fingerprint = request_hash(group_id, data.model_dump())
+        stored = await claim_key(db, paid_by, idempotency_key, fingerprint)
+
+        if stored is not None:
+            # Replay: hand back the first response, expense tables untouched
+            await db.rollback()
+            if response is not None:
+                response.headers["Idempotent-Replayed"] = "true"
+            return stored
+
+    expense = await insert_expense(db, data, paid_by, group_id)
+    content = jsonable_encoder(expense)
+
+    if idempotency_key:
+        await store_response(db, paid_by, idempotency_key, fingerprint, content)
+
+    await db.commit()
+
+    broker.publish(
+        group_id,
+        {
+            "type": "expense_created",
+            "group_id": group_id,
+            "expense": {
+                "id": expense.id,
+                "title": expense.title,
+                "amount": float(expense.amount),
+                "paid_by": expense.paid_by,
+                "strategy": expense.strategy,
+                "created_at": expense.created_at,
+            },
+        },
+    )
+
+    return content
+
 # working fine
 async def delete_expense(db: AsyncSession, user_id: int, expense_id: int):
     # Fetch expense
-    q = select(Expense).where(Expense.id == expense_id, Expense.is_deleted == False)
-    res = await db.execute(q)
+    res = await db.execute(LIVE_EXPENSE_Q, {"expense_id": expense_id})
     expense = res.scalar_one_or_none()
 
-    member_id = await fetch_member_id(db, user_id, expense.group_id)
-
     if not expense:
         raise HTTPException(404, detail="Expense not found")
 
+    member_id = await fetch_member_id(db, user_id, expense.group_id)
+
     # Authorization: only payer can delete
     if expense.paid_by != member_id:
         raise HTTPException(403, detail="You cannot delete this expense")
 
-    # Cascade deletes ExpenseSplit if relationship is set
-    expense.is_deleted = True
+    # Back the expense out only if this transaction is the one that hid it
+    group_id = expense.group_id
+    claimed = await db.scalar(
+        CLAIM_DELETE_Q, {"expense_id": expense_id, "payer_id": member_id}
+    )
+    if claimed is None:
+        await db.rollback()
+        raise HTTPException(404, detail="Expense not found")
+
+    await apply_expenses(db, [claimed], sign=-1)
     await db.commit()
 
+    broker.publish(
+        group_id,
+        {"type": "expense_deleted", "group_id": group_id, "expense_id": expense_id},
+    )
+
     return {"status": "deleted"}
 
 
-# working fine
-async def get_my_expenses(db: AsyncSession, user_id: int):
+def _expense_row(row) -> dict:
+    return {
+        "id": row.id,
+        "group_id": row.group_id,
+        "title": row.title,
+        "amount": float(row.amount),
+        "paid_by": row.paid_by,
+        "payer_name": row.payer_name,
+        "strategy": row.strategy,
+        "created_at": row.created_at,
+        "my_share": float(row.my_share),
+    }
+
+
+def _my_expenses_select():
     my_member = aliased(GroupMember)
     payer_member = aliased(GroupMember)
     payer_user = aliased(User)
 
-    q = (
+    return (
         select(
             Expense.id,
             Expense.group_id,
@@ -156,28 +277,43 @@ async def get_my_expenses(db: AsyncSession, user_id: int):
         .join(payer_member, payer_member.id == Expense.paid_by)
         .join(payer_user, payer_user.id == payer_member.user_id)
         .where(
-            my_member.user_id == user_id,
+            my_member.user_id == bindparam("user_id"),
             Expense.is_deleted == False,
         )
         .order_by(Expense.created_at.desc(), Expense.id.desc())
     )
 
-    res = await db.execute(q)
 
-    return [
-        {
-            "id": row.id,
-            "group_id": row.group_id,
-            "title": row.title,
-            "amount": float(row.amount),
-            "paid_by": row.paid_by,
-            "payer_name": row.payer_name,
-            "strategy": row.strategy,
-            "created_at": row.created_at,
-            "my_share": float(row.my_share),
-        }
-        for row in res.all()
-    ]
+MY_EXPENSES_Q = _my_expenses_select()
+MY_EXPENSES_AFTER_Q = MY_EXPENSES_Q.where(keyset_before(Expense.created_at, Expense.id))
+
+
+def _my_expenses_query(user_id: int, cursor: Optional[str] = None):
+    if cursor:
+        return MY_EXPENSES_AFTER_Q, {"user_id": user_id, **keyset_params(cursor)}
+
+    return MY_EXPENSES_Q, {"user_id": user_id}
+
+
+# working fine
+async def get_my_expenses(
+    db: AsyncSession,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Returns (expenses, next_cursor). Without a limit the whole history
+    comes back in one page.
+    """
+    q, params = _my_expenses_query(user_id, cursor)
+    return await fetch_page(db, q, limit, _expense_row, params)
+
+
+# working fine
+async def stream_my_expenses(db: AsyncSession, user_id: int):
+    q, params = _my_expenses_query(user_id)
+    return stream_ndjson(db, q, _expense_row, params)
 
 
 # working fine
@@ -194,26 +330,20 @@ async def get_expenses(db: AsyncSession, user_id: int):
     return res.scalars().all()
 
 
-# working fine
-async def get_expenses_by_group(
-    db: AsyncSession,
-    group_id: int,
-    user_id: int,
-):
-    await ensure_active_group_member(db, user_id, group_id)
-
-    current_member_id = await fetch_member_id(db, user_id, group_id)
-
-    if not current_member_id:
-        raise HTTPException(400, "User is not a member of the group")
-
+def _group_expenses_select():
     my_split = aliased(ExpenseSplit)
     payer_member = aliased(GroupMember)
     payer_user = aliased(User)
 
-    q = (
+    return (
         select(
-            Expense,
+            Expense.id,
+            Expense.group_id,
+            Expense.title,
+            Expense.amount,
+            Expense.paid_by,
+            Expense.strategy,
+            Expense.created_at,
             func.coalesce(func.sum(my_split.amount), 0).label("my_share"),
             payer_user.name.label("payer_name"),
         )
@@ -221,7 +351,7 @@ async def get_expenses_by_group(
         .outerjoin(
             my_split,
             (my_split.expense_id == Expense.id)
-            & (my_split.member_id == current_member_id),
+            & (my_split.member_id == bindparam("member_id")),
         )
         # join to get payer name
         .join(
@@ -233,7 +363,7 @@ async def get_expenses_by_group(
             payer_user.id == payer_member.user_id,
         )
         .where(
-            Expense.group_id == group_id,
+            Expense.group_id == bindparam("group_id"),
             Expense.is_deleted == False,
         )
         .group_by(
@@ -246,20 +376,50 @@ async def get_expenses_by_group(
         )
     )
 
-    res = await db.execute(q)
-    rows = res.all()
 
-    return [
-        {
-            "id": expense.id,
-            "group_id": expense.group_id,
-            "title": expense.title,
-            "amount": float(expense.amount),
-            "paid_by": expense.paid_by,
-            "payer_name": payer_name,
-            "strategy": expense.strategy,
-            "created_at": expense.created_at,
-            "my_share": float(my_share),
-        }
-        for expense, my_share, payer_name in rows
-    ]
+GROUP_EXPENSES_Q = _group_expenses_select()
+GROUP_EXPENSES_AFTER_Q = GROUP_EXPENSES_Q.where(
+    keyset_before(Expense.created_at, Expense.id)
+)
+
+
+async def _group_expenses_query(
+    db: AsyncSession,
+    group_id: int,
+    user_id: int,
+    cursor: Optional[str] = None,
+):
+    await ensure_active_group_member(db, user_id, group_id)
+
+    current_member_id = await fetch_member_id(db, user_id, group_id)
+
+    if not current_member_id:
+        raise HTTPException(400, "User is not a member of the group")
+
+    params = {"group_id": group_id, "member_id": current_member_id}
+    if cursor:
+        return GROUP_EXPENSES_AFTER_Q, {**params, **keyset_params(cursor)}
+
+    return GROUP_EXPENSES_Q, params
+
+
+# working fine
+async def get_expenses_by_group(
+    db: AsyncSession,
+    group_id: int,
+    user_id: int,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
+):
+    """
+    Returns (expenses, next_cursor), newest first.
+    """
+    q, params = await _group_expenses_query(db, group_id, user_id, cursor)
+    return await fetch_page(db, q, limit, _expense_row, params)
+
+
+# working fine
+async def stream_expenses_by_group(db: AsyncSession, group_id: int, user_id: int):
+    # Membership is checked up front so errors surface before streaming starts
+    q, params = await _group_expenses_query(db, group_id, user_id)
+    return stream_ndjson(db, q, _expense_row, params)
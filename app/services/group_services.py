@@ -1,18 +1,219 @@
 from decimal import Decimal
 from fastapi import HTTPException
-from sqlalchemy import select, update, func, case, extract, desc
+from sqlalchemy import bindparam, select, update, func, true, tuple_, cast, Date
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.group import Group
 from app.models.group_member import GroupMember
 from app.models.expense import Expense
 from app.models.expense_split import ExpenseSplit
 from app.models.user import User
+from app.models.group_member_balance import GroupMemberBalance
+from app.models.user_monthly_spend import UserMonthlySpend
 from app.schemas.group import GroupMemberIn, UpdateGroupName
 from app.core.utils import is_group_settled
 from app.core.dependencies import ensure_active_group_member, fetch_member_id
+from app.services.ledger_service import apply_expenses
+from app.core.events import broker, stream_group_events
 from datetime import datetime, timedelta
 
 
+GROUP_Q = select(Group).where(Group.id == bindparam("group_id"))
+
+# Version of a live group, only if the user is a member
+GROUP_VERSION_Q = (
+    select(Group.version)
+    .join(
+        GroupMember,
+        (GroupMember.group_id == Group.id)
+        & (GroupMember.user_id == bindparam("user_id")),
+    )
+    .where(Group.id == bindparam("group_id"), Group.is_deleted == False)
+    .limit(1)
+)
+
+USER_GROUPS_VERSION_Q = (
+    select(
+        func.count(Group.id),
+        func.coalesce(func.sum(Group.version), 0),
+        func.coalesce(func.max(Group.id), 0),
+    )
+    .join(
+        GroupMember,
+        (GroupMember.group_id == Group.id)
+        & (GroupMember.user_id == bindparam("user_id")),
+    )
+    .where(Group.is_deleted == False)
+)
+
+
+def _group_detail_select():
+    # -----------------------------
+    # Current member + admin flag
+    # -----------------------------
+    me = (
+        select(GroupMember.id, GroupMember.group_id, GroupMember.is_admin)
+        .where(
+            GroupMember.group_id == bindparam("group_id"),
+            GroupMember.user_id == bindparam("user_id"),
+        )
+        .limit(1)
+        .cte("me")
+    )
+
+    # -----------------------------
+    # Member count
+    # -----------------------------
+    counts = (
+        select(func.count(GroupMember.id).label("member_count"))
+        .where(GroupMember.group_id == bindparam("group_id"))
+        .cte("member_count")
+    )
+
+    return (
+        select(
+            Group.id,
+            Group.name,
+            Group.created_by,
+            Group.created_at,
+            Group.total_spent,
+            me.c.id.label("member_id"),
+            me.c.is_admin,
+            func.coalesce(GroupMemberBalance.balance, 0).label("my_balance"),
+            counts.c.member_count,
+        )
+        .select_from(Group)
+        .join(counts, true())
+        .outerjoin(me, me.c.group_id == Group.id)
+        .outerjoin(GroupMemberBalance, GroupMemberBalance.member_id == me.c.id)
+        .where(
+            Group.id == bindparam("group_id"),
+            Group.is_deleted == False,
+        )
+    )
+
+
+def _user_groups_select():
+    member_count_subq = (
+        select(
+            GroupMember.group_id,
+            func.count(GroupMember.id).label("member_count"),
+        )
+        .group_by(GroupMember.group_id)
+        .subquery()
+    )
+
+    return (
+        select(
+            Group,
+            GroupMember.is_admin.label("is_admin"),
+            func.coalesce(GroupMemberBalance.balance, 0).label("my_balance"),
+            func.coalesce(member_count_subq.c.member_count, 0).label("member_count"),
+        )
+        .join(
+            GroupMember,
+            (GroupMember.group_id == Group.id)
+            & (GroupMember.user_id == bindparam("user_id")),
+        )
+        .outerjoin(
+            GroupMemberBalance, GroupMemberBalance.member_id == GroupMember.id
+        )
+        .outerjoin(member_count_subq, member_count_subq.c.group_id == Group.id)
+        .where(Group.is_deleted == False)
+        .order_by(Group.created_at.desc())
+    )
+
+
+def _analytics_select():
+    my_months = (
+        select(
+            UserMonthlySpend.group_id.label("group_id"),
+            UserMonthlySpend.month.label("month"),
+            UserMonthlySpend.share.label("amount"),
+        )
+        .where(
+            UserMonthlySpend.user_id == bindparam("user_id"),
+            UserMonthlySpend.share != 0,
+        )
+        .cte("my_months")
+    )
+
+    rollup = (
+        select(
+            my_months.c.group_id,
+            my_months.c.month,
+            func.sum(my_months.c.amount).label("total"),
+            func.grouping(my_months.c.group_id).label("all_groups"),
+            func.grouping(my_months.c.month).label("all_months"),
+        )
+        .group_by(
+            func.grouping_sets(
+                tuple_(),
+                tuple_(my_months.c.group_id),
+                tuple_(my_months.c.month),
+            )
+        )
+        .cte("rollup")
+    )
+
+    total_paid = (
+        select(func.coalesce(func.sum(UserMonthlySpend.paid), 0))
+        .where(UserMonthlySpend.user_id == bindparam("user_id"))
+        .scalar_subquery()
+    )
+
+    active_groups = (
+        select(func.count(GroupMember.id))
+        .join(Group, Group.id == GroupMember.group_id)
+        .where(GroupMember.user_id == bindparam("user_id"), Group.is_deleted == False)
+        .scalar_subquery()
+    )
+
+    return (
+        select(
+            rollup.c.group_id,
+            Group.name,
+            rollup.c.month,
+            rollup.c.total,
+            rollup.c.all_groups,
+            rollup.c.all_months,
+            (
+                rollup.c.month == cast(func.date_trunc("month", func.now()), Date)
+            ).label("is_current"),
+            total_paid.label("total_paid"),
+            active_groups.label("active_groups"),
+        )
+        .select_from(rollup)
+        .outerjoin(Group, Group.id == rollup.c.group_id)
+    )
+
+
+GROUP_DETAIL_Q = _group_detail_select()
+USER_GROUPS_Q = _user_groups_select()
+ANALYTICS_Q = _analytics_select()
+
+GROUP_MEMBERS_Q = (
+    select(GroupMember, User)
+    .outerjoin(User, User.id == GroupMember.user_id)
+    .where(GroupMember.group_id == bindparam("group_id"))
+)
+
+WEEKLY_ACTIVITY_Q = (
+    select(
+        func.date(Expense.created_at).label("day"),
+        func.coalesce(func.sum(ExpenseSplit.amount), 0).label("amount"),
+    )
+    .join(Expense, Expense.id == ExpenseSplit.expense_id)
+    .where(
+        Expense.group_id == bindparam("group_id"),
+        Expense.is_deleted == False,
+        # Typed so a plain date compares against the timestamptz column
+        Expense.created_at >= bindparam("since", type_=Date),
+        ExpenseSplit.member_id == bindparam("member_id"),
+    )
+    .group_by(func.date(Expense.created_at))
+)
+
+
 # working fine
 async def create_group(db: AsyncSession, name: str, creator_id: int):
     group = Group(
@@ -65,119 +266,94 @@ async def delete_group(
             detail="Group has unsettled balances. Please settle before deleting.",
         )
 
-    group.is_deleted = True
-
-    await db.execute(
+    # Hide the live expenses and back out exactly the rows this statement
+    # flipped, so nothing a concurrent delete_expense hides is backed out
+    # twice: whoever flips a row first wins, the other waits and skips it.
+    # The group row comes last, the lock order the expense writers use
+    # (expenses, balances, group).
+    hidden = await db.scalars(
         update(Expense)
         .where(
             Expense.group_id == group_id,
             Expense.is_deleted == False,
         )
         .values(is_deleted=True)
+        .returning(Expense.id)
+        .execution_options(synchronize_session=False)
     )
+    await apply_expenses(db, hidden.all(), sign=-1)
+
+    group.is_deleted = True
+    group.version = Group.version + 1
 
     await db.commit()
 
+    broker.publish(group_id, {"type": "group_deleted", "group_id": group_id})
+
     return {"status": "deleted"}
 
 
+# working fine
+async def get_group_version(db: AsyncSession, group_id: int, user_id: int):
+    """
+    Version of a live group the user belongs to, or None so the caller
+    falls through to the full handler and its 403/404.
+    """
+    return await db.scalar(
+        GROUP_VERSION_Q, {"group_id": group_id, "user_id": user_id}
+    )
+
+
+# working fine
+async def get_user_groups_version(db: AsyncSession, user_id: int):
+    """
+    Fingerprint of all live groups the user belongs to. Versions only grow,
+    so the sum moves on any write; count and max id catch joins and deletes.
+    """
+    row = (await db.execute(USER_GROUPS_VERSION_Q, {"user_id": user_id})).one()
+    return tuple(row)
+
+
 # working fine
 async def get_group_by_id(
     db: AsyncSession,
     group_id: int,
     user_id: int,
 ):
-    await ensure_active_group_member(db, user_id, group_id)
-
-    # -----------------------------
-    # Current member + admin flag
-    # -----------------------------
-    res = await db.execute(
-        select(GroupMember.id, GroupMember.is_admin).where(
-            GroupMember.group_id == group_id,
-            GroupMember.user_id == user_id,
-        )
-    )
+    """
+    Group header for the detail page in a single round trip. Membership,
+    admin flag, ledger balance and member count are resolved as CTEs
+    joined onto the group row.
+    """
 
-    row = res.first()
+    row = (
+        await db.execute(GROUP_DETAIL_Q, {"group_id": group_id, "user_id": user_id})
+    ).first()
 
     if not row:
-        raise HTTPException(400, "User is not a member of the group")
-
-    current_member_id, is_admin = row
-
-    # -----------------------------
-    # Total spent in group
-    # -----------------------------
-    total_spent = (
-        await db.execute(
-            select(func.coalesce(func.sum(Expense.amount), 0)).where(
-                Expense.group_id == group_id,
-                Expense.is_deleted == False,
-            )
-        )
-    ).scalar()
-
-    # -----------------------------
-    # My balance (group-scoped)
-    # -----------------------------
-    my_balance = (
-        await db.execute(
-            select(
-                func.coalesce(
-                    func.sum(
-                        case(
-                            (
-                                Expense.paid_by == current_member_id,
-                                Expense.amount - ExpenseSplit.amount,
-                            ),
-                            else_=-ExpenseSplit.amount,
-                        )
-                    ),
-                    0,
-                )
-            )
-            .select_from(ExpenseSplit)
-            .join(Expense, Expense.id == ExpenseSplit.expense_id)
-            .where(
-                Expense.group_id == group_id,
-                Expense.is_deleted == False,
-                ExpenseSplit.member_id == current_member_id,
-            )
+        raise HTTPException(
+            status_code=404,
+            detail="Group not found or has been deleted",
         )
-    ).scalar()
 
-    # -----------------------------
-    # Member count
-    # -----------------------------
-    member_count = (
-        await db.execute(
-            select(func.count(GroupMember.id)).where(GroupMember.group_id == group_id)
+    if row.member_id is None:
+        raise HTTPException(
+            status_code=403,
+            detail="Unauthorized access",
         )
-    ).scalar()
-
-    # -----------------------------
-    # Group
-    # -----------------------------
-    group = (
-        await db.execute(select(Group).where(Group.id == group_id))
-    ).scalar_one_or_none()
-
-    if not group:
-        raise HTTPException(404, "Group doesn't exist")
 
     # -----------------------------
     # Response
     # -----------------------------
     return {
-        "id": group.id,
-        "name": group.name,
-        "created_by": group.created_by,
-        "created_at": group.created_at,
-        "total_spent": float(total_spent),
-        "my_balance": float(my_balance),
-        "member_count": member_count,
-        "is_admin": is_admin,
+        "id": row.id,
+        "name": row.name,
+        "created_by": row.created_by,
+        "created_at": row.created_at,
+        "total_spent": float(row.total_spent),
+        "my_balance": float(row.my_balance),
+        "member_count": row.member_count,
+        "is_admin": row.is_admin,
     }
 
 
@@ -188,7 +364,7 @@ async def add_member(
     data: GroupMemberIn,
     creator_id: int,
 ):
-    group = await db.scalar(select(Group).where(Group.id == group_id))
+    group = await db.scalar(GROUP_Q, {"group_id": group_id})
 
     if not group:
         raise HTTPException(404, "Group doesn't exist")
@@ -227,9 +403,19 @@ async def add_member(
     )
 
     db.add(member)
+    group.version = Group.version + 1
     await db.commit()
     await db.refresh(member)
 
+    broker.publish(
+        group_id,
+        {
+            "type": "member_added",
+            "group_id": group_id,
+            "member": {"id": member.id, "name": member.name},
+        },
+    )
+
     return member
 
 
@@ -248,24 +434,12 @@ async def weekly_activity(
 
     seven_days_ago = today - timedelta(days=6)
 
-    q = (
-        select(
-            func.date(Expense.created_at).label("day"),
-            func.coalesce(func.sum(ExpenseSplit.amount), 0).label("amount"),
-        )
-        .join(Expense, Expense.id == ExpenseSplit.expense_id)
-        .where(
-            Expense.group_id == group_id,
-            Expense.is_deleted == False,
-            Expense.created_at >= seven_days_ago,
-            ExpenseSplit.member_id == member_id,
-        )
-        .group_by(func.date(Expense.created_at))
+    res = await db.execute(
+        WEEKLY_ACTIVITY_Q,
+        {"group_id": group_id, "member_id": member_id, "since": seven_days_ago},
     )
 
-    res = await db.execute(q)
-
-    db_data = {row.day: float(Decimal(str(row.amount))) for row in res.all()}
+    db_data = {row.day: float(row.amount) for row in res.all()}
 
     # Fill missing days with 0
     daily = []
@@ -284,60 +458,7 @@ async def list_group_for_user(db: AsyncSession, user_id: int):
     - is_admin
     """
 
-    member_count_subq = (
-        select(
-            GroupMember.group_id,
-            func.count(GroupMember.id).label("member_count"),
-        )
-        .group_by(GroupMember.group_id)
-        .subquery()
-    )
-
-    balance_subq = (
-        select(
-            Expense.group_id.label("group_id"),
-            func.coalesce(
-                func.sum(
-                    case(
-                        (
-                            Expense.paid_by == GroupMember.id,
-                            Expense.amount - ExpenseSplit.amount,
-                        ),
-                        else_=-ExpenseSplit.amount,
-                    )
-                ),
-                0,
-            ).label("my_balance"),
-        )
-        .select_from(ExpenseSplit)
-        .join(Expense, Expense.id == ExpenseSplit.expense_id)
-        .join(GroupMember, GroupMember.id == ExpenseSplit.member_id)
-        .where(
-            GroupMember.user_id == user_id,
-            Expense.is_deleted == False,
-        )
-        .group_by(Expense.group_id)
-        .subquery()
-    )
-
-    query = (
-        select(
-            Group,
-            GroupMember.is_admin.label("is_admin"),
-            func.coalesce(balance_subq.c.my_balance, 0).label("my_balance"),
-            func.coalesce(member_count_subq.c.member_count, 0).label("member_count"),
-        )
-        .join(
-            GroupMember,
-            (GroupMember.group_id == Group.id) & (GroupMember.user_id == user_id),
-        )
-        .outerjoin(balance_subq, balance_subq.c.group_id == Group.id)
-        .outerjoin(member_count_subq, member_count_subq.c.group_id == Group.id)
-        .where(Group.is_deleted == False)
-        .order_by(Group.created_at.desc())
-    )
-
-    result = await db.execute(query)
+    result = await db.execute(USER_GROUPS_Q, {"user_id": user_id})
 
     groups = []
     for group, is_admin, my_balance, member_count in result.all():
@@ -360,13 +481,7 @@ async def list_group_for_user(db: AsyncSession, user_id: int):
 async def list_group_members(db: AsyncSession, user_id: int, group_id: int):
     await ensure_active_group_member(db, user_id, group_id)
 
-    q = (
-        select(GroupMember, User)
-        .outerjoin(User, User.id == GroupMember.user_id)
-        .where(GroupMember.group_id == group_id)
-    )
-
-    result = await db.execute(q)
+    result = await db.execute(GROUP_MEMBERS_Q, {"group_id": group_id})
 
     members = []
     for gm, user in result.all():
@@ -388,8 +503,7 @@ async def list_group_members(db: AsyncSession, user_id: int, group_id: int):
 async def edit_group(
     db: AsyncSession, group_id: int, user_id: int, data: UpdateGroupName
 ):
-    q = select(Group).where(Group.id == group_id)
-    res = await db.execute(q)
+    res = await db.execute(GROUP_Q, {"group_id": group_id})
     group = res.scalar_one_or_none()
 
     if not group:
@@ -400,119 +514,71 @@ async def edit_group(
 
     if data.name:
         group.name = data.name
+        group.version = Group.version + 1
 
     await db.commit()
     await db.refresh(group)
+
+    if data.name:
+        broker.publish(
+            group_id,
+            {"type": "group_renamed", "group_id": group_id, "name": group.name},
+        )
+
     return {"message": "Group updated successfully"}
 
 
 # working fine
 async def group_analytics_service(db: AsyncSession, user_id: int):
-    now = datetime.now()
-    first_of_month = datetime(now.year, now.month, 1)
-
-    # 1. Current Month Total (Your Share)
-    mtd_stmt = (
-        select(func.sum(ExpenseSplit.amount))
-        .join(Expense, ExpenseSplit.expense_id == Expense.id)
-        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Expense.created_at >= first_of_month)
-        .filter(Expense.is_deleted == False)
-    )
-    mtd_total = (await db.execute(mtd_stmt)).scalar() or Decimal("0.00")
-
-    # 2. Lifetime Total
-    lifetime_stmt = (
-        select(func.sum(ExpenseSplit.amount))
-        .join(Expense, ExpenseSplit.expense_id == Expense.id)
-        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Expense.is_deleted == False)
-    )
-    lifetime_total = (await db.execute(lifetime_stmt)).scalar() or Decimal("0.00")
-
-    # 3. Average Monthly Expense
-    # Count unique months where user had expenses to get a real average
-    months_count_stmt = (
-        select(
-            func.count(
-                func.distinct(
-                    extract("year", Expense.created_at) * 100
-                    + extract("month", Expense.created_at)
-                )
-            )
-        )
-        .join(ExpenseSplit, ExpenseSplit.expense_id == Expense.id)
-        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Expense.is_deleted == False)
-    )
-    total_months = (await db.execute(months_count_stmt)).scalar() or 1
+    """
+    Dashboard analytics in one statement over the user_monthly_spend
+    rollup: lifetime / per group / per month via GROUPING SETS, with total
+    paid and active group count as scalar subqueries.
+    """
+    rows = (await db.execute(ANALYTICS_Q, {"user_id": user_id})).all()
+
+    lifetime_total = Decimal("0.00")
+    mtd_total = Decimal("0.00")
+    total_paid = Decimal("0.00")
+    active_groups = 0
+    per_group = []
+    per_month = []
+
+    for row in rows:
+        total_paid = row.total_paid
+        active_groups = row.active_groups
+
+        if row.all_groups and row.all_months:
+            # 1. Lifetime Total (grand total row)
+            lifetime_total = row.total or Decimal("0.00")
+        elif row.all_months:
+            per_group.append((row.total, row.name))
+        else:
+            per_month.append((row.total, row.month))
+            # 2. Current Month Total (Your Share)
+            if row.is_current:
+                mtd_total = row.total
+
+    # 3. Average Monthly Expense over months that had expenses
+    total_months = len(per_month) or 1
     avg_monthly = lifetime_total / Decimal(total_months)
 
     # 4. Net Balances (Owed To You vs You Owe)
-    # We need: (Sum of expenses PAID by you) - (Sum of your SPLITS)
-    # Paid by you
-    paid_stmt = (
-        select(func.sum(Expense.amount))
-        .join(GroupMember, Expense.paid_by == GroupMember.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Expense.is_deleted == False)
-    )
-    total_paid = (await db.execute(paid_stmt)).scalar() or Decimal("0.00")
-
     net_balance = total_paid - lifetime_total
     owed_to_you = net_balance if net_balance > 0 else Decimal("0.00")
     you_owe = abs(net_balance) if net_balance < 0 else Decimal("0.00")
 
-    # 5. Total Active Groups
-    groups_count_stmt = (
-        select(func.count(GroupMember.id))
-        .join(Group, GroupMember.group_id == Group.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Group.is_deleted == False)
-    )
-    active_groups = (await db.execute(groups_count_stmt)).scalar() or 0
-
-    # 6. Top-3 Expense Groups
-    top_groups_stmt = (
-        select(Group.name, func.sum(ExpenseSplit.amount).label("total"))
-        .join(Expense, ExpenseSplit.expense_id == Expense.id)
-        .join(Group, Expense.group_id == Group.id)
-        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Expense.is_deleted == False)
-        .group_by(Group.id, Group.name)
-        .order_by(desc("total"))
-        .limit(3)
-    )
+    # 5. Top-3 Expense Groups
+    per_group.sort(key=lambda r: r[0], reverse=True)
     top_groups = [
-        {"name": row[0], "amount": float(row[1])}
-        for row in (await db.execute(top_groups_stmt)).all()
+        {"name": name, "amount": float(total)} for total, name in per_group[:3]
     ]
 
-    # 7. Top-3 Months
-    top_months_stmt = (
-        select(
-            extract("year", Expense.created_at).label("year"),
-            extract("month", Expense.created_at).label("month"),
-            func.sum(ExpenseSplit.amount).label("total"),
-        )
-        .join(Expense, ExpenseSplit.expense_id == Expense.id)
-        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
-        .filter(GroupMember.user_id == user_id)
-        .filter(Expense.is_deleted == False)
-        .group_by("year", "month")
-        .order_by(desc("total"))
-        .limit(3)
-    )
+    # 6. Top-3 Months
+    per_month.sort(key=lambda r: r[0], reverse=True)
     top_months = [
-        {
-            "period": datetime(int(row[0]), int(row[1]), 1).strftime("%b %Y"),
-            "amount": float(row[2]),
-        }
-        for row in (await db.execute(top_months_stmt)).all()
+        {"period": period.strftime("%b %Y"), "amount": float(total)}
+        for total, period in per_month[:3]
     ]
 
     return {
@@ -525,3 +591,15 @@ async def group_analytics_service(db: AsyncSession, user_id: int):
         "top_groups": top_groups,
         "top_months": top_months,
     }
+
+
+# working fine
+async def group_events(db: AsyncSession, group_id: int, user_id: int):
+    """
+    Change feed for a group. Checks membership, then hands the session's
+    connection back to the pool since the stream can stay open for hours.
+    """
+    await ensure_active_group_member(db, user_id, group_id)
+    await db.close()
+
+    return stream_group_events(group_id)
@@ -0,0 +1,261 @@
+from typing import Iterable, Optional, Union
+from sqlalchemy import (
+    ARRAY,
+    Integer,
+    any_,
+    bindparam,
+    select,
+    update,
+    delete,
+    func,
+    union_all,
+    text,
+    cast,
+    literal_column,
+    Date,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql import Select
+from app.models.expense import Expense
+from app.models.expense_split import ExpenseSplit
+from app.models.group import Group
+from app.models.group_member import GroupMember
+from app.models.group_member_balance import GroupMemberBalance
+from app.models.user_monthly_spend import UserMonthlySpend
+
+ExpenseIds = Union[Iterable[int], Select]
+
+
+def _expense_id_filter(expense_ids: ExpenseIds):
+    if isinstance(expense_ids, Select):
+        return Expense.id.in_(expense_ids)
+    # One array parameter instead of one per id: asyncpg caps a statement
+    # at 32767 arguments, well below an import's row limit
+    ids = bindparam("expense_ids", list(expense_ids), type_=ARRAY(Integer))
+    return Expense.id == any_(ids)
+
+
+def _member_deltas(expense_filter):
+    """
+    One row per (member, group) with paid - owed for the selected expenses.
+    """
+    paid = select(
+        Expense.paid_by.label("member_id"),
+        Expense.group_id.label("group_id"),
+        Expense.amount.label("delta"),
+    ).where(expense_filter)
+
+    owed = (
+        select(
+            ExpenseSplit.member_id.label("member_id"),
+            Expense.group_id.label("group_id"),
+            (-ExpenseSplit.amount).label("delta"),
+        )
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .where(expense_filter)
+    )
+
+    return union_all(paid, owed).subquery()
+
+
+def _monthly_deltas(expense_filter):
+    """
+    One row per (user, group, month) with the user's split share and amount
+    paid for the selected expenses. Members without a user are skipped.
+    """
+    # Cast to date so the month stays in the session's time zone
+    month = cast(func.date_trunc("month", Expense.created_at), Date)
+
+    shares = (
+        select(
+            GroupMember.user_id.label("user_id"),
+            Expense.group_id.label("group_id"),
+            month.label("month"),
+            ExpenseSplit.amount.label("share"),
+            literal_column("0").label("paid"),
+        )
+        .select_from(ExpenseSplit)
+        .join(Expense, Expense.id == ExpenseSplit.expense_id)
+        .join(GroupMember, GroupMember.id == ExpenseSplit.member_id)
+        .where(expense_filter, GroupMember.user_id.isnot(None))
+    )
+
+    paid = (
+        select(
+            GroupMember.user_id.label("user_id"),
+            Expense.group_id.label("group_id"),
+            month.label("month"),
+            literal_column("0").label("share"),
+            Expense.amount.label("paid"),
+        )
+        .join(GroupMember, GroupMember.id == Expense.paid_by)
+        .where(expense_filter, GroupMember.user_id.isnot(None))
+    )
+
+    return union_all(shares, paid).subquery()
+
+
+async def _apply_monthly_spend(db: AsyncSession, expense_filter, sign: int):
+    deltas = _monthly_deltas(expense_filter)
+
+    share = func.sum(deltas.c.share)
+    paid = func.sum(deltas.c.paid)
+    if sign < 0:
+        share, paid = -share, -paid
+
+    keys = (deltas.c.user_id, deltas.c.group_id, deltas.c.month)
+    rows = (
+        select(*keys, share.label("share"), paid.label("paid"))
+        .group_by(*keys)
+        # Stable lock order across concurrent writers
+        .order_by(*keys)
+    )
+
+    stmt = insert(UserMonthlySpend).from_select(
+        ["user_id", "group_id", "month", "share", "paid"], rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[
+            UserMonthlySpend.user_id,
+            UserMonthlySpend.group_id,
+            UserMonthlySpend.month,
+        ],
+        set_={
+            "share": UserMonthlySpend.share + stmt.excluded.share,
+            "paid": UserMonthlySpend.paid + stmt.excluded.paid,
+        },
+    )
+    await db.execute(stmt)
+
+
+# working fine
+async def apply_expenses(db: AsyncSession, expense_ids: ExpenseIds, sign: int = 1):
+    """
+    Folds expenses into the balance ledger, group totals and the monthly
+    spend rollup (sign=1), or backs them out (sign=-1), bumping the
+    version of every group touched. Rows must already be flushed; the caller
+    owns the commit so the ledger moves in the same transaction.
+    """
+    if not isinstance(expense_ids, Select):
+        expense_ids = list(expense_ids)
+        if not expense_ids:
+            return
+
+    expense_filter = _expense_id_filter(expense_ids)
+    deltas = _member_deltas(expense_filter)
+
+    balance = func.sum(deltas.c.delta)
+    if sign < 0:
+        balance = -balance
+
+    rows = (
+        select(
+            deltas.c.member_id,
+            deltas.c.group_id,
+            balance.label("balance"),
+        )
+        .group_by(deltas.c.member_id, deltas.c.group_id)
+        # Stable lock order across concurrent writers
+        .order_by(deltas.c.member_id)
+    )
+
+    stmt = insert(GroupMemberBalance).from_select(
+        ["member_id", "group_id", "balance"], rows
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[GroupMemberBalance.member_id],
+        set_={"balance": GroupMemberBalance.balance + stmt.excluded.balance},
+    )
+    await db.execute(stmt)
+
+    amount = func.sum(Expense.amount)
+    if sign < 0:
+        amount = -amount
+
+    totals = (
+        select(
+            Expense.group_id.label("group_id"),
+            amount.label("amount"),
+        )
+        .where(expense_filter)
+        .group_by(Expense.group_id)
+        .subquery()
+    )
+
+    await db.execute(
+        update(Group)
+        .where(Group.id == totals.c.group_id)
+        .values(
+            total_spent=Group.total_spent + totals.c.amount,
+            version=Group.version + 1,
+        )
+    )
+
+    await _apply_monthly_spend(db, expense_filter, sign)
+
+
+# working fine
+async def rebuild_balances(db: AsyncSession, group_id: Optional[int] = None):
+    """
+    Recomputes the ledger and total_spent from the expense tables.
+    Used for backfills and to repair drift; safe to run online since
+    concurrent expense writers queue behind the table lock.
+    """
+    await db.execute(
+        text("LOCK TABLE group_member_balances IN SHARE ROW EXCLUSIVE MODE")
+    )
+
+    expense_filter = Expense.is_deleted == False
+    clear = delete(GroupMemberBalance)
+    if group_id is not None:
+        expense_filter = expense_filter & (Expense.group_id == group_id)
+        clear = clear.where(GroupMemberBalance.group_id == group_id)
+
+    await db.execute(clear)
+
+    deltas = _member_deltas(expense_filter)
+    rows = select(
+        deltas.c.member_id,
+        deltas.c.group_id,
+        func.sum(deltas.c.delta).label("balance"),
+    ).group_by(deltas.c.member_id, deltas.c.group_id)
+
+    await db.execute(
+        insert(GroupMemberBalance).from_select(
+            ["member_id", "group_id", "balance"], rows
+        )
+    )
+
+    spent = (
+        select(func.coalesce(func.sum(Expense.amount), 0))
+        .where(Expense.group_id == Group.id, Expense.is_deleted == False)
+        .scalar_subquery()
+    )
+    totals = update(Group).values(total_spent=spent, version=Group.version + 1)
+    if group_id is not None:
+        totals = totals.where(Group.id == group_id)
+
+    await db.execute(totals)
+    await db.commit()
+
+
+# working fine
+async def rebuild_monthly_spend(db: AsyncSession, group_id: Optional[int] = None):
+    """
+    Recomputes user_monthly_spend from the expense tables, for one group
+    or everything. Locks the rollup the same way rebuild_balances does.
+    """
+    await db.execute(
+        text("LOCK TABLE user_monthly_spend IN SHARE ROW EXCLUSIVE MODE")
+    )
+
+    expense_filter = Expense.is_deleted == False
+    clear = delete(UserMonthlySpend)
+    if group_id is not None:
+        expense_filter = expense_filter & (Expense.group_id == group_id)
+        clear = clear.where(UserMonthlySpend.group_id == group_id)
+
+    await db.execute(clear)
+    await _apply_monthly_spend(db, expense_filter, sign=1)
+    await db.commit()
@@ -1,65 +1,76 @@
+import asyncio
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from app.models.expense import Expense
+from sqlalchemy import bindparam, select, func
 from app.models.group import Group
 from app.models.group_member import GroupMember
-from collections import defaultdict
-from decimal import Decimal
-from sqlalchemy.orm import selectinload
+from app.models.group_member_balance import GroupMemberBalance
+from app.core.money import Money
 from typing import Dict
-from app.core.utils import simplify_debts
+from app.core.settlement import settle_many
 
 
-# working fine
-async def admin_group_settlements(db: AsyncSession, user_id: int):
-    # 1. Fetch all groups where this user is an admin
-    # We load members, expenses, and splits in one go to avoid N+1 issues
-    admin_groups_query = (
-        select(Group)
-        .join(GroupMember, Group.id == GroupMember.group_id)
-        .filter(GroupMember.user_id == user_id, GroupMember.is_admin == True)
-        .filter(Group.is_deleted == False)
-        .options(
-            selectinload(Group.members),
-            selectinload(Group.members).selectinload(
-                GroupMember.group
-            ),  # To keep relations warm
-            selectinload(Group.members)
-            .selectinload(GroupMember.group)
-            .selectinload(Group.members),
+def _admin_settlement_rows_select():
+    """
+    Every member of every group the :user_id administers, with the
+    member's net balance from the ledger.
+    """
+    admin_groups = (
+        select(GroupMember.group_id)
+        .join(Group, Group.id == GroupMember.group_id)
+        .where(
+            GroupMember.user_id == bindparam("user_id"),
+            GroupMember.is_admin == True,
+            Group.is_deleted == False,
+        )
+        .distinct()
+        .cte("admin_groups")
+    )
+
+    return (
+        select(
+            Group.id.label("group_id"),
+            Group.name.label("group_name"),
+            GroupMember.id.label("member_id"),
+            GroupMember.name.label("member_name"),
+            func.coalesce(GroupMemberBalance.balance, 0).label("balance"),
         )
+        .join(admin_groups, admin_groups.c.group_id == Group.id)
+        .join(GroupMember, GroupMember.group_id == Group.id)
+        .outerjoin(GroupMemberBalance, GroupMemberBalance.member_id == GroupMember.id)
+        .order_by(Group.id, GroupMember.id)
     )
 
-    result = await db.execute(admin_groups_query)
-    groups = result.scalars().all()
 
-    response_data = []
+ADMIN_SETTLEMENT_ROWS_Q = _admin_settlement_rows_select()
 
-    for group in groups:
-        # We need to calculate net balance for every member in THIS group
-        # net_balance = (Total amount paid by member) - (Total share of expenses for member)
-        member_balances: Dict[int, Decimal] = defaultdict(lambda: Decimal("0.00"))
-        member_names: Dict[int, str] = {m.id: m.name for m in group.members}
 
-        # Fetch all expenses for this group
-        expenses_query = (
-            select(Expense)
-            .filter(Expense.group_id == group.id, Expense.is_deleted == False)
-            .options(selectinload(Expense.splits))
+# working fine
+async def admin_group_settlements(db: AsyncSession, user_id: int):
+    # 1. Every member of every group this user administers, with the
+    # member's net balance from the ledger - one round trip in total
+    result = await db.execute(ADMIN_SETTLEMENT_ROWS_Q, {"user_id": user_id})
+
+    # 2. Bucket rows per group
+    groups: Dict[int, dict] = {}
+    for row in result:
+        group = groups.setdefault(
+            row.group_id,
+            {"name": row.group_name, "names": {}, "balances": {}},
         )
-        exp_result = await db.execute(expenses_query)
-        expenses = exp_result.scalars().all()
+        group["names"][row.member_id] = row.member_name
+        group["balances"][row.member_id] = Money.of(row.balance)
 
-        for exp in expenses:
-            # Payer gets credit
-            member_balances[exp.paid_by] += Decimal(str(exp.amount))
+    # 3. Simplify every group's debts off the event loop, under one time
+    # budget for the whole request
+    settled = await asyncio.to_thread(
+        settle_many, {gid: group["balances"] for gid, group in groups.items()}
+    )
 
-            # Splitters get debited
-            for split in exp.splits:
-                member_balances[split.member_id] -= Decimal(str(split.amount))
+    response_data = []
 
-        # Simplify the debts for this specific group
-        transfers = simplify_debts(member_balances)
+    for group_id, group in groups.items():
+        member_names = group["names"]
+        transfers = settled[group_id]
 
         # Format the output for the UI
         group_settlements = []
@@ -76,9 +87,9 @@ async def admin_group_settlements(db: AsyncSession, user_id: int):
 
         response_data.append(
             {
-                "group_id": group.id,
-                "group_name": group.name,
-                "total_members": len(group.members),
+                "group_id": group_id,
+                "group_name": group["name"],
+                "total_members": len(member_names),
                 "settlements": group_settlements,
             }
         )
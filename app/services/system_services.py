@@ -1,9 +1,23 @@
-from app.db.session import engine
+from app.db.session import engine, read_engine
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
 from app.models.group import Group
 from app.models.expense import Expense
+from app.core.dependencies import user_cache
+from app.core.events import broker
+from app.core.slow_queries import slow_query_log
+from app.core import hashing
+from app.db import replica
+
+COUNTS_Q = select(
+    select(func.count(User.id)).scalar_subquery().label("users"),
+    select(func.count(Group.id)).scalar_subquery().label("groups"),
+    select(func.count(Expense.id))
+    .where(Expense.is_deleted == False)
+    .scalar_subquery()
+    .label("expenses"),
+)
 
 
 # working fine
@@ -22,16 +36,29 @@ async def system_health():
 
 # working fine
 async def system_metrics(db: AsyncSession):
-    users_q = select(func.count(User.id))
-    groups_q = select(func.count(Group.id))
-    expenses_q = select(func.count(Expense.id)).where(Expense.is_deleted == False)
+    counts = (await db.execute(COUNTS_Q)).one()
 
-    users_res = await db.execute(users_q)
-    groups_res = await db.execute(groups_q)
-    expenses_res = await db.execute(expenses_q)
+    return {
+        "users": counts.users,
+        "groups": counts.groups,
+        "expenses": counts.expenses,
+        "user_cache": user_cache.stats(),
+        "group_events": broker.stats(),
+        "pin_hashing": hashing.stats(),
+        "read_replica": replica.stats(),
+        "db_pool": {
+            "primary": engine.pool.stats(),
+            "read": read_engine.pool.stats() if read_engine is not None else None,
+        },
+    }
 
+
+# working fine
+async def slow_query_report(limit: int):
     return {
-        "users": users_res.scalar(),
-        "groups": groups_res.scalar(),
-        "expenses": expenses_res.scalar(),
+        "threshold_ms": slow_query_log.threshold_ms,
+        "capacity": slow_query_log.capacity,
+        "recorded": slow_query_log.recorded,
+        "statements": slow_query_log.aggregate(),
+        "recent": slow_query_log.recent(limit),
     }
@@ -0,0 +1,353 @@
+import asyncio
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional, Sequence
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.config import settings
+from app.core.dependencies import user_cache
+from app.core.metrics import WEBHOOK_EVENTS, WEBHOOK_LAG_SECONDS
+from app.db.session import async_session
+from app.models.user import User
+from app.models.webhook_inbox import WebhookInbox
+
+HANDLED_EVENTS = ("user.created", "user.updated", "user.deleted")
+
+USER_FIELDS = ("email", "name", "avatar_url", "is_active", "deleted_at")
+
+_worker: Optional[asyncio.Task] = None
+_wakeup = asyncio.Event()
+
+
+@dataclass
+class UserChange:
+    """
+    Net effect of one batch's events on a single Clerk user.
+    """
+
+    created: bool = False
+    values: dict = field(default_factory=dict)
+
+
+def _full_name(data: dict) -> str:
+    first = data.get("first_name") or ""
+    last = data.get("last_name") or ""
+    return f"{first} {last}".strip()
+
+
+def _primary_email(data: dict) -> str:
+    primary_email_id = data.get("primary_email_address_id")
+    for e in data.get("email_addresses", []):
+        if e["id"] == primary_email_id:
+            return e["email_address"]
+    raise ValueError("Primary email not found")
+
+
+def _event_values(event_type: str, data: dict) -> dict:
+    if event_type == "user.created":
+        return {
+            "email": _primary_email(data),
+            "name": _full_name(data) or "Splito User",
+            "avatar_url": data.get("image_url"),
+            "is_active": True,
+            "deleted_at": None,
+        }
+
+    if event_type == "user.updated":
+        values = {"avatar_url": data.get("image_url")}
+        email_addresses = data.get("email_addresses", [])
+        if email_addresses:
+            values["email"] = email_addresses[0]["email_address"]
+        if _full_name(data):
+            values["name"] = _full_name(data)
+        return values
+
+    return {"is_active": False, "deleted_at": datetime.now(timezone.utc)}
+
+
+def fold_events(rows: Sequence[WebhookInbox], failed: Dict[int, str]):
+    """
+    Collapses inbox rows (in id order) into one UserChange per Clerk user.
+    Rows that can't be applied are recorded in `failed` and skipped.
+    """
+    changes: Dict[str, UserChange] = {}
+
+    for row in rows:
+        data = row.payload.get("data") or {}
+        try:
+            clerk_user_id = data["id"]
+            values = _event_values(row.event_type, data)
+        except (KeyError, TypeError, ValueError) as e:
+            failed[row.id] = f"{type(e).__name__}: {e}"
+            continue
+
+        change = changes.setdefault(clerk_user_id, UserChange())
+        change.created = change.created or row.event_type == "user.created"
+        change.values.update(values)
+
+    return changes
+
+
+async def _relink_by_email(db: AsyncSession, created: Dict[str, dict]) -> List[str]:
+    # A new Clerk id for an email we already have takes over that row
+    existing = set(
+        (
+            await db.execute(
+                select(User.clerk_user_id).where(User.clerk_user_id.in_(list(created)))
+            )
+        ).scalars()
+    )
+    orphans = {v["email"]: cid for cid, v in created.items() if cid not in existing}
+    if not orphans:
+        return []
+
+    rows = await db.execute(
+        select(User.id, User.email, User.clerk_user_id)
+        .where(User.email.in_(list(orphans)))
+        .order_by(User.id)
+    )
+
+    relinks = {}
+    for user_id, email, previous in rows:
+        if email not in relinks and previous not in created:
+            relinks[email] = (user_id, previous)
+
+    if relinks:
+        await db.execute(
+            update(User),
+            [
+                {"id": user_id, "clerk_user_id": orphans[email]}
+                for email, (user_id, _) in relinks.items()
+            ],
+        )
+    return [previous for _, previous in relinks.values()]
+
+
+async def apply_user_changes(db: AsyncSession, changes: Dict[str, UserChange]):
+    """
+    Applies a folded batch with one upsert for created users and one
+    executemany UPDATE per column set for the rest. Returns the Clerk ids
+    whose cached user must be dropped once the transaction commits.
+    """
+    stale = list(changes)
+
+    created = {cid: c.values for cid, c in changes.items() if c.created}
+    if created:
+        stale += await _relink_by_email(db, created)
+
+        stmt = insert(User).values(
+            [{"clerk_user_id": cid, **values} for cid, values in created.items()]
+        )
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[User.clerk_user_id],
+                set_={
+                    **{name: stmt.excluded[name] for name in USER_FIELDS},
+                    "updated_at": func.now(),
+                },
+            )
+        )
+
+    by_columns = defaultdict(list)
+    for cid, change in changes.items():
+        if not change.created and change.values:
+            by_columns[tuple(sorted(change.values))].append(
+                {
+                    "b_clerk_user_id": cid,
+                    **{f"b_{k}": v for k, v in change.values.items()},
+                }
+            )
+
+    # Core executemany: users missing here were never created, so no-op
+    conn = await db.connection()
+    for columns, params in by_columns.items():
+        stmt = (
+            update(User)
+            .where(User.clerk_user_id == bindparam("b_clerk_user_id"))
+            .values({name: bindparam(f"b_{name}") for name in columns})
+        )
+        await conn.execute(stmt, params)
+
+    return stale
+
+
+async def _claim(db: AsyncSession, limit: int, ids: Optional[List[int]] = None):
+    query = (
+        select(WebhookInbox)
+        .where(WebhookInbox.processed_at.is_(None))
+        .where(WebhookInbox.attempts < settings.WEBHOOK_MAX_ATTEMPTS)
+        .order_by(WebhookInbox.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    )
+    if ids is not None:
+        query = query.where(WebhookInbox.id.in_(ids))
+    return (await db.execute(query)).scalars().all()
+
+
+async def _process(db: AsyncSession, rows: Sequence[WebhookInbox]) -> None:
+    failed: Dict[int, str] = {}
+    stale = await apply_user_changes(db, fold_events(rows, failed))
+
+    applied = [row.id for row in rows if row.id not in failed]
+    if applied:
+        await db.execute(
+            update(WebhookInbox)
+            .where(WebhookInbox.id.in_(applied))
+            .values(processed_at=func.now(), attempts=WebhookInbox.attempts + 1)
+        )
+    for row_id, error in failed.items():
+        # Bad payloads won't get better on retry, park them straight away
+        await db.execute(
+            update(WebhookInbox)
+            .where(WebhookInbox.id == row_id)
+            .values(attempts=settings.WEBHOOK_MAX_ATTEMPTS, last_error=error)
+        )
+
+    await db.commit()
+    user_cache.invalidate(*stale)
+
+    now = datetime.now(timezone.utc)
+    for row in rows:
+        outcome = "failed" if row.id in failed else "applied"
+        WEBHOOK_EVENTS.inc(row.event_type, outcome)
+        if row.received_at and outcome == "applied":
+            WEBHOOK_LAG_SECONDS.observe((now - row.received_at).total_seconds())
+
+
+async def drain_inbox(db: AsyncSession, limit: Optional[int] = None) -> int:
+    """
+    Claims up to `limit` pending events (SKIP LOCKED, so several app
+    instances can drain side by side), applies them in one transaction
+    and marks them processed. Returns how many rows were claimed.
+    """
+    rows = await _claim(db, limit or settings.WEBHOOK_BATCH_SIZE)
+    if not rows:
+        await db.rollback()
+        return 0
+
+    ids = [row.id for row in rows]
+    try:
+        await _process(db, rows)
+        return len(ids)
+    except Exception:
+        await db.rollback()
+
+    # Something in the batch broke it: retry one by one so a single bad
+    # event doesn't hold back the rest
+    for row_id in ids:
+        rows = await _claim(db, 1, [row_id])
+        if not rows:
+            await db.rollback()
+            continue
+
+        event_type = rows[0].event_type
+        try:
+            await _process(db, rows)
+        except Exception as e:
+            await db.rollback()
+            await db.execute(
+                update(WebhookInbox)
+                .where(WebhookInbox.id == row_id)
+                .values(
+                    attempts=WebhookInbox.attempts + 1,
+                    last_error=f"{type(e).__name__}: {e}"[:1000],
+                )
+            )
+            await db.commit()
+            WEBHOOK_EVENTS.inc(event_type, "retry")
+
+    return len(ids)
+
+
+async def purge_inbox(db: AsyncSession) -> int:
+    """
+    Deletes processed events past the retention window. Failed events are
+    kept for inspection.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(
+        days=settings.WEBHOOK_RETENTION_DAYS
+    )
+    result = await db.execute(
+        delete(WebhookInbox)
+        .where(WebhookInbox.processed_at.is_not(None))
+        .where(WebhookInbox.processed_at < cutoff)
+    )
+    await db.commit()
+    return result.rowcount
+
+
+# working fine
+async def enqueue_clerk_event(
+    db: AsyncSession, event_id: str, event_type: str, payload: dict
+) -> bool:
+    """
+    Stores the raw event once per event id. Returns False for a redelivery.
+    """
+    result = await db.execute(
+        insert(WebhookInbox)
+        .values(event_id=event_id, event_type=event_type, payload=payload)
+        .on_conflict_do_nothing(index_elements=[WebhookInbox.event_id])
+        .returning(WebhookInbox.id)
+    )
+    inserted = result.scalar_one_or_none() is not None
+    await db.commit()
+
+    WEBHOOK_EVENTS.inc(event_type, "queued" if inserted else "duplicate")
+    if inserted:
+        _wakeup.set()
+    return inserted
+
+
+async def _inbox_loop():
+    last_purge = 0.0
+
+    while True:
+        # Cleared before draining so a wakeup during the drain isn't lost
+        _wakeup.clear()
+        claimed = 0
+
+        try:
+            async with async_session() as db:
+                claimed = await drain_inbox(db)
+
+                if time.monotonic() - last_purge > 3600:
+                    await purge_inbox(db)
+                    last_purge = time.monotonic()
+        except Exception as e:
+            print(f"Splito : webhook inbox drain failed ({e}) → retrying...")
+
+        # A full batch means there is probably more, go straight back
+        if claimed < settings.WEBHOOK_BATCH_SIZE:
+            try:
+                await asyncio.wait_for(
+                    _wakeup.wait(), timeout=settings.WEBHOOK_POLL_SECONDS
+                )
+            except asyncio.TimeoutError:
+                pass
+
+
+async def start_inbox_worker():
+    """
+    Starts the background task applying queued webhook events. Other app
+    instances may run their own; the claim query keeps them apart.
+    """
+    global _worker
+
+    if _worker is None or _worker.done():
+        _worker = asyncio.create_task(_inbox_loop())
+
+
+async def stop_inbox_worker():
+    global _worker
+
+    if _worker is not None:
+        _worker.cancel()
+        try:
+            await _worker
+        except asyncio.CancelledError:
+            pass
+        _worker = None
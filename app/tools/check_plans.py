@@ -0,0 +1,178 @@
+"""
+Query-plan regression check for the service layer.
+
+Seeds a throwaway schema with app.tools.seed, runs the read services
+against it, captures every SELECT they issue, EXPLAINs it and fails if the
+plan sequentially scans one of the large tables. The schema is dropped
+afterwards; --existing plans against the configured database as it is.
+tests/test_query_plans.py runs the same check under pytest.
+
+    python -m app.tools.check_plans [--users 2000] [--splits 200000]
+                                    [--min-rows 10000] [--existing]
+"""
+import argparse
+import asyncio
+import json
+import sys
+from sqlalchemy import event, select, func, text
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import sessionmaker
+import app.models
+from app.db.session import engine
+from app.models.expense import Expense
+from app.models.group_member import GroupMember
+from app.core.utils import get_group_net_balances, is_group_settled
+from app.services.group_services import (
+    get_group_by_id,
+    list_group_for_user,
+    list_group_members,
+    weekly_activity,
+    group_analytics_service,
+)
+from app.services.expense_services import get_expenses_by_group, get_my_expenses
+from app.services.settlement_service import admin_group_settlements
+from app.tools.seed import scratch_schema, seed_database
+
+LARGE_TABLES = {"expenses", "expense_splits", "group_members", "group_member_balances"}
+
+
+async def _sample_ids(db):
+    """
+    Busiest group and one of its active members.
+    """
+    group_id = await db.scalar(
+        select(Expense.group_id)
+        .where(Expense.is_deleted == False)
+        .group_by(Expense.group_id)
+        .order_by(func.count().desc())
+        .limit(1)
+    )
+    user_id = await db.scalar(
+        select(GroupMember.user_id)
+        .where(GroupMember.group_id == group_id, GroupMember.user_id.isnot(None))
+        .limit(1)
+    )
+    return group_id, user_id
+
+
+def _service_calls(group_id, user_id):
+    return {
+        "get_group_by_id": lambda db: get_group_by_id(db, group_id, user_id),
+        "list_group_for_user": lambda db: list_group_for_user(db, user_id),
+        "list_group_members": lambda db: list_group_members(db, user_id, group_id),
+        "weekly_activity": lambda db: weekly_activity(db, group_id, user_id),
+        "group_analytics_service": lambda db: group_analytics_service(db, user_id),
+        "get_expenses_by_group": lambda db: get_expenses_by_group(
+            db, group_id, user_id, limit=50
+        ),
+        "get_my_expenses": lambda db: get_my_expenses(db, user_id, limit=50),
+        "admin_group_settlements": lambda db: admin_group_settlements(db, user_id),
+        "get_group_net_balances": lambda db: get_group_net_balances(db, group_id),
+        "is_group_settled": lambda db: is_group_settled(db, group_id),
+    }
+
+
+def _seq_scans(node, found):
+    if node.get("Node Type") == "Seq Scan":
+        found.add(node.get("Relation Name"))
+    for child in node.get("Plans", []):
+        _seq_scans(child, found)
+    return found
+
+
+async def check_plans(db_engine: AsyncEngine, min_rows: int = 10_000):
+    """
+    EXPLAINs every SELECT the read services issue on `db_engine`; returns
+    (service, relations, statement) for each plan that seq scans a large
+    table.
+    """
+    sessions = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+
+    async with sessions() as db:
+        group_id, user_id = await _sample_ids(db)
+        if group_id is None or user_id is None:
+            raise RuntimeError("no data to plan against, seed the database first")
+
+        rows = await db.execute(
+            text(
+                "SELECT relname, reltuples FROM pg_class"
+                " WHERE relnamespace = current_schema()::regnamespace"
+                " AND relname = ANY(:names)"
+            ),
+            {"names": list(LARGE_TABLES)},
+        )
+        large = {r.relname for r in rows if r.reltuples >= min_rows}
+
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith(("SELECT", "WITH")):
+            captured.append((statement, parameters))
+
+    failures = []
+    for name, call in _service_calls(group_id, user_id).items():
+        captured.clear()
+        event.listen(db_engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            async with sessions() as db:
+                await call(db)
+        finally:
+            event.remove(db_engine.sync_engine, "before_cursor_execute", capture)
+
+        bad = 0
+        async with db_engine.connect() as conn:
+            for statement, parameters in list(captured):
+                plan = await conn.exec_driver_sql(
+                    f"EXPLAIN (FORMAT JSON) {statement}", parameters
+                )
+                raw = plan.scalar()
+                tree = (json.loads(raw) if isinstance(raw, str) else raw)[0]["Plan"]
+                scans = _seq_scans(tree, set()) & large
+
+                if scans:
+                    bad += 1
+                    failures.append((name, sorted(scans), statement))
+                    print(f"FAIL {name}: seq scan on {', '.join(sorted(scans))}")
+                    print("     " + " ".join(statement.split())[:200])
+
+        if not bad:
+            print(f"ok   {name} ({len(captured)} queries)")
+
+    return failures
+
+
+async def run(args):
+    try:
+        if args.existing:
+            return 1 if await check_plans(engine, args.min_rows) else 0
+
+        async with scratch_schema() as (schema, scratch):
+            await seed_database(args.users, args.splits, schema=schema)
+            return 1 if await check_plans(scratch, args.min_rows) else 0
+    except RuntimeError as e:
+        print(f"Splito : {e}")
+        return 1
+    finally:
+        await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        "--min-rows",
+        type=int,
+        default=10_000,
+        help="only tables at least this large count as failures",
+    )
+    parser.add_argument("--users", type=int, default=2_000)
+    parser.add_argument("--splits", type=int, default=200_000)
+    parser.add_argument(
+        "--existing",
+        action="store_true",
+        help="plan against the configured database instead of a seeded schema",
+    )
+    sys.exit(asyncio.run(run(parser.parse_args())))
+
+
+if __name__ == "__main__":
+    main()
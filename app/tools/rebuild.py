@@ -0,0 +1,35 @@
+"""
+Rebuilds derived tables from the source expense data.
+
+    python -m app.tools.rebuild balances [--group-id ID]
+    python -m app.tools.rebuild monthly-spend [--group-id ID]
+"""
+import argparse
+import asyncio
+import app.models
+from app.db.session import async_session, engine
+from app.services.ledger_service import rebuild_balances, rebuild_monthly_spend
+
+
+async def run(args):
+    async with async_session() as db:
+        if args.target == "balances":
+            await rebuild_balances(db, args.group_id)
+        elif args.target == "monthly-spend":
+            await rebuild_monthly_spend(db, args.group_id)
+
+    await engine.dispose()
+
+    scope = f"group {args.group_id}" if args.group_id else "all groups"
+    print(f"Splito : rebuilt {args.target} for {scope}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("target", choices=["balances", "monthly-spend"])
+    parser.add_argument("--group-id", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
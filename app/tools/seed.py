@@ -0,0 +1,472 @@
+"""
+Synthetic data generator for scale testing.
+
+    python -m app.tools.seed [--users 10000] [--splits 10000000] [--seed 42]
+                             [--workers N] [--reset] [--anchor YYYY-MM-DD]
+
+Builds users, groups, group_members, expenses and expense_splits with
+realistic skew (users in 1-50 groups, groups of 2-200 members, power-law
+expense counts per group) and every split strategy, penny-exact. Rows
+go in through COPY: the membership graph from this process, expenses
+and splits in parallel batches from a process pool. The ledger and the
+monthly spend rollup are rebuilt at the end.
+
+Output depends only on --seed, --users, --splits and --anchor (the
+newest possible expense date, default today), not on --workers, so a
+dataset can be regenerated exactly. Refuses to touch a non-empty
+database unless --reset is given, which TRUNCATEs the app tables.
+"""
+import argparse
+import asyncio
+import os
+import random
+import uuid
+from bisect import bisect_right
+from contextlib import asynccontextmanager
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+from time import perf_counter
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+import asyncpg
+from sqlalchemy import text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+import app.models
+from app.core.config import settings
+from app.db.session import Base, engine
+from app.services.ledger_service import rebuild_balances, rebuild_monthly_spend
+
+CLERK_ID_PREFIX = "seed_"
+
+APP_TABLES = (
+    "expense_splits, expenses, user_monthly_spend, group_member_balances, "
+    "group_members, groups, idempotency_keys, users, webhook_inbox"
+)
+
+COPY_COLUMNS = {
+    "users": ["id", "clerk_user_id", "email", "name", "is_active"],
+    "groups": ["id", "name", "created_by", "created_at"],
+    "group_members": ["id", "name", "group_id", "user_id", "email", "is_admin"],
+    "expenses": [
+        "id",
+        "group_id",
+        "paid_by",
+        "amount",
+        "title",
+        "created_at",
+        "strategy",
+        "is_deleted",
+    ],
+    "expense_splits": ["id", "expense_id", "member_id", "amount"],
+}
+
+# Cumulative weights for equal / exact / percentage
+STRATEGIES = ("equal", "exact", "percentage")
+STRATEGY_CUTS = (0.6, 0.85)
+
+MAX_PARTICIPANTS = 12
+
+
+def pg_dsn(schema: Optional[str] = None) -> str:
+    url = make_url(settings.DATABASE_URL).set(drivername="postgresql")
+    if schema:
+        # asyncpg passes unknown DSN parameters on as server settings
+        url = url.update_query_dict({"search_path": schema})
+    return url.render_as_string(hide_password=False)
+
+
+def schema_engine(schema: str) -> AsyncEngine:
+    """
+    Engine on DATABASE_URL whose unqualified table names resolve in `schema`.
+    """
+    return create_async_engine(
+        settings.DATABASE_URL,
+        poolclass=NullPool,
+        connect_args={"server_settings": {"search_path": schema}},
+    )
+
+
+@asynccontextmanager
+async def scratch_schema() -> AsyncIterator[Tuple[str, AsyncEngine]]:
+    """
+    Throwaway schema with the app's tables, dropped on exit, so a dataset
+    can be seeded next to real data without touching it.
+    """
+    schema = f"splito_scratch_{uuid.uuid4().hex[:12]}"
+    scratch = schema_engine(schema)
+
+    async with scratch.begin() as conn:
+        await conn.execute(text(f'CREATE SCHEMA "{schema}"'))
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield schema, scratch
+    finally:
+        async with scratch.begin() as conn:
+            await conn.execute(text(f'DROP SCHEMA "{schema}" CASCADE'))
+        await scratch.dispose()
+
+
+def power_law(rng: random.Random, lo: int, hi: int, alpha: float) -> int:
+    """
+    Pareto-distributed integer clamped to [lo, hi].
+    """
+    return min(hi, int(lo * rng.paretovariate(alpha)))
+
+
+def split_equal(cents: int, n: int) -> List[int]:
+    base, extra = divmod(cents, n)
+    return [base + 1 if i < extra else base for i in range(n)]
+
+
+def split_weighted(cents: int, weights: List[int]) -> List[int]:
+    """
+    Largest-remainder allocation of `cents` by integer weights, so the
+    shares always sum to the total exactly.
+    """
+    total = sum(weights)
+    shares = [cents * w // total for w in weights]
+    short = cents - sum(shares)
+    by_remainder = sorted(
+        range(len(weights)), key=lambda i: (cents * weights[i]) % total, reverse=True
+    )
+    for i in by_remainder[:short]:
+        shares[i] += 1
+    return shares
+
+
+def percentages(rng: random.Random, n: int) -> List[int]:
+    """
+    n positive integer percentages summing to 100.
+    """
+    cuts = sorted(rng.sample(range(1, 100), n - 1))
+    return [b - a for a, b in zip([0] + cuts, cuts + [100])]
+
+
+@dataclass
+class GroupPlan:
+    group_id: int
+    created_at: datetime
+    member_ids: List[int]
+    expenses: int
+    splits: int
+    first_expense_id: int
+    first_split_id: int
+
+
+def _group_rng(seed: int, group_id: int) -> random.Random:
+    # Independent stream per group keeps output identical for any worker count
+    return random.Random(f"{seed}:{group_id}")
+
+
+def _participant_counts(rng: random.Random, expenses: int, size: int) -> List[int]:
+    top = min(size, MAX_PARTICIPANTS)
+    return [rng.randint(2, top) for _ in range(expenses)]
+
+
+def build_memberships(seed: int, n_users: int, anchor: datetime):
+    """
+    Users, groups and group_members as COPY records, plus each group's
+    member ids and creation time for the expense phase.
+    """
+    rng = random.Random(seed)
+    users, groups, members = [], [], []
+    group_members: Dict[int, List[int]] = {}
+    group_created: Dict[int, datetime] = {}
+
+    quota = {}
+    for uid in range(1, n_users + 1):
+        users.append(
+            (
+                uid,
+                f"{CLERK_ID_PREFIX}{uid}",
+                f"{CLERK_ID_PREFIX}{uid}@example.com",
+                f"Seed User {uid}",
+                True,
+            )
+        )
+        quota[uid] = power_law(rng, 1, 50, 1.6)
+
+    # Users with groups left to join; swap-remove keeps this O(1) per exit
+    available = list(quota)
+    position = {uid: i for i, uid in enumerate(available)}
+
+    def retire(uid):
+        i = position.pop(uid)
+        last = available.pop()
+        if last != uid:
+            available[i] = last
+            position[last] = i
+
+    member_id = 0
+    gid = 0
+    while len(available) >= 2:
+        gid += 1
+        size = min(power_law(rng, 2, 200, 1.3), len(available))
+        group_users = rng.sample(available, size)
+        created_at = anchor - timedelta(days=rng.uniform(0, 730))
+        groups.append((gid, f"seed-{gid}", group_users[0], created_at))
+        group_created[gid] = created_at
+
+        ids = group_members[gid] = []
+        for index, uid in enumerate(group_users):
+            member_id += 1
+            ids.append(member_id)
+            members.append(
+                (
+                    member_id,
+                    f"Seed User {uid}",
+                    gid,
+                    uid,
+                    f"{CLERK_ID_PREFIX}{uid}@example.com",
+                    index == 0,
+                )
+            )
+            quota[uid] -= 1
+            if quota[uid] == 0:
+                retire(uid)
+
+    records = {"users": users, "groups": groups, "group_members": members}
+    return records, group_members, group_created
+
+
+def plan_expenses(
+    seed: int,
+    target_splits: int,
+    group_members: Dict[int, List[int]],
+    group_created: Dict[int, datetime],
+) -> List[GroupPlan]:
+    """
+    Spreads the split target over groups with a power law weighted by
+    group size, and fixes every group's id ranges up front.
+    """
+    rng = random.Random(seed + 1)
+    weights = {
+        gid: min(rng.paretovariate(1.1), 1000.0) * len(ids)
+        for gid, ids in group_members.items()
+    }
+    # Expected splits per expense is the mean participant count
+    expected = sum(
+        w * (2 + min(len(group_members[gid]), MAX_PARTICIPANTS)) / 2
+        for gid, w in weights.items()
+    )
+
+    plans = []
+    next_expense = next_split = 1
+    for gid, ids in group_members.items():
+        expenses = max(1, round(target_splits * weights[gid] / expected))
+        splits = sum(_participant_counts(_group_rng(seed, gid), expenses, len(ids)))
+        plans.append(
+            GroupPlan(
+                gid, group_created[gid], ids, expenses, splits, next_expense, next_split
+            )
+        )
+        next_expense += expenses
+        next_split += splits
+
+    return plans
+
+
+def group_records(seed: int, plan: GroupPlan, anchor: datetime):
+    """
+    Expense and split records for one group. Draws the participant
+    counts first, in the same order plan_expenses did.
+    """
+    rng = _group_rng(seed, plan.group_id)
+    counts = _participant_counts(rng, plan.expenses, len(plan.member_ids))
+    span = anchor - plan.created_at
+
+    expenses, splits = [], []
+    expense_id = plan.first_expense_id
+    split_id = plan.first_split_id
+
+    for k in counts:
+        strategy = STRATEGIES[bisect_right(STRATEGY_CUTS, rng.random())]
+        payer = rng.choice(plan.member_ids)
+        share_with = rng.sample(plan.member_ids, k)
+        cents = max(int(rng.lognormvariate(7.5, 1.2)), 100 * k)
+
+        if strategy == "equal":
+            shares = split_equal(cents, k)
+        elif strategy == "percentage":
+            shares = split_weighted(cents, percentages(rng, k))
+        else:
+            shares = split_weighted(cents, [rng.randint(1, 100) for _ in range(k)])
+
+        expenses.append(
+            (
+                expense_id,
+                plan.group_id,
+                payer,
+                Decimal(cents).scaleb(-2),
+                f"Expense {expense_id}",
+                plan.created_at + span * rng.random(),
+                strategy,
+                False,
+            )
+        )
+        for member, share in zip(share_with, shares):
+            splits.append((split_id, expense_id, member, Decimal(share).scaleb(-2)))
+            split_id += 1
+        expense_id += 1
+
+    return expenses, splits
+
+
+async def _copy_batch(dsn: str, seed: int, plans: List[GroupPlan], anchor) -> int:
+    expenses, splits = [], []
+    for plan in plans:
+        e, s = group_records(seed, plan, anchor)
+        expenses.extend(e)
+        splits.extend(s)
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        async with conn.transaction():
+            await conn.copy_records_to_table(
+                "expenses", records=expenses, columns=COPY_COLUMNS["expenses"]
+            )
+            await conn.copy_records_to_table(
+                "expense_splits", records=splits, columns=COPY_COLUMNS["expense_splits"]
+            )
+    finally:
+        await conn.close()
+
+    return len(splits)
+
+
+def copy_batch(dsn: str, seed: int, plans: List[GroupPlan], anchor) -> int:
+    # Process pool entry point: one event loop and connection per batch
+    return asyncio.run(_copy_batch(dsn, seed, plans, anchor))
+
+
+def batches(plans: List[GroupPlan], batch_splits: int) -> List[List[GroupPlan]]:
+    """
+    Consecutive groups packed into batches of roughly `batch_splits` splits.
+    """
+    out, current, size = [], [], 0
+    for plan in plans:
+        current.append(plan)
+        size += plan.splits
+        if size >= batch_splits:
+            out.append(current)
+            current, size = [], 0
+    if current:
+        out.append(current)
+    return out
+
+
+async def prepare(conn, reset: bool) -> None:
+    if reset:
+        await conn.execute(f"TRUNCATE {APP_TABLES} RESTART IDENTITY CASCADE")
+    elif await conn.fetchval("SELECT EXISTS (SELECT 1 FROM users)"):
+        raise SystemExit("Database is not empty; rerun with --reset")
+
+
+async def seed_database(
+    users: int,
+    splits: int,
+    seed: int = 42,
+    workers: int | None = None,
+    reset: bool = False,
+    anchor: date | None = None,
+    batch_splits: int = 250_000,
+    schema: str | None = None,
+) -> Dict[str, int]:
+    """
+    Generates and loads the dataset (into `schema` instead of the default
+    search path when given); returns row counts per table.
+    """
+    start = perf_counter()
+    anchor = datetime.combine(anchor or date.today(), time(), tzinfo=timezone.utc)
+    dsn = pg_dsn(schema)
+
+    records, group_members, group_created = build_memberships(seed, users, anchor)
+    plans = plan_expenses(seed, splits, group_members, group_created)
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        await prepare(conn, reset)
+        async with conn.transaction():
+            for table, rows in records.items():
+                await conn.copy_records_to_table(
+                    table, records=rows, columns=COPY_COLUMNS[table]
+                )
+    finally:
+        await conn.close()
+
+    print(
+        f"Splito : {len(records['users'])} users, {len(records['groups'])} groups, "
+        f"{len(records['group_members'])} members loaded "
+        f"({perf_counter() - start:.1f}s)"
+    )
+
+    loop = asyncio.get_running_loop()
+    loaded = 0
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        jobs = [
+            loop.run_in_executor(pool, copy_batch, dsn, seed, batch, anchor)
+            for batch in batches(plans, batch_splits)
+        ]
+        for job in asyncio.as_completed(jobs):
+            loaded += await job
+            print(f"Splito : {loaded} splits loaded ({perf_counter() - start:.1f}s)")
+
+    conn = await asyncpg.connect(dsn)
+    try:
+        for table in COPY_COLUMNS:
+            await conn.execute(
+                f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), "
+                f"(SELECT coalesce(max(id), 1) FROM {table}))"
+            )
+        await conn.execute("ANALYZE")
+    finally:
+        await conn.close()
+
+    db_engine = schema_engine(schema) if schema else engine
+    sessions = sessionmaker(db_engine, class_=AsyncSession, expire_on_commit=False)
+    async with sessions() as db:
+        await rebuild_balances(db)
+    async with sessions() as db:
+        await rebuild_monthly_spend(db)
+    await db_engine.dispose()
+
+    counts = {table: len(rows) for table, rows in records.items()}
+    counts["expenses"] = sum(p.expenses for p in plans)
+    counts["expense_splits"] = sum(p.splits for p in plans)
+
+    print(f"Splito : seeded in {perf_counter() - start:.1f}s -> {counts}")
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    parser.add_argument("--splits", type=int, default=10_000_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-splits", type=int, default=250_000)
+    parser.add_argument("--anchor", type=date.fromisoformat, default=None)
+    parser.add_argument("--reset", action="store_true")
+    args = parser.parse_args()
+
+    asyncio.run(
+        seed_database(
+            users=args.users,
+            splits=args.splits,
+            seed=args.seed,
+            workers=args.workers,
+            reset=args.reset,
+            anchor=args.anchor,
+            batch_splits=args.batch_splits,
+        )
+    )
+
+
+if __name__ == "__main__":
+    main()
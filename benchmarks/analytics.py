@@ -0,0 +1,217 @@
+"""
+Dashboard analytics: the original seven-query implementation vs the
+current group_analytics_service, against the configured database.
+
+Seed a large dataset first (the target is ~1M expense_splits), backfill
+the rollup with `python -m app.tools.rebuild monthly-spend`, then:
+
+    python -m benchmarks.analytics [--users 20] [--repeat 5]
+
+Picks the users with the most splits, checks both implementations agree
+and reports median latency per call.
+"""
+import argparse
+import asyncio
+from datetime import datetime
+from decimal import Decimal
+from statistics import median
+from time import perf_counter
+from sqlalchemy import select, func, extract, desc
+from sqlalchemy.ext.asyncio import AsyncSession
+import app.models
+from app.db.session import async_session, engine
+from app.models.expense import Expense
+from app.models.expense_split import ExpenseSplit
+from app.models.group import Group
+from app.models.group_member import GroupMember
+from app.services.group_services import group_analytics_service
+
+
+async def legacy_group_analytics(db: AsyncSession, user_id: int):
+    now = datetime.now()
+    first_of_month = datetime(now.year, now.month, 1)
+
+    # 1. Current Month Total (Your Share)
+    mtd_stmt = (
+        select(func.sum(ExpenseSplit.amount))
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Expense.created_at >= first_of_month)
+        .filter(Expense.is_deleted == False)
+    )
+    mtd_total = (await db.execute(mtd_stmt)).scalar() or Decimal("0.00")
+
+    # 2. Lifetime Total
+    lifetime_stmt = (
+        select(func.sum(ExpenseSplit.amount))
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Expense.is_deleted == False)
+    )
+    lifetime_total = (await db.execute(lifetime_stmt)).scalar() or Decimal("0.00")
+
+    # 3. Average Monthly Expense
+    # Count unique months where user had expenses to get a real average
+    months_count_stmt = (
+        select(
+            func.count(
+                func.distinct(
+                    extract("year", Expense.created_at) * 100
+                    + extract("month", Expense.created_at)
+                )
+            )
+        )
+        .join(ExpenseSplit, ExpenseSplit.expense_id == Expense.id)
+        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Expense.is_deleted == False)
+    )
+    total_months = (await db.execute(months_count_stmt)).scalar() or 1
+    avg_monthly = lifetime_total / Decimal(total_months)
+
+    # 4. Net Balances (Owed To You vs You Owe)
+    # We need: (Sum of expenses PAID by you) - (Sum of your SPLITS)
+    # Paid by you
+    paid_stmt = (
+        select(func.sum(Expense.amount))
+        .join(GroupMember, Expense.paid_by == GroupMember.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Expense.is_deleted == False)
+    )
+    total_paid = (await db.execute(paid_stmt)).scalar() or Decimal("0.00")
+
+    net_balance = total_paid - lifetime_total
+    owed_to_you = net_balance if net_balance > 0 else Decimal("0.00")
+    you_owe = abs(net_balance) if net_balance < 0 else Decimal("0.00")
+
+    # 5. Total Active Groups
+    groups_count_stmt = (
+        select(func.count(GroupMember.id))
+        .join(Group, GroupMember.group_id == Group.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Group.is_deleted == False)
+    )
+    active_groups = (await db.execute(groups_count_stmt)).scalar() or 0
+
+    # 6. Top-3 Expense Groups
+    top_groups_stmt = (
+        select(Group.name, func.sum(ExpenseSplit.amount).label("total"))
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .join(Group, Expense.group_id == Group.id)
+        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Expense.is_deleted == False)
+        .group_by(Group.id, Group.name)
+        .order_by(desc("total"))
+        .limit(3)
+    )
+    top_groups = [
+        {"name": row[0], "amount": float(row[1])}
+        for row in (await db.execute(top_groups_stmt)).all()
+    ]
+
+    # 7. Top-3 Months
+    top_months_stmt = (
+        select(
+            extract("year", Expense.created_at).label("year"),
+            extract("month", Expense.created_at).label("month"),
+            func.sum(ExpenseSplit.amount).label("total"),
+        )
+        .join(Expense, ExpenseSplit.expense_id == Expense.id)
+        .join(GroupMember, ExpenseSplit.member_id == GroupMember.id)
+        .filter(GroupMember.user_id == user_id)
+        .filter(Expense.is_deleted == False)
+        .group_by("year", "month")
+        .order_by(desc("total"))
+        .limit(3)
+    )
+    top_months = [
+        {
+            "period": datetime(int(row[0]), int(row[1]), 1).strftime("%b %Y"),
+            "amount": float(row[2]),
+        }
+        for row in (await db.execute(top_months_stmt)).all()
+    ]
+
+    return {
+        "mtd_total": float(mtd_total),
+        "lifetime_total": float(lifetime_total),
+        "avg_monthly_expense": float(avg_monthly),
+        "owed_to_you": float(owed_to_you),
+        "you_owe": float(you_owe),
+        "total_active_groups": active_groups,
+        "top_groups": top_groups,
+        "top_months": top_months,
+    }
+
+
+async def busiest_users(db, limit: int):
+    res = await db.execute(
+        select(GroupMember.user_id)
+        .join(ExpenseSplit, ExpenseSplit.member_id == GroupMember.id)
+        .where(GroupMember.user_id.isnot(None))
+        .group_by(GroupMember.user_id)
+        .order_by(func.count().desc())
+        .limit(limit)
+    )
+    return [r[0] for r in res]
+
+
+def same(a: dict, b: dict) -> bool:
+    def norm(v):
+        if isinstance(v, float):
+            return round(v, 2)
+        if isinstance(v, list):
+            return sorted(str(norm(x)) for x in v)
+        if isinstance(v, dict):
+            return {k: norm(x) for k, x in v.items()}
+        return v
+
+    return norm(a) == norm(b)
+
+
+async def timed(fn, user_id, repeat):
+    samples = []
+    result = None
+    for _ in range(repeat):
+        async with async_session() as db:
+            start = perf_counter()
+            result = await fn(db, user_id)
+            samples.append((perf_counter() - start) * 1000)
+    return result, median(samples)
+
+
+async def run(args):
+    async with async_session() as db:
+        splits = await db.scalar(select(func.count(ExpenseSplit.id)))
+        users = await busiest_users(db, args.users)
+
+    print(f"expense_splits: {splits}, users: {len(users)}")
+
+    legacy_ms, current_ms = [], []
+    for user_id in users:
+        old, old_ms = await timed(legacy_group_analytics, user_id, args.repeat)
+        new, new_ms = await timed(group_analytics_service, user_id, args.repeat)
+        if not same(old, new):
+            print(f"  user {user_id}: results differ\n    {old}\n    {new}")
+        legacy_ms.append(old_ms)
+        current_ms.append(new_ms)
+
+    await engine.dispose()
+
+    if users:
+        print(f"legacy  median {median(legacy_ms):8.2f} ms  max {max(legacy_ms):8.2f} ms")
+        print(f"current median {median(current_ms):8.2f} ms  max {max(current_ms):8.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--repeat", type=int, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
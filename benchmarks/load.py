@@ -0,0 +1,697 @@
+"""
+End-to-end load benchmark: boots app.main:app under uvicorn against the
+configured Postgres, seeds it, and drives every route with concurrent
+clients.
+
+    python -m benchmarks.load [--reset] [--users 2000] [--splits 200000]
+                              [--clients 16] [--duration 10]
+                              [--only groups.,expenses.]
+
+Point DATABASE_URL (.env or environment) at a scratch database with the
+migrations applied. The dataset comes from app.tools.seed; --reset
+TRUNCATEs every app table and reseeds, otherwise an existing seeded
+dataset is reused.
+
+Auth uses a throwaway RSA key: the server is started with
+CLERK_JWKS_FILE pointing at its public half and tokens are minted
+locally. Queries per request come from the server's Prometheus metrics,
+so it runs as a single worker.
+
+Prints p50/p95/p99 latency, throughput and queries per request for each
+scenario, and writes the run as JSON under benchmarks/results/ so runs
+can be compared across commits.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from time import perf_counter
+from typing import Awaitable, Callable, Dict, List, Tuple
+import asyncpg
+import httpx
+import rsa
+from jose import jwk, jwt
+from app.core.security import CLERK_AUDIENCE, CLERK_ISSUER
+from app.tools.seed import CLERK_ID_PREFIX, pg_dsn, seed_database, split_equal
+
+RESULTS_DIR = Path(__file__).parent / "results"
+KID = "splito-bench"
+
+
+# ---------------------------------------------------------------------------
+# Seeding
+# ---------------------------------------------------------------------------
+
+SEEDED_USERS = CLERK_ID_PREFIX.replace("_", "\\_") + "%"
+
+
+async def seed(args) -> None:
+    conn = await asyncpg.connect(pg_dsn())
+    try:
+        seeded = await conn.fetchval(
+            "SELECT EXISTS (SELECT 1 FROM users WHERE clerk_user_id LIKE $1)",
+            SEEDED_USERS,
+        )
+    finally:
+        await conn.close()
+
+    if seeded and not args.reset:
+        print("Splito : reusing existing seeded dataset")
+        return
+
+    await seed_database(
+        users=args.users, splits=args.splits, seed=args.seed, reset=args.reset
+    )
+
+
+# ---------------------------------------------------------------------------
+# Auth and dataset context
+# ---------------------------------------------------------------------------
+
+
+class TokenMinter:
+    def __init__(self):
+        _, private = rsa.newkeys(2048)
+        self._pem = private.save_pkcs1().decode()
+        self._tokens: Dict[str, str] = {}
+
+    def jwks(self) -> dict:
+        key = jwk.construct(self._pem, "RS256").public_key().to_dict()
+        key = {k: v.decode() if isinstance(v, bytes) else v for k, v in key.items()}
+        return {"keys": [{**key, "kid": KID, "use": "sig"}]}
+
+    def headers(self, clerk_user_id: str) -> dict:
+        token = self._tokens.get(clerk_user_id)
+        if token is None:
+            now = int(time.time())
+            token = self._tokens[clerk_user_id] = jwt.encode(
+                {
+                    "sub": clerk_user_id,
+                    "iss": CLERK_ISSUER,
+                    "aud": CLERK_AUDIENCE,
+                    "iat": now,
+                    "exp": now + 6 * 3600,
+                },
+                self._pem,
+                algorithm="RS256",
+                headers={"kid": KID},
+            )
+        return {"Authorization": f"Bearer {token}"}
+
+
+@dataclass
+class Context:
+    tokens: TokenMinter
+    clerk_ids: Dict[int, str]
+    user_groups: Dict[int, List[int]]
+    admin_groups: Dict[int, List[int]]
+    group_members: Dict[int, List[int]]
+    my_member: Dict[Tuple[int, int], int]
+    pinned: set = field(default_factory=set)
+    members: List[int] = field(default_factory=list)
+    admins: List[int] = field(default_factory=list)
+
+    def pick(self, rng: random.Random, admin: bool = False) -> Tuple[int, int, dict]:
+        """A (user id, group id, auth headers) triple for one request."""
+        uid = rng.choice(self.admins if admin else self.members)
+        pool = self.admin_groups if admin else self.user_groups
+        return uid, rng.choice(pool[uid]), self.tokens.headers(self.clerk_ids[uid])
+
+
+async def load_context(tokens: TokenMinter) -> Context:
+    conn = await asyncpg.connect(pg_dsn())
+    try:
+        rows = await conn.fetch(
+            """
+            SELECT u.id AS user_id, u.clerk_user_id, gm.id AS member_id,
+                   g.id AS group_id, g.created_by
+            FROM users u
+            JOIN group_members gm ON gm.user_id = u.id
+            JOIN groups g ON g.id = gm.group_id AND NOT g.is_deleted
+            WHERE u.clerk_user_id LIKE $1 AND u.is_active
+            """,
+            SEEDED_USERS,
+        )
+        member_rows = await conn.fetch(
+            "SELECT group_id, id FROM group_members WHERE group_id = ANY($1::int[])",
+            list({r["group_id"] for r in rows}),
+        )
+    finally:
+        await conn.close()
+
+    ctx = Context(
+        tokens, {}, defaultdict(list), defaultdict(list), defaultdict(list), {}
+    )
+    for r in rows:
+        ctx.clerk_ids[r["user_id"]] = r["clerk_user_id"]
+        ctx.user_groups[r["user_id"]].append(r["group_id"])
+        ctx.my_member[(r["user_id"], r["group_id"])] = r["member_id"]
+        if r["created_by"] == r["user_id"]:
+            ctx.admin_groups[r["user_id"]].append(r["group_id"])
+    for r in member_rows:
+        ctx.group_members[r["group_id"]].append(r["id"])
+
+    if not ctx.user_groups:
+        raise SystemExit("No seeded users with groups found; rerun with --reset")
+
+    ctx.members = sorted(ctx.user_groups)
+    ctx.admins = sorted(ctx.admin_groups)
+
+    return ctx
+
+
+# ---------------------------------------------------------------------------
+# Scenarios
+# ---------------------------------------------------------------------------
+
+Run = Callable[
+    [httpx.AsyncClient, Context, random.Random], Awaitable[Tuple[float, int]]
+]
+
+
+@dataclass
+class Scenario:
+    name: str
+    method: str
+    # Route template, as labelled in the server's metrics
+    route: str
+    run: Run
+
+
+async def timed(request: Awaitable[httpx.Response]) -> Tuple[float, int]:
+    start = perf_counter()
+    res = await request
+    return perf_counter() - start, res.status_code
+
+
+def get(path: str, admin: bool = False, params: dict | None = None) -> Run:
+    async def run(client, ctx, rng):
+        uid, gid, headers = ctx.pick(rng, admin)
+        url = path.format(gid=gid)
+        return await timed(client.get(url, headers=headers, params=params))
+
+    return run
+
+
+def expense_body(ctx: Context, rng: random.Random, uid: int, gid: int) -> dict:
+    members = ctx.group_members[gid]
+    share_with = rng.sample(members, rng.randint(1, min(len(members), 8)))
+    amount = rng.randint(len(share_with), 5000)
+    shares = split_equal(amount * 100, len(share_with))
+    return {
+        "title": "Load test expense",
+        "amount": amount,
+        "strategy": "equal",
+        "splits": [
+            {"member_id": m, "amount": s / 100} for m, s in zip(share_with, shares)
+        ],
+    }
+
+
+async def add_expense(client, ctx, rng):
+    uid, gid, headers = ctx.pick(rng)
+    body = expense_body(ctx, rng, uid, gid)
+    return await timed(
+        client.post(f"/api/v1/expenses/{gid}/add", json=body, headers=headers)
+    )
+
+
+async def delete_expense(client, ctx, rng):
+    uid, gid, headers = ctx.pick(rng)
+    body = expense_body(ctx, rng, uid, gid)
+    res = await client.post(f"/api/v1/expenses/{gid}/add", json=body, headers=headers)
+    res.raise_for_status()
+    expense_id = res.json()["id"]
+    return await timed(client.delete(f"/api/v1/expenses/{expense_id}", headers=headers))
+
+
+async def import_expenses(client, ctx, rng):
+    uid, gid, headers = ctx.pick(rng)
+    lines = ["title,amount,strategy,paid_by,created_at,splits"]
+    for _ in range(20):
+        body = expense_body(ctx, rng, uid, gid)
+        splits = ";".join(f"{s['member_id']}:{s['amount']}" for s in body["splits"])
+        lines.append(f"Imported,{body['amount']},equal,,,{splits}")
+    return await timed(
+        client.post(
+            f"/api/v1/expenses/{gid}/import",
+            content="\n".join(lines).encode(),
+            headers={**headers, "Content-Type": "text/csv"},
+        )
+    )
+
+
+async def create_group(client, ctx, rng):
+    uid, _, headers = ctx.pick(rng)
+    name = f"bench-load-{uuid.uuid4().hex[:12]}"
+    return await timed(
+        client.post("/api/v1/groups/", json={"name": name}, headers=headers)
+    )
+
+
+async def delete_group(client, ctx, rng):
+    uid, _, headers = ctx.pick(rng)
+    name = f"bench-load-{uuid.uuid4().hex[:12]}"
+    res = await client.post("/api/v1/groups/", json={"name": name}, headers=headers)
+    res.raise_for_status()
+    gid = res.json()["id"]
+    return await timed(client.delete(f"/api/v1/groups/{gid}", headers=headers))
+
+
+async def edit_group(client, ctx, rng):
+    uid, gid, headers = ctx.pick(rng, admin=True)
+    name = f"bench-{gid}-{uuid.uuid4().hex[:6]}"
+    return await timed(
+        client.patch(f"/api/v1/groups/{gid}", json={"name": name}, headers=headers)
+    )
+
+
+async def add_member(client, ctx, rng):
+    uid, gid, headers = ctx.pick(rng, admin=True)
+    guest = uuid.uuid4().hex[:12]
+    body = {"name": f"Guest {guest}", "email": f"guest-{guest}@example.com"}
+    return await timed(
+        client.post(f"/api/v1/groups/{gid}/members", json=body, headers=headers)
+    )
+
+
+async def group_events(client, ctx, rng):
+    # Time to the first SSE frame; the stream is then dropped
+    uid, gid, headers = ctx.pick(rng)
+    start = perf_counter()
+    async with client.stream(
+        "GET", f"/api/v1/groups/{gid}/events", headers=headers
+    ) as res:
+        async for _ in res.aiter_raw():
+            break
+    return perf_counter() - start, res.status_code
+
+
+async def set_pin(client, ctx, rng):
+    uid, _, headers = ctx.pick(rng)
+    ctx.pinned.add(uid)
+    return await timed(
+        client.post(
+            "/api/v1/users/security/set-pin", json={"pin": "1234"}, headers=headers
+        )
+    )
+
+
+async def verify_pin(client, ctx, rng):
+    uid, _, headers = ctx.pick(rng)
+    if uid not in ctx.pinned:
+        await client.post(
+            "/api/v1/users/security/set-pin", json={"pin": "1234"}, headers=headers
+        )
+        ctx.pinned.add(uid)
+    return await timed(
+        client.post(
+            "/api/v1/users/security/verify-pin", json={"pin": "1234"}, headers=headers
+        )
+    )
+
+
+async def deactivate_pin(client, ctx, rng):
+    uid, _, headers = ctx.pick(rng)
+    ctx.pinned.discard(uid)
+    return await timed(
+        client.put("/api/v1/users/security/deactivate-pin", headers=headers)
+    )
+
+
+async def clerk_webhook(client, ctx, rng):
+    uid = rng.choice(ctx.members)
+    clerk_id = ctx.clerk_ids[uid]
+    payload = {
+        "type": "user.updated",
+        "data": {
+            "id": clerk_id,
+            # Same address the seeder gave this user
+            "email_addresses": [{"email_address": f"{clerk_id}@example.com"}],
+            "first_name": "Bench",
+            "last_name": f"User {uid}",
+        },
+    }
+    return await timed(client.post("/api/v1/webhooks/clerk", json=payload))
+
+
+def anonymous(path: str) -> Run:
+    async def run(client, ctx, rng):
+        return await timed(client.get(path))
+
+    return run
+
+
+SCENARIOS = [
+    Scenario("root", "GET", "/", anonymous("/")),
+    Scenario(
+        "system.health",
+        "GET",
+        "/api/v1/system/health",
+        anonymous("/api/v1/system/health"),
+    ),
+    Scenario(
+        "system.health_db",
+        "GET",
+        "/api/v1/system/health/db",
+        anonymous("/api/v1/system/health/db"),
+    ),
+    Scenario(
+        "system.metrics",
+        "GET",
+        "/api/v1/system/metrics",
+        anonymous("/api/v1/system/metrics"),
+    ),
+    Scenario("users.me", "GET", "/api/v1/users/me", get("/api/v1/users/me")),
+    Scenario("groups.list", "GET", "/api/v1/groups/", get("/api/v1/groups/")),
+    Scenario(
+        "groups.analytics",
+        "GET",
+        "/api/v1/groups/analytics",
+        get("/api/v1/groups/analytics"),
+    ),
+    Scenario(
+        "groups.detail", "GET", "/api/v1/groups/{group_id}", get("/api/v1/groups/{gid}")
+    ),
+    Scenario(
+        "groups.weekly_activity",
+        "GET",
+        "/api/v1/groups/{group_id}/weekly-activity",
+        get("/api/v1/groups/{gid}/weekly-activity"),
+    ),
+    Scenario(
+        "groups.members",
+        "GET",
+        "/api/v1/groups/{group_id}/members",
+        get("/api/v1/groups/{gid}/members"),
+    ),
+    Scenario("groups.events", "GET", "/api/v1/groups/{group_id}/events", group_events),
+    Scenario("groups.create", "POST", "/api/v1/groups/", create_group),
+    Scenario("groups.edit", "PATCH", "/api/v1/groups/{group_id}", edit_group),
+    Scenario(
+        "groups.add_member", "POST", "/api/v1/groups/{group_id}/members", add_member
+    ),
+    Scenario("groups.delete", "DELETE", "/api/v1/groups/{group_id}", delete_group),
+    Scenario(
+        "expenses.group_page",
+        "GET",
+        "/api/v1/expenses/{group_id}/all",
+        get("/api/v1/expenses/{gid}/all", params={"limit": 50}),
+    ),
+    Scenario(
+        "expenses.group_all",
+        "GET",
+        "/api/v1/expenses/{group_id}/all",
+        get("/api/v1/expenses/{gid}/all"),
+    ),
+    Scenario(
+        "expenses.mine_page",
+        "GET",
+        "/api/v1/expenses/my-expenses",
+        get("/api/v1/expenses/my-expenses", params={"limit": 50}),
+    ),
+    Scenario("expenses.add", "POST", "/api/v1/expenses/{group_id}/add", add_expense),
+    Scenario(
+        "expenses.delete", "DELETE", "/api/v1/expenses/{expense_id}", delete_expense
+    ),
+    Scenario(
+        "expenses.import", "POST", "/api/v1/expenses/{group_id}/import", import_expenses
+    ),
+    Scenario(
+        "settlements.admin_groups",
+        "GET",
+        "/api/v1/settements/admin-groups",
+        get("/api/v1/settements/admin-groups"),
+    ),
+    Scenario("users.set_pin", "POST", "/api/v1/users/security/set-pin", set_pin),
+    Scenario(
+        "users.verify_pin", "POST", "/api/v1/users/security/verify-pin", verify_pin
+    ),
+    Scenario(
+        "users.deactivate_pin",
+        "PUT",
+        "/api/v1/users/security/deactivate-pin",
+        deactivate_pin,
+    ),
+    Scenario(
+        "webhooks.health", "GET", "/api/v1/webhooks/", anonymous("/api/v1/webhooks/")
+    ),
+    Scenario("webhooks.clerk", "POST", "/api/v1/webhooks/clerk", clerk_webhook),
+]
+
+
+# ---------------------------------------------------------------------------
+# Measurement
+# ---------------------------------------------------------------------------
+
+_SAMPLE = re.compile(
+    r"^(splito_request_db_(?:queries|seconds))_(sum|count)\{(.*)\} (\S+)$"
+)
+_LABEL = re.compile(r'(\w+)="((?:[^"\\]|\\.)*)"')
+
+
+async def scrape(client: httpx.AsyncClient) -> Dict[tuple, float]:
+    """(metric, sum|count, method, route) -> value from the server."""
+    res = await client.get("/api/v1/system/metrics/prometheus")
+    res.raise_for_status()
+
+    samples = {}
+    for line in res.text.splitlines():
+        m = _SAMPLE.match(line)
+        if m:
+            labels = dict(_LABEL.findall(m.group(3)))
+            key = (m.group(1), m.group(2), labels["method"], labels["route"])
+            samples[key] = float(m.group(4))
+    return samples
+
+
+def percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    rank = max(
+        0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values)) - 1)
+    )
+    return sorted_values[rank]
+
+
+async def run_scenario(client, ctx, scenario, args) -> dict:
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    failures: Counter = Counter()
+
+    async def worker(index: int):
+        rng = random.Random(args.seed * 1000 + index)
+        while perf_counter() < deadline:
+            try:
+                elapsed, status = await scenario.run(client, ctx, rng)
+            except Exception as e:
+                failures[type(e).__name__] += 1
+                continue
+            latencies.append(elapsed)
+            statuses[status] += 1
+
+    # Warm caches and connections outside the measured window
+    deadline = perf_counter() + args.warmup
+    await asyncio.gather(*(worker(i) for i in range(args.clients)))
+    latencies.clear()
+    statuses.clear()
+    failures.clear()
+
+    before = await scrape(client)
+    start = perf_counter()
+    deadline = start + args.duration
+    await asyncio.gather(*(worker(i) for i in range(args.clients)))
+    wall = perf_counter() - start
+    after = await scrape(client)
+
+    def delta(metric, kind):
+        key = (metric, kind, scenario.method, scenario.route)
+        return after.get(key, 0.0) - before.get(key, 0.0)
+
+    served = delta("splito_request_db_queries", "count")
+    latencies.sort()
+    errors = sum(n for s, n in statuses.items() if s >= 400) + sum(failures.values())
+
+    return {
+        "scenario": scenario.name,
+        "method": scenario.method,
+        "route": scenario.route,
+        "requests": len(latencies),
+        "errors": errors,
+        "statuses": {str(s): n for s, n in sorted(statuses.items())},
+        "failures": dict(failures),
+        "throughput_rps": round(len(latencies) / wall, 2),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "max_ms": round(latencies[-1] * 1000, 2) if latencies else 0.0,
+        # Server-side, so setup requests of write scenarios are included
+        "queries_per_request": (
+            round(delta("splito_request_db_queries", "sum") / served, 2)
+            if served
+            else None
+        ),
+        "db_ms_per_request": (
+            round(delta("splito_request_db_seconds", "sum") / served * 1000, 2)
+            if served
+            else None
+        ),
+    }
+
+
+# ---------------------------------------------------------------------------
+# Server and driver
+# ---------------------------------------------------------------------------
+
+
+def git_revision() -> dict:
+    def git(*cmd):
+        return subprocess.run(
+            ["git", *cmd], capture_output=True, text=True, check=False
+        ).stdout.strip()
+
+    return {
+        "commit": git("rev-parse", "--short", "HEAD"),
+        "dirty": bool(git("status", "--porcelain", "--untracked-files=no")),
+    }
+
+
+def start_server(jwks_path: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "CLERK_JWKS_FILE": jwks_path}
+    return subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "app.main:app",
+            "--host",
+            "127.0.0.1",
+            "--port",
+            str(port),
+            "--workers",
+            "1",
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=env,
+    )
+
+
+async def wait_until_up(client: httpx.AsyncClient, proc: subprocess.Popen):
+    for _ in range(100):
+        if proc.poll() is not None:
+            raise SystemExit("Server exited during startup")
+        try:
+            if (await client.get("/api/v1/system/health")).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise SystemExit("Server did not come up")
+
+
+def print_table(results: List[dict]):
+    header = (
+        f"{'scenario':<26}{'req':>7}{'err':>6}{'rps':>9}"
+        f"{'p50':>9}{'p95':>9}{'p99':>9}{'q/req':>7}"
+    )
+    print(header)
+    print("-" * len(header))
+    for r in results:
+        qpr = r["queries_per_request"]
+        print(
+            f"{r['scenario']:<26}{r['requests']:>7}{r['errors']:>6}"
+            f"{r['throughput_rps']:>9.1f}{r['p50_ms']:>9.1f}{r['p95_ms']:>9.1f}"
+            f"{r['p99_ms']:>9.1f}{'-' if qpr is None else f'{qpr:.1f}':>7}"
+        )
+
+
+async def run(args):
+    await seed(args)
+
+    tokens = TokenMinter()
+    ctx = await load_context(tokens)
+
+    scenarios = [
+        s
+        for s in SCENARIOS
+        if not args.only or any(s.name.startswith(p) for p in args.only.split(","))
+    ]
+
+    with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as f:
+        json.dump(tokens.jwks(), f)
+        jwks_path = f.name
+
+    proc = start_server(jwks_path, args.port)
+    limits = httpx.Limits(max_connections=args.clients + 2)
+    try:
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{args.port}", limits=limits, timeout=60
+        ) as client:
+            await wait_until_up(client, proc)
+
+            results = []
+            for scenario in scenarios:
+                results.append(await run_scenario(client, ctx, scenario, args))
+                print(f"Splito : {scenario.name} done")
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+        os.unlink(jwks_path)
+
+    print_table(results)
+
+    report = {
+        **git_revision(),
+        "started_at": datetime.now(timezone.utc).isoformat(),
+        "params": {
+            k: getattr(args, k)
+            for k in (
+                "users", "splits", "seed", "clients", "duration", "warmup", "only"
+            )
+        },
+        "dataset": {
+            "seeded_users": len(ctx.clerk_ids),
+            "memberships": len(ctx.my_member),
+            "groups": len(ctx.group_members),
+        },
+        "results": results,
+    }
+
+    RESULTS_DIR.mkdir(exist_ok=True)
+    stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+    out = RESULTS_DIR / f"{stamp}-{report['commit'] or 'nogit'}.json"
+    out.write_text(json.dumps(report, indent=2))
+    print(f"Splito : results written to {out}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--reset", action="store_true")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--splits", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=2.0)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--only", default=None, help="comma-separated name prefixes")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
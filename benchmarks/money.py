@@ -0,0 +1,127 @@
+"""
+Decimal vs integer-cent Money on the settlement and split hot paths.
+
+The Decimal baselines are the implementations Money replaced: a
+quantize per greedy step in simplify_debts and Decimal(str(float))
+rounding for every split.
+
+    python -m benchmarks.money [--members 5000] [--splits 200000]
+
+Imports the app settings, so run it with the usual .env in place (no
+database connection is made).
+"""
+import argparse
+import random
+from collections import deque
+from decimal import Decimal, ROUND_HALF_UP
+from time import perf_counter
+from app.core.money import Money
+from app.core.utils import simplify_debts
+from app.services.expense_services import reconcile_split_amounts
+
+CENTS = Decimal("0.01")
+
+
+def qround(d: Decimal) -> Decimal:
+    return d.quantize(CENTS, rounding=ROUND_HALF_UP)
+
+
+def decimal_simplify_debts(net_map):
+    creditors = []
+    debtors = []
+    for uid, bal in net_map.items():
+        if bal > Decimal("0.01"):
+            creditors.append([uid, bal])
+        elif bal < Decimal("-0.01"):
+            debtors.append([uid, -bal])
+
+    creditors.sort(key=lambda x: x[1], reverse=True)
+    debtors.sort(key=lambda x: x[1], reverse=True)
+    creditors = deque(creditors)
+    debtors = deque(debtors)
+
+    transfers = []
+    while creditors and debtors:
+        cred_id, cred_amt = creditors[0]
+        debt_id, debt_amt = debtors[0]
+        pay_amt = qround(min(cred_amt, debt_amt))
+        if pay_amt > 0:
+            transfers.append((debt_id, cred_id, pay_amt))
+        new_cred = qround(cred_amt - pay_amt)
+        new_debt = qround(debt_amt - pay_amt)
+        creditors.popleft()
+        debtors.popleft()
+        if new_cred > Decimal("0"):
+            creditors.appendleft([cred_id, new_cred])
+        if new_debt > Decimal("0"):
+            debtors.appendleft([debt_id, new_debt])
+    return transfers
+
+
+def decimal_reconcile(amount, split_amounts):
+    expense_amount = Decimal(str(amount)).quantize(CENTS, rounding=ROUND_HALF_UP)
+    splits = [
+        Decimal(str(a)).quantize(CENTS, rounding=ROUND_HALF_UP) for a in split_amounts
+    ]
+    if any(amt <= 0 for amt in splits):
+        raise ValueError("Split amounts must be positive")
+    difference = expense_amount - sum(splits)
+    if difference != 0:
+        if abs(difference) > Decimal("0.10"):
+            raise ValueError("Split total differs too much")
+        splits[0] += difference
+    return expense_amount, splits
+
+
+def bench(label, fn, *args, repeat=5):
+    best = min(_once(fn, *args) for _ in range(repeat))
+    print(f"  {label:<10} {best * 1000:>9.2f} ms")
+    return best
+
+
+def _once(fn, *args):
+    start = perf_counter()
+    fn(*args)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--members", type=int, default=5000)
+    parser.add_argument("--splits", type=int, default=200_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+
+    cents = [rng.randint(-500_000, 500_000) for _ in range(args.members - 1)]
+    cents.append(-sum(cents))
+    as_decimal = {i: Decimal(c).scaleb(-2) for i, c in enumerate(cents)}
+    as_money = {i: Money(c) for i, c in enumerate(cents)}
+
+    print(f"simplify_debts, {args.members} members")
+    old = bench("decimal", decimal_simplify_debts, as_decimal)
+    new = bench("money", simplify_debts, as_money)
+    print(f"  speedup    {old / new:>9.1f}x")
+
+    # Expenses of 2-20 float splits each, as they arrive from the API
+    expenses = []
+    total = 0
+    while total < args.splits:
+        n = rng.randint(2, 20)
+        amount = rng.randint(100, 100_000) / 100
+        expenses.append((amount, [amount / n] * n))
+        total += n
+
+    def run(reconcile):
+        for amount, splits in expenses:
+            reconcile(amount, splits)
+
+    print(f"split reconciliation, {total} splits")
+    old = bench("decimal", run, decimal_reconcile)
+    new = bench("money", run, reconcile_split_amounts)
+    print(f"  speedup    {old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""
+Response serialization for list endpoints: FastAPI's default path
+(jsonable_encoder, optionally response_model validation, then json.dumps)
+vs the orjson fast path used by the routes.
+
+    python -m benchmarks.serialization [--rows 10000]
+
+Imports the app settings, so run it with the usual .env in place (no
+database connection is made).
+"""
+import argparse
+import random
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from app.core.responses import json_response
+from app.schemas.group import GroupListResponse
+
+GROUP_LIST = TypeAdapter(list[GroupListResponse])
+
+
+def default_encode(rows):
+    return JSONResponse(jsonable_encoder(rows)).body
+
+
+def response_model_encode(rows):
+    # What FastAPI does for a route declared with response_model=...
+    validated = GROUP_LIST.validate_python(rows)
+    return JSONResponse(GROUP_LIST.dump_python(validated, mode="json")).body
+
+
+def fast_encode(rows):
+    return json_response(rows).body
+
+
+def bench(label, fn, *args, repeat=5):
+    best = min(_once(fn, *args) for _ in range(repeat))
+    print(f"  {label:<15} {best * 1000:>9.2f} ms")
+    return best
+
+
+def _once(fn, *args):
+    start = perf_counter()
+    fn(*args)
+    return perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    start = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+    # Shapes produced by _expense_row and list_group_for_user
+    expenses = [
+        {
+            "id": i,
+            "group_id": rng.randint(1, 50),
+            "title": f"expense {i}",
+            "amount": rng.randint(100, 100_000) / 100,
+            "paid_by": rng.randint(1, 500),
+            "payer_name": f"user {rng.randint(1, 500)}",
+            "strategy": "equal",
+            "created_at": start + timedelta(minutes=i),
+            "my_share": rng.randint(100, 10_000) / 100,
+        }
+        for i in range(args.rows)
+    ]
+    groups = [
+        {
+            "id": i,
+            "name": f"group {i}",
+            "created_by": rng.randint(1, 500),
+            "created_at": start + timedelta(hours=i),
+            "my_balance": rng.randint(-10_000, 10_000) / 100,
+            "member_count": rng.randint(2, 20),
+            "is_admin": rng.random() < 0.2,
+        }
+        for i in range(args.rows)
+    ]
+
+    assert fast_encode(groups) == fast_encode(
+        GROUP_LIST.dump_python(GROUP_LIST.validate_python(groups))
+    )
+
+    print(f"expense list, {args.rows} rows")
+    old = bench("jsonable", default_encode, expenses)
+    new = bench("orjson", fast_encode, expenses)
+    print(f"  speedup         {old / new:>9.1f}x")
+
+    print(f"group list (response_model), {args.rows} rows")
+    old = bench("response_model", response_model_encode, groups)
+    new = bench("orjson", fast_encode, groups)
+    print(f"  speedup         {old / new:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
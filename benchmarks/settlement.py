@@ -0,0 +1,80 @@
+"""
+Greedy vs exact settlement: transfer counts and runtime by group size.
+
+Balances are produced by replaying random equal-split expenses, which
+is closer to real groups than independent random balances.
+
+    python -m benchmarks.settlement [--trials 50] [--seed 7]
+
+Imports the app settings, so run it with the usual .env in place (no
+database connection is made).
+"""
+import argparse
+import random
+from collections import defaultdict
+from statistics import mean
+from time import perf_counter
+from app.core.money import Money
+from app.core.settlement import exact_transfers, greedy_transfers
+
+SIZES = [3, 5, 8, 10, 12, 14, 16, 18, 20, 30]
+
+
+def random_balances(rng: random.Random, members: int) -> dict:
+    net = defaultdict(int)
+    for _ in range(members * 3):
+        payer = rng.randrange(members)
+        sharers = rng.sample(range(members), rng.randint(2, members))
+        share = rng.randint(1, 500) * 100
+        for m in sharers:
+            net[m] -= share
+        net[payer] += share * len(sharers)
+    return {m: Money(c) for m, c in net.items()}
+
+
+def check(net_map: dict, transfers: list):
+    left = {m: v.cents for m, v in net_map.items()}
+    for debtor, creditor, amount in transfers:
+        left[debtor] += amount.cents
+        left[creditor] -= amount.cents
+    assert all(abs(v) <= 1 for v in left.values()), left
+
+
+def timed(fn, net_map):
+    start = perf_counter()
+    transfers = fn(net_map, time_budget=2.0)
+    return transfers, (perf_counter() - start) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--trials", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    print(f"{'members':>7} {'greedy tx':>10} {'exact tx':>9} {'saved':>6} "
+          f"{'greedy ms':>10} {'exact ms':>9}")
+
+    for size in SIZES:
+        g_tx, e_tx, g_ms, e_ms = [], [], [], []
+        for _ in range(args.trials):
+            net_map = random_balances(rng, size)
+
+            greedy, ms = timed(greedy_transfers, net_map)
+            check(net_map, greedy)
+            g_tx.append(len(greedy))
+            g_ms.append(ms)
+
+            exact, ms = timed(exact_transfers, net_map)
+            check(net_map, exact)
+            e_tx.append(len(exact))
+            e_ms.append(ms)
+
+        saved = 1 - mean(e_tx) / mean(g_tx) if mean(g_tx) else 0
+        print(f"{size:>7} {mean(g_tx):>10.2f} {mean(e_tx):>9.2f} {saved:>6.1%} "
+              f"{mean(g_ms):>10.3f} {mean(e_ms):>9.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Per-request SQLAlchemy overhead of the hot-path queries: building the
+select on every call (as the services used to) vs executing the prebuilt
+module-level statements with bound parameters.
+
+Two measurements:
+  * execute: full Session.execute round trip against in-memory SQLite,
+    so the database share is tiny and what's left is Python overhead
+  * build:   constructing the statement and computing its cache key, vs
+    only the cache key lookup for the prebuilt one
+
+    python -m benchmarks.statements [--calls 20000]
+
+Imports the app settings, so run it with the usual .env in place (no
+Postgres connection is made).
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from decimal import Decimal
+from time import perf_counter
+from sqlalchemy import create_engine, exists, func, select
+from sqlalchemy.orm import Session
+from app.core import dependencies, utils
+from app.db.session import Base
+from app.models import Expense, ExpenseSplit, Group, GroupMember, GroupMemberBalance
+from app.models import User
+from app.services import (
+    expense_import_service,
+    expense_services,
+    group_services,
+    settlement_service,
+    user_service,
+)
+
+USER_ID = 1
+GROUP_ID = 1
+MEMBER_ID = 1
+
+
+def setup_session() -> Session:
+    engine = create_engine("sqlite://")
+    tables = (User, Group, GroupMember, GroupMemberBalance, Expense, ExpenseSplit)
+    Base.metadata.create_all(engine, tables=[t.__table__ for t in tables])
+
+    session = Session(engine)
+    session.add(User(id=USER_ID, clerk_user_id="bench", email="b@example.com"))
+    session.add(Group(id=GROUP_ID, name="bench", created_by=USER_ID, is_deleted=False))
+    session.add(
+        GroupMember(id=MEMBER_ID, group_id=GROUP_ID, user_id=USER_ID, name="b")
+    )
+    session.add(GroupMemberBalance(member_id=MEMBER_ID, group_id=GROUP_ID, balance=0))
+
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    for i in range(1, 51):
+        session.add(
+            Expense(
+                id=i,
+                group_id=GROUP_ID,
+                paid_by=MEMBER_ID,
+                amount=10,
+                title=f"expense {i}",
+                is_deleted=False,
+                created_at=start + timedelta(minutes=i),
+            )
+        )
+        session.add(ExpenseSplit(expense_id=i, member_id=MEMBER_ID, amount=10))
+    session.commit()
+    return session
+
+
+# ---------------------------------------------------------------
+# The same queries as the services built them before (per call)
+# ---------------------------------------------------------------
+
+
+def inline_current_user(db):
+    return db.execute(select(User).where(User.clerk_user_id == "bench")).scalar()
+
+
+def inline_membership(db):
+    group = db.scalar(
+        select(Group.id).where(Group.id == GROUP_ID, Group.is_deleted == False)
+    )
+    is_member = db.scalar(
+        select(
+            exists().where(
+                GroupMember.group_id == GROUP_ID, GroupMember.user_id == USER_ID
+            )
+        )
+    )
+    return group, is_member
+
+
+def inline_member_id(db):
+    q = select(GroupMember.id).where(
+        GroupMember.user_id == USER_ID, GroupMember.group_id == GROUP_ID
+    )
+    return db.execute(q).scalar_one_or_none()
+
+
+def inline_group_version(db):
+    return db.scalar(
+        select(Group.version)
+        .join(
+            GroupMember,
+            (GroupMember.group_id == Group.id) & (GroupMember.user_id == USER_ID),
+        )
+        .where(Group.id == GROUP_ID, Group.is_deleted == False)
+        .limit(1)
+    )
+
+
+def inline_group_page(db):
+    params = {"group_id": GROUP_ID, "member_id": MEMBER_ID}
+    q = expense_services._group_expenses_select()
+    return db.execute(q.limit(21), params).all()
+
+
+# ---------------------------------------------------------------
+# Prebuilt statements, as the services run them now
+# ---------------------------------------------------------------
+
+
+def prebuilt_current_user(db):
+    return db.execute(dependencies.CURRENT_USER_Q, {"clerk_user_id": "bench"}).scalar()
+
+
+def prebuilt_membership(db):
+    params = {"group_id": GROUP_ID, "user_id": USER_ID}
+    return db.execute(dependencies.ACTIVE_MEMBERSHIP_Q, params).first()
+
+
+def prebuilt_member_id(db):
+    params = {"user_id": USER_ID, "group_id": GROUP_ID}
+    return db.execute(dependencies.MEMBER_ID_Q, params).scalar_one_or_none()
+
+
+def prebuilt_group_version(db):
+    params = {"group_id": GROUP_ID, "user_id": USER_ID}
+    return db.scalar(group_services.GROUP_VERSION_Q, params)
+
+
+def prebuilt_group_page(db):
+    params = {"group_id": GROUP_ID, "member_id": MEMBER_ID}
+    return db.execute(expense_services.GROUP_EXPENSES_Q.limit(21), params).all()
+
+
+EXECUTE_CASES = [
+    ("get_current_user", inline_current_user, prebuilt_current_user),
+    ("ensure_member", inline_membership, prebuilt_membership),
+    ("fetch_member_id", inline_member_id, prebuilt_member_id),
+    ("group_version", inline_group_version, prebuilt_group_version),
+    ("group_expenses", inline_group_page, prebuilt_group_page),
+]
+
+# Statement construction + cache key, one entry per prebuilt statement.
+# The builders are what used to run inside the request.
+BUILD_CASES = [
+    (
+        "member_id",
+        lambda: select(GroupMember.id).where(
+            GroupMember.user_id == USER_ID, GroupMember.group_id == GROUP_ID
+        ),
+        dependencies.MEMBER_ID_Q,
+    ),
+    (
+        "split_members",
+        lambda: select(GroupMember.id).where(
+            GroupMember.group_id == GROUP_ID, GroupMember.id.in_([1, 2, 3])
+        ),
+        expense_services.SPLIT_MEMBERS_Q,
+    ),
+    (
+        "my_expenses",
+        expense_services._my_expenses_select,
+        expense_services.MY_EXPENSES_Q,
+    ),
+    (
+        "group_detail",
+        group_services._group_detail_select,
+        group_services.GROUP_DETAIL_Q,
+    ),
+    ("group_list", group_services._user_groups_select, group_services.USER_GROUPS_Q),
+    ("analytics", group_services._analytics_select, group_services.ANALYTICS_Q),
+    (
+        "settlements",
+        settlement_service._admin_settlement_rows_select,
+        settlement_service.ADMIN_SETTLEMENT_ROWS_Q,
+    ),
+    (
+        "unsettled",
+        lambda: select(
+            exists().where(
+                GroupMemberBalance.group_id == GROUP_ID,
+                func.abs(GroupMemberBalance.balance) > Decimal("0.05"),
+            )
+        ),
+        utils.UNSETTLED_Q,
+    ),
+    (
+        "import_members",
+        lambda: select(GroupMember.id, GroupMember.user_id).where(
+            GroupMember.group_id == GROUP_ID
+        ),
+        expense_import_service.GROUP_MEMBER_IDS_Q,
+    ),
+    (
+        "pin_hash",
+        lambda: select(User.security_pin).where(User.id == USER_ID),
+        user_service.PIN_HASH_Q,
+    ),
+]
+
+
+def per_call(fn, *args, calls: int) -> float:
+    for _ in range(min(calls // 10, 1000)):
+        fn(*args)
+
+    start = perf_counter()
+    for _ in range(calls):
+        fn(*args)
+    return (perf_counter() - start) / calls * 1e6
+
+
+def report(label, before, after):
+    print(
+        f"  {label:<18} {before:>9.1f} us {after:>9.1f} us"
+        f" {before - after:>9.1f} us {before / after:>6.1f}x"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--calls", type=int, default=20_000)
+    args = parser.parse_args()
+
+    db = setup_session()
+    header = f"  {'':<18} {'built':>12} {'prebuilt':>12} {'saved':>12} {'':>7}"
+
+    print("execute (SQLite in memory, per call)")
+    print(header)
+    for label, inline, prebuilt in EXECUTE_CASES:
+        assert inline(db) is not None and prebuilt(db) is not None
+        before = per_call(inline, db, calls=args.calls)
+        after = per_call(prebuilt, db, calls=args.calls)
+        report(label, before, after)
+
+    print("build + cache key (per call)")
+    print(header)
+    for label, build, stmt in BUILD_CASES:
+        before = per_call(lambda: build()._generate_cache_key(), calls=args.calls)
+        after = per_call(stmt._generate_cache_key, calls=args.calls)
+        report(label, before, after)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,28 @@
+"""add group version counter
+
+Revision ID: 3c61d0b7e52a
+Revises: fae028f6a3e9
+Create Date: 2026-10-17 16:20:54.307192
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c61d0b7e52a'
+down_revision: Union[str, Sequence[str], None] = 'fae028f6a3e9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('groups', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('groups', 'version')
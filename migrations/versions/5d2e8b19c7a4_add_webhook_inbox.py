@@ -0,0 +1,42 @@
+"""add webhook inbox
+
+Revision ID: 5d2e8b19c7a4
+Revises: 3c61d0b7e52a
+Create Date: 2026-10-17 17:05:31.482916
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5d2e8b19c7a4'
+down_revision: Union[str, Sequence[str], None] = '3c61d0b7e52a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('webhook_inbox',
+    sa.Column('id', sa.BigInteger(), nullable=False),
+    sa.Column('event_id', sa.String(), nullable=False),
+    sa.Column('event_type', sa.String(), nullable=False),
+    sa.Column('payload', postgresql.JSONB(astext_type=sa.Text()), nullable=False),
+    sa.Column('received_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('processed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('attempts', sa.Integer(), server_default='0', nullable=False),
+    sa.Column('last_error', sa.String(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('event_id')
+    )
+    op.create_index('ix_webhook_inbox_pending', 'webhook_inbox', ['id'], unique=False, postgresql_where=sa.text('processed_at IS NULL'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_webhook_inbox_pending', table_name='webhook_inbox', postgresql_where=sa.text('processed_at IS NULL'))
+    op.drop_table('webhook_inbox')
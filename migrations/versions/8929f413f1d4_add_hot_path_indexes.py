@@ -0,0 +1,39 @@
+"""add hot path indexes
+
+Revision ID: 8929f413f1d4
+Revises: a76acb249876
+Create Date: 2026-10-17 14:37:05.118962
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8929f413f1d4'
+down_revision: Union[str, Sequence[str], None] = 'a76acb249876'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps the tables writable while the indexes build
+    with op.get_context().autocommit_block():
+        op.create_index('ix_expenses_group_created_active', 'expenses', ['group_id', 'created_at', 'id'], unique=False, postgresql_where=sa.text('is_deleted = false'), postgresql_concurrently=True)
+        op.create_index('ix_expenses_paid_by_active', 'expenses', ['paid_by'], unique=False, postgresql_include=['amount', 'group_id'], postgresql_where=sa.text('is_deleted = false'), postgresql_concurrently=True)
+        op.create_index('ix_expense_splits_expense_member', 'expense_splits', ['expense_id', 'member_id'], unique=False, postgresql_include=['amount'], postgresql_concurrently=True)
+        op.create_index('ix_expense_splits_member', 'expense_splits', ['member_id'], unique=False, postgresql_include=['expense_id', 'amount'], postgresql_concurrently=True)
+        op.create_index('ix_group_members_user_group', 'group_members', ['user_id', 'group_id'], unique=False, postgresql_include=['is_admin'], postgresql_concurrently=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_group_members_user_group', table_name='group_members', postgresql_concurrently=True)
+        op.drop_index('ix_expense_splits_member', table_name='expense_splits', postgresql_concurrently=True)
+        op.drop_index('ix_expense_splits_expense_member', table_name='expense_splits', postgresql_concurrently=True)
+        op.drop_index('ix_expenses_paid_by_active', table_name='expenses', postgresql_concurrently=True)
+        op.drop_index('ix_expenses_group_created_active', table_name='expenses', postgresql_concurrently=True)
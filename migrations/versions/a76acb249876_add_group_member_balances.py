@@ -0,0 +1,68 @@
+"""add group member balances ledger
+
+Revision ID: a76acb249876
+Revises: e3a389a85bc5
+Create Date: 2026-10-17 10:12:41.503218
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a76acb249876'
+down_revision: Union[str, Sequence[str], None] = 'e3a389a85bc5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('group_member_balances',
+    sa.Column('member_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('balance', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['member_id'], ['group_members.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('member_id')
+    )
+    op.create_index(op.f('ix_group_member_balances_group_id'), 'group_member_balances', ['group_id'], unique=False)
+    op.add_column('groups', sa.Column('total_spent', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False))
+    # Backfill from existing expenses, the same sums as
+    # `python -m app.tools.rebuild balances`. Until this runs every group
+    # looks settled, so it has to land with the table.
+    op.execute(sa.text("""
+        INSERT INTO group_member_balances (member_id, group_id, balance)
+        SELECT member_id, group_id, SUM(delta)
+        FROM (
+            SELECT paid_by AS member_id, group_id, amount AS delta
+            FROM expenses
+            WHERE NOT is_deleted
+            UNION ALL
+            SELECT s.member_id, e.group_id, -s.amount
+            FROM expense_splits s
+            JOIN expenses e ON e.id = s.expense_id
+            WHERE NOT e.is_deleted
+        ) deltas
+        GROUP BY member_id, group_id
+    """))
+    op.execute(sa.text("""
+        UPDATE groups g
+        SET total_spent = spent.amount
+        FROM (
+            SELECT group_id, SUM(amount) AS amount
+            FROM expenses
+            WHERE NOT is_deleted
+            GROUP BY group_id
+        ) spent
+        WHERE spent.group_id = g.id
+    """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('groups', 'total_spent')
+    op.drop_index(op.f('ix_group_member_balances_group_id'), table_name='group_member_balances')
+    op.drop_table('group_member_balances')
@@ -0,0 +1,61 @@
+"""add user monthly spend rollup
+
+Revision ID: fae028f6a3e9
+Revises: 8929f413f1d4
+Create Date: 2026-10-17 15:42:08.114873
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'fae028f6a3e9'
+down_revision: Union[str, Sequence[str], None] = '8929f413f1d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('user_monthly_spend',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('group_id', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Date(), nullable=False),
+    sa.Column('share', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    sa.Column('paid', sa.Numeric(precision=12, scale=2), server_default='0', nullable=False),
+    sa.ForeignKeyConstraint(['group_id'], ['groups.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'group_id', 'month')
+    )
+    # Backfill from existing expenses, the same rows as
+    # `python -m app.tools.rebuild monthly-spend`, so past months don't
+    # read as zero spend after the upgrade
+    op.execute(sa.text("""
+        INSERT INTO user_monthly_spend (user_id, group_id, month, share, paid)
+        SELECT user_id, group_id, month, SUM(share), SUM(paid)
+        FROM (
+            SELECT gm.user_id, e.group_id,
+                   date_trunc('month', e.created_at)::date AS month,
+                   s.amount AS share, 0 AS paid
+            FROM expense_splits s
+            JOIN expenses e ON e.id = s.expense_id
+            JOIN group_members gm ON gm.id = s.member_id
+            WHERE NOT e.is_deleted AND gm.user_id IS NOT NULL
+            UNION ALL
+            SELECT gm.user_id, e.group_id,
+                   date_trunc('month', e.created_at)::date,
+                   0, e.amount
+            FROM expenses e
+            JOIN group_members gm ON gm.id = e.paid_by
+            WHERE NOT e.is_deleted AND gm.user_id IS NOT NULL
+        ) deltas
+        GROUP BY user_id, group_id, month
+    """))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('user_monthly_spend')
@@ -0,0 +1,105 @@
+import asyncio
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import select
+from app.models import Group, GroupMember, GroupMemberBalance, User
+from app.models import UserMonthlySpend
+from app.schemas.expense import ExpenseCreate
+from app.services.expense_services import delete_expense, insert_expense
+from app.services.group_services import delete_group
+
+
+async def seed(sessions, self_paid=False) -> int:
+    """
+    Two members; user 1 pays 30.00 split evenly (or all to themselves).
+    Returns the expense id.
+    """
+    async with sessions() as db:
+        db.add_all(
+            [
+                User(id=1, clerk_user_id="u1", email="u1@example.com"),
+                User(id=2, clerk_user_id="u2", email="u2@example.com"),
+            ]
+        )
+        await db.flush()
+        db.add(Group(id=1, name="Trip", created_by=1))
+        await db.flush()
+        db.add_all(
+            [
+                GroupMember(id=1, group_id=1, user_id=1, name="One", is_admin=True),
+                GroupMember(id=2, group_id=1, user_id=2, name="Two"),
+            ]
+        )
+        await db.flush()
+
+        splits = (
+            [{"member_id": 1, "amount": 30}]
+            if self_paid
+            else [{"member_id": 1, "amount": 15}, {"member_id": 2, "amount": 15}]
+        )
+        data = ExpenseCreate(title="Dinner", amount=30, strategy="exact", splits=splits)
+        expense = await insert_expense(db, data, paid_by=1, group_id=1)
+        await db.commit()
+        return expense.id
+
+
+async def ledger(sessions):
+    async with sessions() as db:
+        balances = await db.execute(
+            select(GroupMemberBalance.member_id, GroupMemberBalance.balance)
+        )
+        total = await db.scalar(select(Group.total_spent))
+        monthly = await db.execute(
+            select(UserMonthlySpend.share, UserMonthlySpend.paid)
+        )
+        return dict(balances.all()), total, monthly.all()
+
+
+async def outcome(coro):
+    try:
+        return await coro
+    except HTTPException as e:
+        return e.status_code
+    except Exception as e:
+        # Let the other coroutine finish before the sessions close
+        return e
+
+
+async def delete_twice(sessions, expense_id):
+    async with sessions() as a, sessions() as b:
+        return await asyncio.gather(
+            outcome(delete_expense(a, 1, expense_id)),
+            outcome(delete_expense(b, 1, expense_id)),
+        )
+
+
+def test_concurrent_deletes_back_out_once(pg_session):
+    expense_id = asyncio.run(seed(pg_session))
+
+    results = asyncio.run(delete_twice(pg_session, expense_id))
+    balances, total, monthly = asyncio.run(ledger(pg_session))
+
+    assert sorted(map(str, results)) == ["404", "{'status': 'deleted'}"]
+    assert balances == {1: Decimal("0.00"), 2: Decimal("0.00")}
+    assert total == Decimal("0.00")
+    assert all(share == 0 and paid == 0 for share, paid in monthly)
+
+
+async def delete_group_and_expense(sessions, expense_id):
+    async with sessions() as a, sessions() as b:
+        return await asyncio.gather(
+            outcome(delete_group(a, 1, 1)),
+            outcome(delete_expense(b, 1, expense_id)),
+        )
+
+
+def test_group_delete_racing_expense_delete_backs_out_once(pg_session):
+    expense_id = asyncio.run(seed(pg_session, self_paid=True))
+
+    group, expense = asyncio.run(delete_group_and_expense(pg_session, expense_id))
+    _, total, monthly = asyncio.run(ledger(pg_session))
+
+    assert group == {"status": "deleted"}
+    assert expense in ({"status": "deleted"}, 404)
+    assert total == Decimal("0.00")
+    assert all(share == 0 and paid == 0 for share, paid in monthly)
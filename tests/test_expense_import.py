@@ -0,0 +1,48 @@
+import asyncio
+from datetime import timezone
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.schemas.expense import ExpenseImportRow
+from app.services.expense_import_service import MAX_IMPORT_ROWS
+from app.services.ledger_service import apply_expenses
+
+# asyncpg rejects statements with more arguments than this
+ASYNCPG_MAX_ARGS = 32767
+
+
+class CompilingSession:
+    """
+    Stands in for the session: compiles each statement the way asyncpg
+    would run it and records how many arguments it takes.
+    """
+
+    def __init__(self):
+        self.arg_counts = []
+
+    async def execute(self, stmt, params=None):
+        # render_postcompile expands IN lists the way execution would
+        compiled = stmt.compile(
+            dialect=asyncpg.dialect(), compile_kwargs={"render_postcompile": True}
+        )
+        self.arg_counts.append(len(compiled.positiontup or ()))
+
+
+def test_apply_expenses_at_import_cap_fits_asyncpg():
+    db = CompilingSession()
+    asyncio.run(apply_expenses(db, range(1, MAX_IMPORT_ROWS + 1)))
+
+    assert db.arg_counts
+    assert max(db.arg_counts) < ASYNCPG_MAX_ARGS
+
+
+def test_naive_created_at_is_utc():
+    row = ExpenseImportRow.model_validate(
+        {
+            "title": "Dinner",
+            "amount": 10,
+            "created_at": "2026-03-01T12:00:00",
+            "splits": [{"member_id": 1, "amount": 10}],
+        }
+    )
+
+    assert row.created_at.tzinfo is timezone.utc
+    assert row.created_at.hour == 12
@@ -0,0 +1,72 @@
+import asyncio
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+from app.core.metrics import RequestStats, instrument_engine, request_stats
+from app.db.session import Base
+from app.models import Group, GroupMember, GroupMemberBalance, User
+from app.services.group_services import get_group_by_id
+
+TABLES = (User, Group, GroupMember, GroupMemberBalance)
+
+
+class SyncSession:
+    """
+    Runs the service's awaits on a plain Session, so the real statements
+    execute on SQLite through an engine carrying the metrics hooks.
+    """
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    async def execute(self, statement, params=None, **kwargs):
+        return self.session.execute(statement, params, **kwargs)
+
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine, tables=[t.__table__ for t in TABLES])
+    instrument_engine(engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            [
+                User(id=1, clerk_user_id="u1", email="u1@example.com"),
+                User(id=2, clerk_user_id="u2", email="u2@example.com"),
+                Group(id=1, name="Trip", created_by=1, is_deleted=False),
+                GroupMember(id=1, group_id=1, user_id=1, name="One", is_admin=True),
+                GroupMemberBalance(member_id=1, group_id=1, balance=12.5),
+            ]
+        )
+        session.commit()
+        yield SyncSession(session)
+
+
+def count_queries(coro):
+    stats = RequestStats(scope={"method": "GET"})
+    token = request_stats.set(stats)
+    try:
+        return asyncio.run(coro), stats.queries
+    except HTTPException as e:
+        return e, stats.queries
+    finally:
+        request_stats.reset(token)
+
+
+def test_group_detail_is_one_query(db):
+    group, queries = count_queries(get_group_by_id(db, group_id=1, user_id=1))
+
+    assert queries == 1
+    assert group["member_count"] == 1
+    assert group["my_balance"] == 12.5
+    assert group["is_admin"] is True
+
+
+@pytest.mark.parametrize("group_id, user_id, status", [(1, 2, 403), (99, 1, 404)])
+def test_group_detail_errors_are_one_query(db, group_id, user_id, status):
+    error, queries = count_queries(get_group_by_id(db, group_id, user_id))
+
+    assert queries == 1
+    assert error.status_code == status
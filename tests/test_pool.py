@@ -0,0 +1,23 @@
+import pytest
+from app.core.config import settings
+from app.db.pool import pool_limits
+
+
+@pytest.mark.parametrize(
+    "max_connections, workers, expected",
+    [
+        (None, 1, (5, 10)),
+        # Budget larger than the configured pool: nothing grows
+        (100, 1, (5, 10)),
+        # Budget smaller: overflow shrinks first, then the pool
+        (40, 4, (5, 5)),
+        (12, 4, (3, 0)),
+    ],
+)
+def test_pool_limits_only_trim(monkeypatch, max_connections, workers, expected):
+    monkeypatch.setattr(settings, "DB_POOL_SIZE", 5)
+    monkeypatch.setattr(settings, "DB_MAX_OVERFLOW", 10)
+    monkeypatch.setattr(settings, "DB_MAX_CONNECTIONS", max_connections)
+    monkeypatch.setattr(settings, "WEB_CONCURRENCY", workers)
+
+    assert pool_limits() == expected
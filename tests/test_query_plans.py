@@ -0,0 +1,15 @@
+import asyncio
+from app.tools.check_plans import check_plans
+from app.tools.seed import scratch_schema, seed_database
+
+
+def test_read_services_use_indexes(postgres_url):
+    async def run():
+        async with scratch_schema() as (schema, scratch):
+            await seed_database(2_000, 200_000, schema=schema)
+            return await check_plans(scratch, min_rows=10_000)
+
+    failures = asyncio.run(run())
+    assert failures == [], "\n".join(
+        f"{name}: seq scan on {', '.join(scans)}" for name, scans, _ in failures
+    )
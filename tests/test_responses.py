@@ -0,0 +1,35 @@
+from datetime import datetime, timedelta, timezone
+import orjson
+from fastapi import Response
+from pydantic import BaseModel
+from app.core.responses import dumps, json_response
+
+
+class Stamped(BaseModel):
+    created_at: datetime
+
+
+def test_datetimes_match_response_model_output():
+    for value in (
+        datetime(2026, 3, 1, 12, 30, 5, 123456, tzinfo=timezone.utc),
+        datetime(2026, 3, 1, 12, 30, tzinfo=timezone(timedelta(hours=5, minutes=30))),
+        datetime(2026, 3, 1, 12, 30),
+    ):
+        expected = Stamped(created_at=value).model_dump_json()
+        assert orjson.loads(dumps({"created_at": value})) == orjson.loads(expected)
+
+
+def test_repeated_headers_carry_over():
+    injected = Response()
+    del injected.headers["content-length"]
+    injected.set_cookie("a", "1")
+    injected.set_cookie("b", "2")
+    injected.headers["ETag"] = '"g1-v3"'
+
+    result = json_response({"ok": True}, injected)
+
+    cookies = [v for k, v in result.raw_headers if k == b"set-cookie"]
+    assert len(cookies) == 2
+    assert result.headers["etag"] == '"g1-v3"'
+    assert result.headers["content-length"] == str(len(result.body))
+    assert result.headers.getlist("content-type") == ["application/json"]
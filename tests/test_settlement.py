@@ -0,0 +1,50 @@
+import random
+from time import perf_counter
+from app.core.money import Money
+from app.core.settlement import exact_transfers, settle_many
+from app.core.utils import simplify_debts
+
+
+def random_balances(rng: random.Random, members: int) -> dict:
+    net = {m: 0 for m in range(members)}
+    for _ in range(members * 3):
+        payer = rng.randrange(members)
+        sharers = rng.sample(range(members), rng.randint(2, members))
+        share = rng.randint(1, 500) * 100 + rng.randint(0, 99)
+        for m in sharers:
+            net[m] -= share
+        net[payer] += share * len(sharers)
+    return {m: Money(c) for m, c in net.items()}
+
+
+def test_exact_drops_noise_members_like_greedy():
+    # 1-cent balances are rounding noise: neither strategy moves money for them
+    net_map = {1: Money(1000), 2: Money(-999), 3: Money(-1)}
+
+    greedy = simplify_debts(net_map)
+    exact = exact_transfers(net_map, time_budget=1.0)
+
+    assert exact == greedy
+    assert all(amount.cents > 1 for _, _, amount in exact)
+
+
+def test_settle_many_shares_one_budget():
+    rng = random.Random(7)
+    groups = {gid: random_balances(rng, 18) for gid in range(40)}
+
+    start = perf_counter()
+    settled = settle_many(groups, strategy="exact", time_budget=0.1)
+    elapsed = perf_counter() - start
+
+    # One 0.1 s budget for all 40 groups, not 0.1 s each; the rest is greedy
+    assert elapsed < 1.0
+    assert set(settled) == set(groups)
+
+
+def test_settle_many_without_budget_is_greedy():
+    rng = random.Random(3)
+    groups = {gid: random_balances(rng, 6) for gid in range(5)}
+
+    settled = settle_many(groups, strategy="exact", time_budget=0)
+
+    assert settled == {gid: simplify_debts(m) for gid, m in groups.items()}
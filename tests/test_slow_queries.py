@@ -0,0 +1,56 @@
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, Integer, column, create_engine, select, table, text
+from sqlalchemy.dialects.postgresql import asyncpg
+from app.core.metrics import instrument_engine
+from app.core.slow_queries import normalize_statement, record_slow_queries
+from app.core.slow_queries import slow_query_log
+
+expenses = table(
+    "expenses", column("id", Integer), column("created_at", DateTime(timezone=True))
+)
+
+
+def asyncpg_sql(stmt) -> str:
+    # IN lists expanded the way they reach the driver
+    return str(
+        stmt.compile(
+            dialect=asyncpg.dialect(), compile_kwargs={"render_postcompile": True}
+        )
+    )
+
+
+def test_asyncpg_in_lists_share_one_key():
+    short = select(expenses).where(expenses.c.id.in_([1, 2]))
+    long = select(expenses).where(expenses.c.id.in_([1, 2, 3, 4, 5]))
+
+    assert "::INTEGER" in asyncpg_sql(short)
+    normalized = normalize_statement(asyncpg_sql(short))
+
+    assert "IN (...)" in normalized
+    assert normalized == normalize_statement(asyncpg_sql(long))
+
+
+def test_multi_word_casts_collapse():
+    at = datetime(2026, 1, 1, tzinfo=timezone.utc)
+    stmt = select(expenses.c.id).where(expenses.c.created_at.in_([at, at, at]))
+
+    assert "IN (...)" in normalize_statement(asyncpg_sql(stmt))
+
+
+def test_slow_query_log_reuses_metrics_timing():
+    engine = create_engine("sqlite://")
+    instrument_engine(engine)
+    record_slow_queries()
+    record_slow_queries()
+
+    threshold, slow_query_log.threshold_ms = slow_query_log.threshold_ms, 0
+    before = slow_query_log.recorded
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+    finally:
+        slow_query_log.threshold_ms = threshold
+
+    # Exactly one entry: no second set of timing hooks, no double listener
+    assert slow_query_log.recorded == before + 1
+    assert slow_query_log.recent(1)[0]["normalized"] == "SELECT 1"